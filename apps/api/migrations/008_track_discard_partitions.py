@@ -0,0 +1,55 @@
+"""Peewee migrations -- 008_track_discard_partitions.py."""
+
+import calendar
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+TRACK_DISCARD_TABLE = 'track_discard'
+PAST_DAYS = 2
+AHEAD_DAYS = 3
+
+
+def _daily_partitions(database: pw.Database) -> str:
+    today = datetime.now(timezone.utc).date()
+    start = today - timedelta(days=PAST_DAYS)
+
+    cursor = database.execute_sql(f'SELECT MIN(`created_at`) FROM `{TRACK_DISCARD_TABLE}`')
+    oldest = cursor.fetchone()[0]
+    if oldest is not None:
+        start = min(start, datetime.fromtimestamp(oldest, tz=timezone.utc).date())
+
+    partitions = []
+    day = start
+    while day <= today + timedelta(days=AHEAD_DAYS):
+        upper_bound = calendar.timegm((day + timedelta(days=1)).timetuple())
+        partitions.append(f'PARTITION `p{day:%Y%m%d}` VALUES LESS THAN ({upper_bound})')
+        day += timedelta(days=1)
+
+    partitions.append('PARTITION `pmax` VALUES LESS THAN MAXVALUE')
+    return ', '.join(partitions)
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+    # the partitioning column has to be a part of every unique key, including the primary one
+    database.execute_sql(f'DELETE FROM `{TRACK_DISCARD_TABLE}` WHERE `created_at` IS NULL')
+    database.execute_sql(f'ALTER TABLE `{TRACK_DISCARD_TABLE}` MODIFY `created_at` BIGINT NOT NULL')
+    database.execute_sql(f'ALTER TABLE `{TRACK_DISCARD_TABLE}` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `created_at`)')
+    database.execute_sql(
+        f'ALTER TABLE `{TRACK_DISCARD_TABLE}` PARTITION BY RANGE (`created_at`) ({_daily_partitions(database)})'
+    )
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+    database.execute_sql(f'ALTER TABLE `{TRACK_DISCARD_TABLE}` REMOVE PARTITIONING')
+    database.execute_sql(f'ALTER TABLE `{TRACK_DISCARD_TABLE}` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`)')
+    database.execute_sql(f'ALTER TABLE `{TRACK_DISCARD_TABLE}` MODIFY `created_at` BIGINT NULL')
@@ -0,0 +1,70 @@
+"""Peewee migrations -- 009_track_partitions.py."""
+
+import calendar
+from contextlib import suppress
+from datetime import date, datetime, timedelta, timezone
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+TRACK_TABLES = ('track_click', 'track_postback', 'track_lead')
+PAST_MONTHS = 1
+AHEAD_MONTHS = 2
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _monthly_partitions(database: pw.Database, table_name: str) -> str:
+    current_month = datetime.now(timezone.utc).date().replace(day=1)
+    start = current_month
+    for _ in range(PAST_MONTHS):
+        start = (start - timedelta(days=1)).replace(day=1)
+
+    cursor = database.execute_sql(f'SELECT MIN(`created_at`) FROM `{table_name}` WHERE `created_at` > 0')
+    oldest = cursor.fetchone()[0]
+    if oldest is not None:
+        start = min(start, datetime.fromtimestamp(oldest, tz=timezone.utc).date().replace(day=1))
+
+    last_month = current_month
+    for _ in range(AHEAD_MONTHS):
+        last_month = _next_month(last_month)
+
+    partitions = []
+    month = start
+    while month <= last_month:
+        upper_bound = calendar.timegm(_next_month(month).timetuple())
+        partitions.append(f'PARTITION `p{month:%Y%m}` VALUES LESS THAN ({upper_bound})')
+        month = _next_month(month)
+
+    partitions.append('PARTITION `pmax` VALUES LESS THAN MAXVALUE')
+    return ', '.join(partitions)
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+    # every statement below rebuilds the table, on a large tracker database this has to run in a maintenance window
+    for table_name in TRACK_TABLES:
+        # rows without created_at are kept, they land into the oldest partition
+        database.execute_sql(f'UPDATE `{table_name}` SET `created_at` = 0 WHERE `created_at` IS NULL')
+        database.execute_sql(f'ALTER TABLE `{table_name}` MODIFY `created_at` BIGINT NOT NULL')
+        # the partitioning column has to be a part of every unique key, including the primary one
+        database.execute_sql(f'ALTER TABLE `{table_name}` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `created_at`)')
+        database.execute_sql(
+            f'ALTER TABLE `{table_name}` PARTITION BY RANGE (`created_at`) '
+            f'({_monthly_partitions(database, table_name)})'
+        )
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+    for table_name in TRACK_TABLES:
+        database.execute_sql(f'ALTER TABLE `{table_name}` REMOVE PARTITIONING')
+        database.execute_sql(f'ALTER TABLE `{table_name}` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`)')
+        database.execute_sql(f'ALTER TABLE `{table_name}` MODIFY `created_at` BIGINT NULL')
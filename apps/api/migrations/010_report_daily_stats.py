@@ -0,0 +1,54 @@
+"""Peewee migrations -- 010_report_daily_stats.py."""
+
+from contextlib import suppress
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    @migrator.create_model
+    class ReportDailyStats(pw.Model):
+        id = pw.AutoField()
+        created_at = pw.TimestampField(null=True)
+        campaign_id = pw.IntegerField()
+        date = pw.DateField()
+        parameters = pw.TextField()
+        parameters_hash = pw.CharField(max_length=32)
+        has_parameters = pw.BooleanField()
+        clicks = pw.IntegerField(default=0)
+        leads_accept = pw.IntegerField(default=0)
+        leads_expect = pw.IntegerField(default=0)
+        leads_reject = pw.IntegerField(default=0)
+        leads_trash = pw.IntegerField(default=0)
+        payouts_accept = pw.DecimalField(auto_round=False, decimal_places=5, default=0, max_digits=14, rounding=ROUND_HALF_EVEN)
+        payouts_expect = pw.DecimalField(auto_round=False, decimal_places=5, default=0, max_digits=14, rounding=ROUND_HALF_EVEN)
+
+        class Meta:
+            table_name = "report_daily_stats"
+            indexes = [(('campaign_id', 'date', 'parameters_hash', 'has_parameters'), True)]
+
+    @migrator.create_model
+    class ReportWatermark(pw.Model):
+        id = pw.AutoField()
+        created_at = pw.TimestampField(null=True)
+        name = pw.CharField(max_length=255)
+        value = pw.BigIntegerField()
+
+        class Meta:
+            table_name = "report_watermark"
+            indexes = [(('name',), True)]
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    migrator.remove_model('report_watermark')
+    migrator.remove_model('report_daily_stats')
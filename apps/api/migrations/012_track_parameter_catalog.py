@@ -0,0 +1,35 @@
+"""Peewee migrations -- 012_track_parameter_catalog.py."""
+
+from contextlib import suppress
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    @migrator.create_model
+    class TrackParameterCatalog(pw.Model):
+        id = pw.AutoField()
+        created_at = pw.TimestampField(null=True)
+        campaign_id = pw.IntegerField()
+        parameter = pw.CharField(collation='utf8mb4_bin', max_length=255)
+        value = pw.CharField(collation='utf8mb4_bin', max_length=255)
+        first_seen_at = pw.TimestampField()
+        last_seen_at = pw.TimestampField()
+        count = pw.IntegerField(default=0)
+
+        class Meta:
+            table_name = "track_parameter_catalog"
+            indexes = [(('campaign_id', 'parameter', 'value'), True)]
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    migrator.remove_model('track_parameter_catalog')
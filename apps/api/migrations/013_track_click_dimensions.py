@@ -0,0 +1,43 @@
+"""Peewee migrations -- 013_track_click_dimensions.py."""
+
+from contextlib import suppress
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    migrator.add_fields(
+        'campaign',
+        dimension_parameters=pw.TextField(null=True),
+        materialized_dimension_parameters=pw.TextField(null=True),
+        dimension_parameters_updated_at=pw.TimestampField(null=True),
+    )
+
+    # adding columns rebuilds track_click, on a large tracker database this has to run in a maintenance window
+    migrator.add_fields(
+        'track_click',
+        has_parameters=pw.BooleanField(null=True),
+        dimension_1=pw.CharField(max_length=255, null=True),
+        dimension_2=pw.CharField(max_length=255, null=True),
+        dimension_3=pw.CharField(max_length=255, null=True),
+    )
+    migrator.add_index('track_click', 'campaign_id', 'created_at')
+    migrator.add_index('track_click', 'campaign_id', 'dimension_1')
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    migrator.drop_index('track_click', 'campaign_id', 'dimension_1')
+    migrator.drop_index('track_click', 'campaign_id', 'created_at')
+    migrator.remove_fields('track_click', 'has_parameters', 'dimension_1', 'dimension_2', 'dimension_3')
+    migrator.remove_fields(
+        'campaign', 'dimension_parameters', 'materialized_dimension_parameters', 'dimension_parameters_updated_at'
+    )
@@ -0,0 +1,38 @@
+"""Peewee migrations -- 014_report_lead_outbox.py."""
+
+from contextlib import suppress
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+class BinaryUUIDField(pw.Field):
+    field_type = 'BINARY(16)'
+
+
+REPORT_LEAD_OUTBOX_TABLE = 'report_lead_outbox'
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    @migrator.create_model
+    class ReportLeadOutbox(pw.Model):
+        id = pw.AutoField()
+        created_at = pw.TimestampField(null=True)
+        click_id = BinaryUUIDField()
+        source = pw.CharField(max_length=255)
+
+        class Meta:
+            table_name = REPORT_LEAD_OUTBOX_TABLE
+            table_settings = ('ENGINE=InnoDB',)
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    migrator.remove_model(REPORT_LEAD_OUTBOX_TABLE)
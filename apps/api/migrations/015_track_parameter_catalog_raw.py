@@ -0,0 +1,31 @@
+"""Peewee migrations -- 015_track_parameter_catalog_raw.py."""
+
+from contextlib import suppress
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    # a raw row marks a parameter whose values, or a campaign whose parameter names, the catalog can not hold
+    migrator.add_fields('track_parameter_catalog', is_raw=pw.BooleanField(default=False))
+    migrator.drop_index('track_parameter_catalog', 'campaign_id', 'parameter', 'value')
+    migrator.add_index('track_parameter_catalog', 'campaign_id', 'parameter', 'is_raw', 'value', unique=True)
+    # clicks folded before had no raw rows, the catalog is folded again from the first click
+    migrator.sql('DELETE FROM track_parameter_catalog')
+    migrator.sql("DELETE FROM report_watermark WHERE name = 'track_parameter_catalog.track_click'")
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    migrator.drop_index('track_parameter_catalog', 'campaign_id', 'parameter', 'is_raw', 'value')
+    migrator.sql('DELETE FROM track_parameter_catalog WHERE is_raw')
+    migrator.add_index('track_parameter_catalog', 'campaign_id', 'parameter', 'value', unique=True)
+    migrator.remove_fields('track_parameter_catalog', 'is_raw')
@@ -0,0 +1,92 @@
+import argparse
+import dataclasses
+import statistics
+import time
+
+import rule_engine
+
+from src.core.entities import Flow
+from src.core.enums import FlowActionType
+from src.core.models import Client
+from src.core.services import FlowService
+
+COUNTRIES = ['US', 'GB', 'DE', 'FR', 'IT', 'ES', 'PL', 'RO', 'UA']
+
+
+def build_flows(count):
+    flows = []
+    for index in range(count):
+        # only the last flow matches the benchmark client, so every rule is evaluated
+        country = 'MD' if index == count - 1 else COUNTRIES[index % len(COUNTRIES)]
+        flows.append(
+            Flow(
+                id=index + 1,
+                campaign_id=1,
+                name=f'Flow {index + 1}',
+                rule=f'country == "{country}" and is_bot == false and os_family in ["iOS", "Android"]',
+                order_value=count - index,
+                action_type=FlowActionType.redirect,
+                redirect_url=f'https://example.com/{index + 1}',
+                is_enabled=True,
+                is_deleted=False,
+            )
+        )
+
+    return flows
+
+
+def route_uncached(flows, client):
+    for flow in flows:
+        if flow.rule is None:
+            return flow
+
+        rule = rule_engine.Rule(flow.rule, context=Client.rule_engine_context())
+        if rule.matches(dataclasses.asdict(client)):
+            return flow
+
+    return None
+
+
+def route_cached(routing_table, client):
+    return FlowService._match_route(routing_table, client).flow
+
+
+def measure(func, iterations):
+    durations = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started_at) * 1_000_000)
+
+    durations.sort()
+    return statistics.median(durations), durations[int(len(durations) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure flow routing latency with and without the routing table.')
+    parser.add_argument('--flows', type=int, nargs='+', default=[1, 20, 200])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    client = Client(
+        browser_family='Mobile Safari',
+        device_family='iPhone',
+        os_family='iOS',
+        country='MD',
+        is_bot=False,
+        is_mobile=True,
+    )
+
+    print(f'{"flows":>6} {"uncached p50 us":>16} {"uncached p95 us":>16} {"cached p50 us":>14} {"cached p95 us":>14}')
+    for count in args.flows:
+        flows = build_flows(count)
+        routing_table = FlowService._compile_routing_table(flows)
+        assert route_uncached(flows, client) is route_cached(routing_table, client)
+
+        uncached_p50, uncached_p95 = measure(lambda: route_uncached(flows, client), args.iterations)
+        cached_p50, cached_p95 = measure(lambda: route_cached(routing_table, client), args.iterations)
+        print(f'{count:>6} {uncached_p50:>16.1f} {uncached_p95:>16.1f} {cached_p50:>14.1f} {cached_p95:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import ipaddress
+import logging
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+from src.core.ip2location import Ip2LocationIndex
+from src.core.services import Ip2LocationLocator, Ip2LocationMemoryLocator
+
+
+def random_addresses(count, ipv6_ratio, seed):
+    generator = random.Random(seed)
+    addresses = []
+    for _ in range(count):
+        if generator.random() < ipv6_ratio:
+            addresses.append(str(ipaddress.IPv6Address(generator.getrandbits(128))))
+        else:
+            addresses.append(str(ipaddress.IPv4Address(generator.getrandbits(32))))
+
+    return addresses
+
+
+def measure(func, addresses):
+    durations = []
+    for address in addresses:
+        started_at = time.perf_counter()
+        func(address)
+        durations.append((time.perf_counter() - started_at) * 1_000_000)
+
+    durations.sort()
+    return statistics.median(durations), durations[int(len(durations) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the IP2Location file reader with the in-memory range index.')
+    parser.add_argument('--db-path', default=os.getenv('IP2LOCATION_DB_PATH'))
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--distinct-addresses', type=int, default=2000)
+    parser.add_argument('--ipv6-ratio', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not args.db_path:
+        parser.error('--db-path or IP2LOCATION_DB_PATH is required')
+
+    # unassigned ranges log a warning per lookup, which would dominate the measurements
+    logging.disable(logging.WARNING)
+
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    index = Ip2LocationIndex(args.db_path)
+    load_seconds = time.perf_counter() - started_at
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'ipv4 ranges: {len(index.ipv4_starts)}, ipv6 ranges: {len(index.ipv6_starts_low)}')
+    print(
+        f'index load: {load_seconds:.2f}s, arrays: {index.size_bytes / 2**20:.1f} MiB, peak: {peak_bytes / 2**20:.1f} MiB'
+    )
+
+    unique = random_addresses(args.lookups, args.ipv6_ratio, args.seed)
+    # a few thousand distinct addresses dominate real traffic, which is what the cache in front of the index is for
+    repeated = random.Random(args.seed).choices(unique[: args.distinct_addresses], k=args.lookups)
+
+    file_locator = Ip2LocationLocator(args.db_path)
+    memory_locator = Ip2LocationMemoryLocator(args.db_path, cache_size=args.distinct_addresses)
+
+    print(f'{"locator":<28} {"p50 us":>8} {"p99 us":>8}')
+    for name, func, addresses in (
+        ('file reader, unique', file_locator.get_country, unique),
+        ('memory index, unique', index.get_country, unique),
+        ('file reader, repeated', file_locator.get_country, repeated),
+        ('memory + lru, repeated', memory_locator.get_country, repeated),
+    ):
+        p50, p99 = measure(func, addresses)
+        print(f'{name:<28} {p50:>8.1f} {p99:>8.1f}')
+
+    started_at = time.perf_counter()
+    memory_locator.get_countries(unique)
+    print(f'get_countries: {args.lookups / (time.perf_counter() - started_at):.0f} addresses/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -187,6 +187,31 @@ def flush_tracker_rows(connection, click_rows, lead_rows, postback_rows):
     return inserted_clicks, inserted_leads, inserted_postbacks
 
 
+def refresh_report_leads(connection, campaign_id):
+    # the report leads worker only refreshes tracked events, seeded clicks get their report_lead rows here
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''
+            INSERT INTO report_lead (click_id, campaign_id, click_created_at, status, cost_value, currency, created_at)
+            SELECT c.click_id, c.campaign_id, c.created_at, p.status, p.cost_value, p.currency, UNIX_TIMESTAMP()
+            FROM track_click c
+            LEFT JOIN (
+                SELECT click_id, status, cost_value, currency,
+                    ROW_NUMBER() OVER (PARTITION BY click_id ORDER BY id DESC) AS position
+                FROM track_postback
+            ) p ON p.click_id = c.click_id AND p.position = 1
+            WHERE c.campaign_id = %s
+                AND (p.click_id IS NOT NULL OR EXISTS (SELECT 1 FROM track_lead l WHERE l.click_id = c.click_id))
+            ON DUPLICATE KEY UPDATE
+                status = VALUES(status), cost_value = VALUES(cost_value), currency = VALUES(currency)
+            ''',
+            (campaign_id,),
+        )
+        refreshed = cursor.rowcount
+    connection.commit()
+    return refreshed
+
+
 def seed_tracker_tables(
     connection,
     campaign,
@@ -260,5 +285,13 @@ def seed_tracker_tables(
     if progress_callback is not None:
         progress_callback(inserted_clicks, inserted_leads, inserted_postbacks, True)
 
-    pprint({'clicks': inserted_clicks, 'leads': inserted_leads, 'postbacks': inserted_postbacks})
+    report_leads = refresh_report_leads(connection, campaign['id'])
+    pprint(
+        {
+            'clicks': inserted_clicks,
+            'leads': inserted_leads,
+            'postbacks': inserted_postbacks,
+            'report_leads': report_leads,
+        }
+    )
     return inserted_clicks, inserted_leads, inserted_postbacks
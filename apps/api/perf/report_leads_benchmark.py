@@ -0,0 +1,73 @@
+import argparse
+import logging
+import statistics
+import time
+from datetime import date, timedelta
+
+from perf_seed_common import ensure_safe_db_target, get_connection, refresh_report_leads
+
+import src.api  # noqa: F401
+from src.container import container
+from src.reports.enums import ReportLeadsSource
+from src.reports.repositories import StatisticsReportRepository
+
+
+def measure(func, iterations):
+    durations = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started_at) * 1000)
+
+    durations.sort()
+    return statistics.median(durations), durations[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the statistics leads query on report_lead with the track_postback window function.'
+    )
+    parser.add_argument('--campaign-id', type=int, default=1)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--group-parameters', default='utm_source,ad_name')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument(
+        '--refresh-report-leads', action='store_true', help='copy the latest postbacks into report_lead first'
+    )
+    args = parser.parse_args()
+
+    # every query logs its execution time
+    logging.disable(logging.INFO)
+
+    if args.refresh_report_leads:
+        ensure_safe_db_target()
+        connection = get_connection()
+        try:
+            print(f'report_lead rows refreshed: {refresh_report_leads(connection, args.campaign_id)}')
+        finally:
+            connection.close()
+
+    repository = container.get(StatisticsReportRepository)
+    parameters = {
+        'campaign_id': args.campaign_id,
+        'period_start': date.today() - timedelta(days=args.days - 1),
+        'period_end': date.today(),
+        'group_parameters': [parameter for parameter in args.group_parameters.split(',') if parameter],
+    }
+
+    def leads_statistics(leads_source):
+        repository.leads_source = leads_source
+        return sorted(repository._leads_statistics(parameters), key=repr)
+
+    rows = leads_statistics(ReportLeadsSource.report_lead)
+    assert rows == leads_statistics(ReportLeadsSource.track_postback), 'report_lead is behind track_postback'
+    print(f'{args.days} days, group parameters {parameters["group_parameters"]}, {len(rows)} rows')
+
+    print(f'{"leads source":>16} {"p50 ms":>10} {"max ms":>10}')
+    for leads_source in ReportLeadsSource:
+        p50, slowest = measure(lambda: leads_statistics(leads_source), args.iterations)
+        print(f'{leads_source.value:>16} {p50:>10.1f} {slowest:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
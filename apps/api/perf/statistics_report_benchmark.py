@@ -0,0 +1,125 @@
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.core.enums import LeadStatus
+from src.reports.aggregation import EMPTY_EXPENSES, StatisticsAggregation
+
+
+def build_grouped_rows(levels, values):
+    # every combination is unique, the last group level carries most of the cardinality
+    return [
+        tuple(f'l{level}_{index % (level + 2)}' for level in range(levels - 1)) + (f'v{index}',)
+        for index in range(values)
+    ]
+
+
+def build_report_rows(grouped_rows, period_start, days, active):
+    rng = random.Random(42)
+    rows = []
+    for day in range(days):
+        row_date = period_start + timedelta(days=day)
+        for grouped_values in rng.sample(grouped_rows, active):
+            rows.append((rng.randint(1, 50), 0, None, None, row_date, *grouped_values))
+            for status in LeadStatus:
+                if rng.random() < 0.3:
+                    payouts = Decimal(rng.randint(1, 100)) if status in {LeadStatus.accept, LeadStatus.expect} else None
+                    rows.append((0, rng.randint(1, 5), payouts, status.value, row_date, *grouped_values))
+
+    return rows
+
+
+# the recursive report building which the columnar aggregation replaced
+def fill_clicks_empty(statistics_container, grouped_values):
+    if len(grouped_values) == 0:
+        statistics_container['statuses'] = {status.value: {'leads': 0, 'payouts': 0} for status in LeadStatus}
+        statistics_container['clicks'] = 0
+        return
+
+    statistics_container.setdefault(grouped_values[0], {})
+    fill_clicks_empty(statistics_container[grouped_values[0]], grouped_values[1:])
+
+
+def fill_clicks(statistics_container, group_values, clicks_count, leads_count, payouts, lead_status):
+    if len(group_values) == 0:
+        statistics_container['clicks'] += clicks_count
+        if lead_status:
+            statistics_container['statuses'][lead_status]['leads'] = leads_count
+            statistics_container['statuses'][lead_status]['payouts'] = payouts or 0
+        return
+
+    fill_clicks(
+        statistics_container[group_values[0]], group_values[1:], clicks_count, leads_count, payouts, lead_status
+    )
+
+
+def build_report_recursive(grouped_rows, report_rows, period_start, days):
+    report = {}
+    for day in range(days):
+        report[period_start + timedelta(days=day)] = dict(EMPTY_EXPENSES)
+        for grouped_values in grouped_rows:
+            fill_clicks_empty(report[period_start + timedelta(days=day)], grouped_values)
+
+    for clicks_count, leads_count, payouts, lead_status, row_date, *parameters_values in report_rows:
+        if row_date in report:
+            fill_clicks(report[row_date], parameters_values, clicks_count, leads_count, payouts, lead_status)
+
+    return report
+
+
+def build_report_columnar(grouped_rows, report_rows, period_start, days, sparse):
+    aggregation = StatisticsAggregation(period_start, period_start + timedelta(days=days - 1))
+    if not sparse:
+        for grouped_values in grouped_rows:
+            aggregation.cell(grouped_values)
+
+    aggregation.add_rows(report_rows)
+    aggregation.payouts_by_day(0)
+    return aggregation.report(match_expenses_distribution=False, sparse=sparse)
+
+
+def measure(func, iterations):
+    durations = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started_at) * 1000)
+
+    durations.sort()
+    return statistics.median(durations), durations[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure statistics report assembly, recursive and columnar.')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--levels', type=int, default=5)
+    parser.add_argument('--values', type=int, default=10000)
+    parser.add_argument('--active', type=int, default=1000, help='combinations with clicks on each day')
+    parser.add_argument('--iterations', type=int, default=3)
+    args = parser.parse_args()
+
+    period_start = date(2026, 1, 1)
+    grouped_rows = build_grouped_rows(args.levels, args.values)
+    report_rows = build_report_rows(grouped_rows, period_start, args.days, args.active)
+    print(f'{args.days} days, {args.levels} group levels, {args.values} combinations, {len(report_rows)} rows')
+
+    recursive = build_report_recursive(grouped_rows, report_rows, period_start, args.days)
+    assert build_report_columnar(grouped_rows, report_rows, period_start, args.days, sparse=False) == recursive
+    del recursive
+
+    print(f'{"builder":>18} {"p50 ms":>10} {"max ms":>10}')
+    builders = {
+        'recursive dense': lambda: build_report_recursive(grouped_rows, report_rows, period_start, args.days),
+        'columnar dense': lambda: build_report_columnar(grouped_rows, report_rows, period_start, args.days, False),
+        'columnar sparse': lambda: build_report_columnar(grouped_rows, report_rows, period_start, args.days, True),
+    }
+    for name, builder in builders.items():
+        p50, slowest = measure(builder, args.iterations)
+        print(f'{name:>18} {p50:>10.1f} {slowest:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
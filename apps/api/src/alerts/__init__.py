@@ -1,5 +1,6 @@
 from src.alerts.enums import AlertCode, AlertSeverity
 from src.alerts.models import Alert
 from src.alerts.services import register_alert_callback
+from src.alerts.workers import evaluate_alerts_worker  # noqa: F401
 
 __all__ = ['Alert', 'AlertCode', 'AlertSeverity', 'register_alert_callback']
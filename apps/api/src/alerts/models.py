@@ -1,4 +1,6 @@
+from concurrent.futures import Future
 from dataclasses import dataclass, field
+from datetime import datetime
 
 from src.alerts.enums import AlertCode, AlertSeverity
 
@@ -10,3 +12,24 @@ class Alert:
     severity: AlertSeverity = AlertSeverity.INFO
     source: str | None = None
     payload: dict = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class AlertSnapshot:
+    alerts: list[Alert]
+    computed_at: datetime | None
+
+
+@dataclass(slots=True)
+class AlertCallbackState:
+    name: str
+    alerts: list[Alert] = field(default_factory=list)
+    computed_at: datetime | None = None
+    duration_ms: float | None = None
+    error: str | None = None
+    failures_count: int = 0
+    timeouts_count: int = 0
+    next_run_at: float = 0.0
+    started_at: float | None = None
+    is_timed_out: bool = False
+    future: Future | None = None
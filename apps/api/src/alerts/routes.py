@@ -1,6 +1,6 @@
 from flask.views import MethodView
 
-from src.alerts.schemas import AlertListResponseSchema
+from src.alerts.schemas import AlertEvaluationListResponseSchema, AlertListRequestSchema, AlertListResponseSchema
 from src.alerts.services import AlertService
 from src.auth import auth
 from src.container import container
@@ -11,8 +11,30 @@ blueprint = Blueprint('alerts', __name__, description='Alerts')
 
 @blueprint.route('')
 class Alerts(MethodView):
+    @blueprint.arguments(AlertListRequestSchema, location='query')
     @blueprint.response(200, AlertListResponseSchema)
     @auth.login_required
-    def get(self):
+    def get(self, params):
         alert_service = container.get(AlertService)
-        return {'content': alert_service.serialize(alert_service.collect(container))}
+        snapshot = alert_service.snapshot(container, refresh=params['refresh'])
+        return {'content': alert_service.serialize(snapshot.alerts), 'computedAt': snapshot.computed_at}
+
+
+@blueprint.route('/evaluations')
+class AlertEvaluations(MethodView):
+    @blueprint.response(200, AlertEvaluationListResponseSchema)
+    @auth.login_required
+    def get(self):
+        return {
+            'content': [
+                {
+                    'name': state.name,
+                    'computedAt': state.computed_at,
+                    'durationMs': state.duration_ms,
+                    'error': state.error,
+                    'failuresCount': state.failures_count,
+                    'timeoutsCount': state.timeouts_count,
+                }
+                for state in container.get(AlertService).stats()
+            ]
+        }
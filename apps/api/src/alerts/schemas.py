@@ -3,6 +3,10 @@ from marshmallow import fields
 from src.core.schemas import Schema
 
 
+class AlertListRequestSchema(Schema):
+    refresh = fields.Boolean(dump_default=False, load_default=False)
+
+
 class AlertResponseSchema(Schema):
     code = fields.String(required=True)
     message = fields.String(required=True)
@@ -13,3 +17,17 @@ class AlertResponseSchema(Schema):
 
 class AlertListResponseSchema(Schema):
     content = fields.Nested(AlertResponseSchema(many=True), required=True)
+    computedAt = fields.DateTime(allow_none=True)
+
+
+class AlertEvaluationResponseSchema(Schema):
+    name = fields.String(required=True)
+    computedAt = fields.DateTime(allow_none=True)
+    durationMs = fields.Float(allow_none=True)
+    error = fields.String(allow_none=True)
+    failuresCount = fields.Integer(required=True)
+    timeoutsCount = fields.Integer(required=True)
+
+
+class AlertEvaluationListResponseSchema(Schema):
+    content = fields.Nested(AlertEvaluationResponseSchema(many=True), required=True)
@@ -1,53 +1,169 @@
 import dataclasses
 import logging
+import time
 from collections.abc import Callable, Iterable
-from typing import TypeAlias
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from threading import Lock
+from typing import Annotated, TypeAlias
 
-from wireup import injectable
+from peewee import MySQLDatabase
+from wireup import Inject, injectable
 
-from src.alerts.models import Alert
+from src.alerts.models import Alert, AlertCallbackState, AlertSnapshot
+from src.core.db import release_connection
+from src.core.utils import utcnow
 
 logger = logging.getLogger(__name__)
 
 AlertCallbackResult: TypeAlias = Alert | Iterable[Alert] | None
 AlertCallback: TypeAlias = Callable[[object], AlertCallbackResult]
 _REGISTERED_ALERT_CALLBACKS: list[AlertCallback] = []
+_ALERT_CALLBACK_PERIODS: dict[AlertCallback, float] = {}
 
 
-def register_alert_callback(callback: AlertCallback) -> AlertCallback:
+def register_alert_callback(callback: AlertCallback | None = None, *, period_seconds: float | None = None):
+    if callback is None:
+        return lambda c: register_alert_callback(c, period_seconds=period_seconds)
+
     if callback not in _REGISTERED_ALERT_CALLBACKS:
         _REGISTERED_ALERT_CALLBACKS.append(callback)
+    if period_seconds:
+        _ALERT_CALLBACK_PERIODS[callback] = period_seconds
     return callback
 
 
+def get_alert_callback_name(callback: AlertCallback) -> str:
+    return f'{callback.__module__}.{callback.__qualname__}'
+
+
 @injectable(lifetime='singleton')
 class AlertService:
-    def __init__(self):
+    def __init__(
+        self,
+        database: MySQLDatabase,
+        refresh_seconds: Annotated[float, Inject(config='ALERTS_REFRESH_SECONDS')],
+        callback_timeout_seconds: Annotated[float, Inject(config='ALERTS_CALLBACK_TIMEOUT_SECONDS')],
+        pool_size: Annotated[int, Inject(config='ALERTS_EVALUATOR_POOL_SIZE')],
+    ):
+        self.database = database
+        self.refresh_seconds = refresh_seconds
+        self.callback_timeout_seconds = callback_timeout_seconds
         self._callbacks = _REGISTERED_ALERT_CALLBACKS
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='alerts')
+        self._states: dict[AlertCallback, AlertCallbackState] = {}
+        self._generation = 0
+        self._lock = Lock()
 
     def register_callback(self, callback: AlertCallback) -> AlertCallback:
         return register_alert_callback(callback)
 
-    def collect(self, container) -> list[Alert]:
-        alerts: list[Alert] = []
-
-        for callback in self._callbacks:
-            try:
-                result = callback(container)
-            except Exception:
-                logger.exception('Failed to collect alerts from callback %s', callback)
-                continue
-
-            if result is None:
-                continue
-            if isinstance(result, Alert):
-                alerts.append(self._populate_source(result, callback))
-                continue
-
-            for alert in result:
-                if not isinstance(alert, Alert):
-                    raise TypeError(f'Alert callback {callback} returned unsupported item: {type(alert)!r}')
-                alerts.append(self._populate_source(alert, callback))
+    def snapshot(self, container, refresh: bool = False) -> AlertSnapshot:
+        with self._lock:
+            # a callback that has not finished a run yet has nothing to serve, the request waits for it instead
+            is_cold = any(
+                callback not in self._states or self._states[callback].duration_ms is None
+                for callback in self._callbacks
+            )
+
+        if refresh or is_cold:
+            self.evaluate(container, force=True, wait=True)
+
+        with self._lock:
+            states = [self._states[callback] for callback in self._callbacks if callback in self._states]
+
+        computed_at = [state.computed_at for state in states if state.computed_at is not None]
+        return AlertSnapshot(
+            alerts=[alert for state in states for alert in state.alerts],
+            computed_at=min(computed_at) if computed_at else None,
+        )
+
+    def evaluate(self, container, force: bool = False, wait: bool = False) -> None:
+        now = time.monotonic()
+        futures = []
+        with self._lock:
+            for callback in self._callbacks:
+                state = self._states.get(callback)
+                if state is None:
+                    state = AlertCallbackState(name=get_alert_callback_name(callback))
+                    self._states[callback] = state
+
+                if state.future is not None:
+                    # a running callback is never submitted twice, a hanging one is only reported
+                    if not state.is_timed_out and now - state.started_at > self.callback_timeout_seconds:
+                        state.is_timed_out = True
+                        state.timeouts_count += 1
+                        state.error = 'timeout'
+                        logger.warning('Alert callback timed out', extra={'callback': state.name})
+                    futures.append(state.future)
+                    continue
+
+                if not force and now < state.next_run_at:
+                    continue
+
+                state.started_at = now
+                state.is_timed_out = False
+                state.future = self._executor.submit(self._run_callback, callback, container, self._generation)
+                futures.append(state.future)
+
+        if wait and futures:
+            wait_futures(futures, timeout=self.callback_timeout_seconds)
+
+    def stats(self) -> list[AlertCallbackState]:
+        with self._lock:
+            return [dataclasses.replace(state, future=None) for state in self._states.values()]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._generation += 1
+
+    def _run_callback(self, callback: AlertCallback, container, generation: int) -> None:
+        started_at = time.monotonic()
+        alerts, error = None, None
+        try:
+            alerts = self._collect(callback, container)
+        except Exception as e:
+            logger.exception('Failed to collect alerts from callback %s', callback)
+            error = repr(e)
+        finally:
+            release_connection(self.database)
+
+        duration_ms = round((time.monotonic() - started_at) * 1000, 2)
+        with self._lock:
+            state = self._states.get(callback)
+            if generation != self._generation or state is None:
+                return
+
+            state.future = None
+            state.duration_ms = duration_ms
+            state.next_run_at = started_at + _ALERT_CALLBACK_PERIODS.get(callback, self.refresh_seconds)
+            if error is None:
+                state.alerts = alerts
+                state.computed_at = utcnow()
+                state.error = None
+            else:
+                # alerts of the last successful evaluation are kept
+                state.error = error
+                state.failures_count += 1
+
+        logger.info(
+            'Alert callback is evaluated',
+            extra={'callback': state.name, 'duration_ms': duration_ms, 'error': error},
+        )
+
+    def _collect(self, callback: AlertCallback, container) -> list[Alert]:
+        result = callback(container)
+        if result is None:
+            return []
+        if isinstance(result, Alert):
+            return [self._populate_source(result, callback)]
+
+        alerts = []
+        for alert in result:
+            if not isinstance(alert, Alert):
+                raise TypeError(f'Alert callback {callback} returned unsupported item: {type(alert)!r}')
+            alerts.append(self._populate_source(alert, callback))
 
         return alerts
 
@@ -0,0 +1,8 @@
+from src.alerts.services import AlertService
+from src.core.supervisor import WorkerContext, register_worker
+
+
+# alerts are served from the memory of the process evaluating them
+@register_worker(process_local=True)
+def evaluate_alerts_worker(context: WorkerContext) -> None:
+    context.get(AlertService).evaluate(context)
@@ -3,15 +3,20 @@ from flask import Flask
 from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from flask_smorest import Api
+from peewee import MySQLDatabase
+from playhouse.pool import MaxConnectionsExceeded
 
 from src.alerts.routes import blueprint as alerts_blueprint
 from src.auth.routes import blueprint as auth_blueprint
+from src.container import container
+from src.core.db import ReadReplica, release_connection
 from src.core.exceptions import ApplicationError
 from src.core.logging import configure_logging
 from src.core.routes import blueprint as core_blueprint
 from src.facebook_pacs.routes import blueprint as facebook_pacs_blueprint
 from src.health.routes import blueprint as health_blueprint
 from src.reports.routes import blueprint as reports_blueprint
+from src.tracker.commands import backfill_click_dimensions_command
 from src.tracker.routes import blueprint as track_blueprint
 from src.tracker.routes import process_blueprint
 
@@ -48,7 +53,21 @@ api.register_blueprint(track_blueprint, url_prefix='/api/v2/track')
 api.register_blueprint(process_blueprint, url_prefix='/process')
 api.register_blueprint(health_blueprint, url_prefix='/api/v2/health')
 
+app.cli.add_command(backfill_click_dimensions_command)
+
 
 @app.errorhandler(ApplicationError)
 def handle_exception(e):
     return {'message': e.message}, e.http_status_code
+
+
+@app.errorhandler(MaxConnectionsExceeded)
+def handle_max_connections_exceeded(e):
+    return {'message': 'Database connections are exhausted'}, 503
+
+
+# a pooled connection is checked out by the first query of a request and checked in when the request ends
+@app.teardown_request
+def release_database_connection(e):
+    for database in (container.get(MySQLDatabase), container.get(ReadReplica).replica):
+        release_connection(database)
@@ -7,17 +7,21 @@ from wireup import create_sync_container
 from src.alerts.repositories import BusinessPortfolioRepository
 from src.alerts.services import AlertService
 from src.auth.services import AuthenticationService
-from src.core.db import database
+from src.core.db import database, read_replica
 from src.core.entities import database_proxy
-from src.core.services import CampaignService, ClientService, FlowService, Ip2LocationLocator
+from src.core.enums import IpLocatorMode, WorkerMode
+from src.core.services import CampaignService, ClientService, FlowService, ip_locator
 from src.core.supervisor import WorkerContext, WorkerSupervisor
 from src.facebook_pacs.services import AdCabinetService as FacebookPacsAdCabinetService
 from src.facebook_pacs.services import BusinessPageService as FacebookPacsBusinessPageService
 from src.facebook_pacs.services import BusinessPortfolioService as FacebookPacsBusinessPortfolioService
 from src.facebook_pacs.services import CampaignService as FacebookPacsCampaignService
 from src.facebook_pacs.services import ExecutorService as FacebookPacsExecutorService
+from src.reports.cache import StatisticsReportCache
+from src.reports.enums import ReportLeadsSource
 from src.reports.repositories import StatisticsReportRepository
 from src.reports.services import ReportHelperService, ReportService
+from src.tracker.counters import TrackCounters
 from src.tracker.services import TrackService
 
 T = TypeVar('T')
@@ -30,6 +34,14 @@ def _get_env(name, cast: type[T] = str, default: T | None = None) -> T | None:
     return cast(value)
 
 
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+def _to_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
 container = create_sync_container(
     parameters={
         'MARIADB_HOST': _get_env('MARIADB_HOST'),
@@ -37,22 +49,61 @@ container = create_sync_container(
         'MARIADB_USER': _get_env('MARIADB_USER'),
         'MARIADB_PASSWORD': _get_env('MARIADB_PASSWORD'),
         'MARIADB_DATABASE': _get_env('MARIADB_DATABASE'),
+        'MARIADB_POOL_SIZE': _get_env('MARIADB_POOL_SIZE', int, 0),
+        'MARIADB_POOL_TIMEOUT_SECONDS': _get_env('MARIADB_POOL_TIMEOUT_SECONDS', float, 10.0),
+        'MARIADB_POOL_STALE_SECONDS': _get_env('MARIADB_POOL_STALE_SECONDS', float, 300.0),
+        'MARIADB_REPLICA_HOST': _get_env('MARIADB_REPLICA_HOST'),
+        'MARIADB_REPLICA_PORT': _get_env('MARIADB_REPLICA_PORT', int),
+        'MARIADB_REPLICA_USER': _get_env('MARIADB_REPLICA_USER'),
+        'MARIADB_REPLICA_PASSWORD': _get_env('MARIADB_REPLICA_PASSWORD'),
+        'MARIADB_REPLICA_DATABASE': _get_env('MARIADB_REPLICA_DATABASE'),
+        'MARIADB_REPLICA_MAX_LAG_SECONDS': _get_env('MARIADB_REPLICA_MAX_LAG_SECONDS', float, 30.0),
+        'MARIADB_REPLICA_LAG_CHECK_SECONDS': _get_env('MARIADB_REPLICA_LAG_CHECK_SECONDS', float, 5.0),
         'BASIC_AUTHENTICATION_USERNAME': _get_env('BASIC_AUTHENTICATION_USERNAME'),
         'BASIC_AUTHENTICATION_PASSWORD': _get_env('BASIC_AUTHENTICATION_PASSWORD'),
         'REPORT_GAP_SECONDS': _get_env('REPORT_GAP_SECONDS', int, 30 * 60 * 60),
-        'BACKGROUND_SUPERVISOR_POLL_SECONDS': _get_env('BACKGROUND_SUPERVISOR_POLL_SECONDS', float, 0.1),
+        'REPORT_DAILY_STATS_PARAMETERS': _get_env(
+            'REPORT_DAILY_STATS_PARAMETERS',
+            _to_list,
+            ['utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term', 'utm_id', 'ad_name', 'adset_name'],
+        ),
+        'REPORT_CACHE_SIZE': _get_env('REPORT_CACHE_SIZE', int, 20000),
+        'REPORT_CACHE_TTL_SECONDS': _get_env('REPORT_CACHE_TTL_SECONDS', float, 300.0),
+        'REPORT_LEADS_SOURCE': _get_env('REPORT_LEADS_SOURCE', ReportLeadsSource, ReportLeadsSource.report_lead),
+        'BACKGROUND_SUPERVISOR_POLL_SECONDS': _get_env('BACKGROUND_SUPERVISOR_POLL_SECONDS', float, 1.0),
+        'BACKGROUND_WORKERS_POOL_SIZE': _get_env('BACKGROUND_WORKERS_POOL_SIZE', int, 0),
+        'BACKGROUND_WORKERS_MODE': _get_env('BACKGROUND_WORKERS_MODE', WorkerMode, WorkerMode.all),
+        'WORKER_LEADER_HEARTBEAT_SECONDS': _get_env('WORKER_LEADER_HEARTBEAT_SECONDS', float, 5.0),
+        'TRACK_WRITE_BEHIND_ENABLED': _get_env('TRACK_WRITE_BEHIND_ENABLED', _to_bool, False),
+        'ALERTS_REFRESH_SECONDS': _get_env('ALERTS_REFRESH_SECONDS', float, 60.0),
+        'ALERTS_CALLBACK_TIMEOUT_SECONDS': _get_env('ALERTS_CALLBACK_TIMEOUT_SECONDS', float, 30.0),
+        'ALERTS_EVALUATOR_POOL_SIZE': _get_env('ALERTS_EVALUATOR_POOL_SIZE', int, 2),
         'ACCESS_URL_EXPIRING_SOON_DAYS': _get_env('ACCESS_URL_EXPIRING_SOON_DAYS', int, 5),
         'LANDING_PAGES_BASE_PATH': _get_env('LANDING_PAGES_BASE_PATH'),
         'IP2LOCATION_DB_PATH': _get_env('IP2LOCATION_DB_PATH'),
+        'IP_LOCATOR_MODE': _get_env('IP_LOCATOR_MODE', IpLocatorMode, IpLocatorMode.file),
+        'IP_LOCATOR_CACHE_SIZE': _get_env('IP_LOCATOR_CACHE_SIZE', int, 1024),
         'LANDING_PAGE_RENDERER_BASE_URL': _get_env('LANDING_PAGE_RENDERER_BASE_URL'),
+        'LANDING_RENDER_TIMEOUT_SECONDS': _get_env('LANDING_RENDER_TIMEOUT_SECONDS', float, 5.0),
+        'LANDING_RENDER_CACHE_TTL_SECONDS': _get_env('LANDING_RENDER_CACHE_TTL_SECONDS', float, 60.0),
+        'LANDING_RENDER_STALE_SECONDS': _get_env('LANDING_RENDER_STALE_SECONDS', float, 600.0),
+        'USER_AGENT_CACHE_SIZE': _get_env('USER_AGENT_CACHE_SIZE', int, 4096),
+        'FLOW_ROUTING_TABLE_TTL_SECONDS': _get_env('FLOW_ROUTING_TABLE_TTL_SECONDS', float, 30.0),
+        'FLOW_UNMATCHED_CACHE_SIZE': _get_env('FLOW_UNMATCHED_CACHE_SIZE', int, 10000),
+        'TRACK_DISCARD_RETENTION_SECONDS': _get_env('TRACK_DISCARD_RETENTION_SECONDS', int, 30 * 60 * 60),
+        'TRACK_DISCARD_WRITE_BEHIND_ENABLED': _get_env('TRACK_DISCARD_WRITE_BEHIND_ENABLED', _to_bool, False),
+        'TRACK_DIMENSIONS_TTL_SECONDS': _get_env('TRACK_DIMENSIONS_TTL_SECONDS', float, 30.0),
         'INTERNAL_PROCESS_BASE_URL': _get_env('INTERNAL_PROCESS_BASE_URL'),
     },
     services=[
         database,
+        read_replica,
+        ip_locator,
         WorkerContext,
         WorkerSupervisor,
         BusinessPortfolioRepository,
         StatisticsReportRepository,
+        StatisticsReportCache,
         AlertService,
         AuthenticationService,
         CampaignService,
@@ -63,11 +114,12 @@ container = create_sync_container(
         FacebookPacsBusinessPortfolioService,
         FacebookPacsCampaignService,
         FacebookPacsExecutorService,
-        Ip2LocationLocator,
         ReportHelperService,
         ReportService,
+        TrackCounters,
         TrackService,
     ],
 )
 
 database_proxy.initialize(container.get(MySQLDatabase))
+container.get(WorkerContext).container = container
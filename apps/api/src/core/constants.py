@@ -1 +1,2 @@
 PAGINATION_DEFAULT_PAGE_SIZE = 20
+TRACK_CLICK_DIMENSIONS = 3
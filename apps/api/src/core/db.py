@@ -1,14 +1,165 @@
+import dataclasses
+import logging
+from threading import Lock, local
+from time import monotonic
 from typing import Annotated
 
-from peewee import InterfaceError, MySQLDatabase
+from peewee import Database, InterfaceError, MySQLDatabase
+from playhouse.pool import MaxConnectionsExceeded, PooledDatabase, PooledMySQLDatabase
 from playhouse.shortcuts import ReconnectMixin
 from wireup import Inject, injectable
 
+from src.core.models import DatabasePoolStats
 
-class ReconnectPooledMySQLDatabase(ReconnectMixin, MySQLDatabase):
+logger = logging.getLogger(__name__)
+
+
+class ReconnectMySQLDatabase(ReconnectMixin, MySQLDatabase):
     reconnect_errors = ReconnectMixin.reconnect_errors + ((InterfaceError, ''),)
 
 
+class ReconnectPooledMySQLDatabase(ReconnectMixin, PooledMySQLDatabase):
+    reconnect_errors = ReconnectMySQLDatabase.reconnect_errors
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool_stats = DatabasePoolStats(max_connections=self._max_connections)
+        self._pool_stats_lock = Lock()
+        self._checkout = local()
+
+    def connect(self, reuse_if_open=False):
+        self._checkout.is_waiting = False
+        started_at = monotonic()
+        try:
+            return super().connect(reuse_if_open)
+        except MaxConnectionsExceeded:
+            with self._pool_stats_lock:
+                self._pool_stats.timeouts_count += 1
+            raise
+        finally:
+            wait_ms = (monotonic() - started_at) * 1000
+            with self._pool_stats_lock:
+                self._pool_stats.checkouts_count += 1
+                self._pool_stats.wait_ms_total += wait_ms
+                self._pool_stats.wait_ms_max = max(self._pool_stats.wait_ms_max, wait_ms)
+                if self._checkout.is_waiting:
+                    self._pool_stats.waits_count += 1
+
+    def _connect(self):
+        try:
+            return super()._connect()
+        except MaxConnectionsExceeded:
+            # every connection is checked out, the caller waits for one to be released
+            self._checkout.is_waiting = True
+            raise
+
+    def pool_stats(self) -> DatabasePoolStats:
+        with self._pool_lock:
+            in_use_count, idle_count = len(self._in_use), len(self._connections)
+        with self._pool_stats_lock:
+            return dataclasses.replace(self._pool_stats, in_use_count=in_use_count, idle_count=idle_count)
+
+
+def release_connection(database: Database | None) -> None:
+    # pooled connections go back to the pool, unpooled ones are kept open by their thread
+    if isinstance(database, PooledDatabase) and not database.is_closed() and not database.in_transaction():
+        database.close()
+
+
+def _create_database(
+    db_name: str,
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    pool_size: int,
+    pool_timeout_seconds: float,
+    pool_stale_seconds: float,
+) -> MySQLDatabase:
+    if pool_size:
+        return ReconnectPooledMySQLDatabase(
+            db_name,
+            max_connections=pool_size,
+            timeout=pool_timeout_seconds,
+            stale_timeout=pool_stale_seconds,
+            user=username,
+            password=password,
+            host=host,
+            port=port,
+        )
+
+    return ReconnectMySQLDatabase(
+        db_name,
+        user=username,
+        password=password,
+        host=host,
+        port=port,
+    )
+
+
+class ReadReplica:
+    def __init__(
+        self,
+        primary: MySQLDatabase,
+        replica: MySQLDatabase | None,
+        max_lag_seconds: float,
+        lag_check_seconds: float,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_seconds = lag_check_seconds
+        self.is_usable = False
+        self._checked_at: float | None = None
+        self._lock = Lock()
+
+    def _replica_lag_seconds(self) -> float | None:
+        cursor = self.replica.execute_sql('SHOW REPLICA STATUS')
+        row = cursor.fetchone()
+        # a server that does not replicate at all is a plain second connection, it never lags
+        if row is None:
+            return 0.0
+
+        status = dict(zip([column[0] for column in cursor.description], row))
+        lag_seconds = status.get('Seconds_Behind_Master')
+        return float(lag_seconds) if lag_seconds is not None else None
+
+    def refresh(self) -> bool:
+        now = monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.lag_check_seconds:
+                return self.is_usable
+            # other threads keep the previous decision while this one checks the lag
+            self._checked_at = now
+            was_usable = self.is_usable
+
+        lag_seconds = None
+        try:
+            lag_seconds = self._replica_lag_seconds()
+        except Exception:
+            logger.exception('Failed to check read replica lag')
+        finally:
+            release_connection(self.replica)
+
+        # stopped replication reports no lag at all
+        is_usable = lag_seconds is not None and lag_seconds <= self.max_lag_seconds
+        with self._lock:
+            self.is_usable = is_usable
+
+        if is_usable != was_usable:
+            logger.info(
+                'Read replica is used' if is_usable else 'Read replica is behind, reading from the primary',
+                extra={'lag_seconds': lag_seconds, 'max_lag_seconds': self.max_lag_seconds},
+            )
+        return is_usable
+
+    def database(self) -> MySQLDatabase:
+        if self.replica is None or not self.refresh():
+            return self.primary
+
+        return self.replica
+
+
 @injectable(lifetime='singleton')
 def database(
     host: Annotated[str, Inject(config='MARIADB_HOST')],
@@ -16,11 +167,41 @@ def database(
     username: Annotated[str, Inject(config='MARIADB_USER')],
     password: Annotated[str, Inject(config='MARIADB_PASSWORD')],
     db_name: Annotated[str, Inject(config='MARIADB_DATABASE')],
+    pool_size: Annotated[int, Inject(config='MARIADB_POOL_SIZE')],
+    pool_timeout_seconds: Annotated[float, Inject(config='MARIADB_POOL_TIMEOUT_SECONDS')],
+    pool_stale_seconds: Annotated[float, Inject(config='MARIADB_POOL_STALE_SECONDS')],
 ) -> MySQLDatabase:
-    return ReconnectPooledMySQLDatabase(
-        db_name,
-        user=username,
-        password=password,
-        host=host,
-        port=port,
+    return _create_database(
+        db_name, host, port, username, password, pool_size, pool_timeout_seconds, pool_stale_seconds
     )
+
+
+@injectable(lifetime='singleton')
+def read_replica(
+    primary: MySQLDatabase,
+    host: Annotated[str | None, Inject(config='MARIADB_REPLICA_HOST')],
+    port: Annotated[int | None, Inject(config='MARIADB_REPLICA_PORT')],
+    username: Annotated[str | None, Inject(config='MARIADB_REPLICA_USER')],
+    password: Annotated[str | None, Inject(config='MARIADB_REPLICA_PASSWORD')],
+    db_name: Annotated[str | None, Inject(config='MARIADB_REPLICA_DATABASE')],
+    max_lag_seconds: Annotated[float, Inject(config='MARIADB_REPLICA_MAX_LAG_SECONDS')],
+    lag_check_seconds: Annotated[float, Inject(config='MARIADB_REPLICA_LAG_CHECK_SECONDS')],
+    pool_size: Annotated[int, Inject(config='MARIADB_POOL_SIZE')],
+    pool_timeout_seconds: Annotated[float, Inject(config='MARIADB_POOL_TIMEOUT_SECONDS')],
+    pool_stale_seconds: Annotated[float, Inject(config='MARIADB_POOL_STALE_SECONDS')],
+) -> ReadReplica:
+    replica = None
+    if host:
+        # credentials and database name default to the primary ones
+        replica = _create_database(
+            db_name or primary.database,
+            host,
+            port or primary.connect_params['port'],
+            username or primary.connect_params['user'],
+            password if password is not None else primary.connect_params['password'],
+            pool_size,
+            pool_timeout_seconds,
+            pool_stale_seconds,
+        )
+
+    return ReadReplica(primary, replica, max_lag_seconds, lag_check_seconds)
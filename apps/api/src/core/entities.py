@@ -47,6 +47,10 @@ class Campaign(Entity):
     currency = CharField(null=True, default=Currency.usd.value)
     status_mapper = JSONField(null=True)
     expenses_distribution_parameter = CharField(null=True)
+    # click parameters extracted into track_click dimension columns, reports use them once the backfill has run
+    dimension_parameters = JSONField(null=True)
+    materialized_dimension_parameters = JSONField(null=True)
+    dimension_parameters_updated_at = UTCTimestampField(null=True, utc=True)
 
 
 class Flow(Entity):
@@ -11,6 +11,27 @@ class SortOrder(str, Enum):
     desc = 'desc'
 
 
+class IpLocatorMode(str, Enum):
+    file = 'file'
+    memory = 'memory'
+
+
+class WorkerPlacement(str, Enum):
+    every_process = 'every_process'
+    leader = 'leader'
+
+
+class WorkerMode(str, Enum):
+    all = 'all'
+    local = 'local'
+    shared = 'shared'
+
+
+class PartitionPeriod(str, Enum):
+    day = 'day'
+    month = 'month'
+
+
 class Currency(str, Enum):
     usd = 'usd'
     eur = 'eur'
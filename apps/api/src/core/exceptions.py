@@ -15,3 +15,8 @@ class DoesNotExistError(ApplicationError):
 
 class CampaignDoesNotExistError(DoesNotExistError):
     message = 'Campaign does not exist'
+
+
+class InvalidCursorError(ApplicationError):
+    http_status_code = 400
+    message = 'Invalid pagination cursor'
@@ -0,0 +1,110 @@
+import ipaddress
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+
+HEADER_FORMAT = '<BBBBBIIIIIIBBB'
+
+
+class Ip2LocationIndex:
+    # IP2Location DB1 ranges loaded into sorted arrays, resolved with binary search.
+    # IPv6 range starts do not fit into a single array item, so they are split into high and low 64 bit halves.
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        (_, columns, _, _, _, ipv4_count, ipv4_address, ipv6_count, ipv6_address, *_) = struct.unpack_from(
+            HEADER_FORMAT, data
+        )
+
+        self.countries: list[str | None] = []
+        self._country_ids: dict[int, int] = {}
+
+        # DB1 rows hold the range start and a pointer to the country, wider databases carry extra columns after them
+        padding = f'{(columns - 2) * 4}x'
+
+        self.ipv4_starts = array('I')
+        self.ipv4_countries = array('H')
+        rows = memoryview(data)[ipv4_address - 1 : ipv4_address - 1 + ipv4_count * columns * 4]
+        for start, pointer in struct.iter_unpack(f'<II{padding}', rows):
+            self.ipv4_starts.append(start)
+            self.ipv4_countries.append(self._country_id(data, pointer))
+
+        self.ipv6_starts_high = array('Q')
+        self.ipv6_starts_low = array('Q')
+        self.ipv6_countries = array('H')
+        rows = memoryview(data)[ipv6_address - 1 : ipv6_address - 1 + ipv6_count * (columns * 4 + 12)]
+        for low, high, pointer in struct.iter_unpack(f'<QQI{padding}', rows):
+            self.ipv6_starts_high.append(high)
+            self.ipv6_starts_low.append(low)
+            self.ipv6_countries.append(self._country_id(data, pointer))
+
+    def _country_id(self, data, pointer):
+        country_id = self._country_ids.get(pointer)
+        if country_id is None:
+            length = data[pointer]
+            country = data[pointer + 1 : pointer + 1 + length].decode('iso-8859-1')
+            country_id = self._country_ids[pointer] = len(self.countries)
+            self.countries.append(country if len(country) == 2 else None)
+
+        return country_id
+
+    @property
+    def size_bytes(self):
+        arrays = (
+            self.ipv4_starts,
+            self.ipv4_countries,
+            self.ipv6_starts_high,
+            self.ipv6_starts_low,
+            self.ipv6_countries,
+        )
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    @staticmethod
+    def _parse_address(address):
+        try:
+            address = ipaddress.ip_address(address)
+        except ValueError:
+            return None
+
+        if address.version == 6:
+            # ipv4 addresses embedded into ipv6 are resolved against ipv4 ranges, the same way IP2Location does
+            if address.ipv4_mapped is not None:
+                return address.ipv4_mapped
+            if address.sixtofour is not None:
+                return address.sixtofour
+            if address.teredo is not None:
+                return address.teredo[1]
+
+        return address
+
+    def _ipv4_country(self, number):
+        position = bisect_right(self.ipv4_starts, number) - 1
+        if position < 0:
+            return None
+
+        return self.countries[self.ipv4_countries[position]]
+
+    def _ipv6_country(self, number):
+        high, low = number >> 64, number & 0xFFFFFFFFFFFFFFFF
+
+        first = bisect_left(self.ipv6_starts_high, high)
+        last = bisect_right(self.ipv6_starts_high, high, first)
+        position = bisect_right(self.ipv6_starts_low, low, first, last) - 1
+        if position < first:
+            # no range starts inside this high half at or before the address, it belongs to the previous one
+            position = first - 1
+        if position < 0:
+            return None
+
+        return self.countries[self.ipv6_countries[position]]
+
+    def get_country(self, address):
+        address = self._parse_address(address)
+        if address is None:
+            return None
+
+        if address.version == 4:
+            return self._ipv4_country(int(address))
+
+        return self._ipv6_country(int(address))
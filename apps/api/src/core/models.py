@@ -1,9 +1,14 @@
 import types
+from collections.abc import Callable
 from dataclasses import dataclass, field, fields
+from datetime import datetime
+from functools import cache
 from random import randint
 from typing import Union, get_args, get_origin
 
-from rule_engine import Context, ast
+from rule_engine import Context, Rule, ast
+
+from src.core.entities import Flow
 
 
 @dataclass
@@ -16,6 +21,19 @@ class Client:
     is_mobile: bool
     roll: int = field(default_factory=lambda: randint(1, 100))
 
+    def dimensions(self, with_roll=True):
+        dimensions = (
+            self.browser_family,
+            self.device_family,
+            self.os_family,
+            self.country,
+            self.is_bot,
+            self.is_mobile,
+        )
+        if with_roll:
+            return dimensions + (self.roll,)
+        return dimensions
+
     @staticmethod
     def _rule_data_type(annotation):
         origin = get_origin(annotation)
@@ -31,6 +49,67 @@ class Client:
             return ast.DataType.UNDEFINED
 
     @classmethod
+    @cache
     def rule_engine_context(cls):
         type_map = {field.name: cls._rule_data_type(field.type) for field in fields(Client)}
         return Context(type_resolver=type_map, default_value=None)
+
+
+@dataclass(frozen=True, slots=True)
+class UserAgentInfo:
+    browser_family: str | None
+    device_family: str | None
+    os_family: str | None
+    is_bot: bool
+    is_mobile: bool
+
+
+@dataclass(frozen=True, slots=True)
+class LandingSnapshot:
+    content: bytes
+    gzipped_content: bytes
+
+
+@dataclass(frozen=True, slots=True)
+class FlowRoute:
+    flow: Flow
+    rule: Rule | None
+
+
+@dataclass(frozen=True, slots=True)
+class WorkerSchedule:
+    # a callable period is read on every pass, so it follows settings changed at runtime
+    period_seconds: float | Callable[[], float] | None = None
+    wake_queue_size: int = 0
+    jitter_ratio: float = 0.0
+    timeout_seconds: float | None = None
+    max_concurrency: int = 1
+
+
+@dataclass(slots=True)
+class WorkerStats:
+    name: str
+    last_run_at: datetime | None = None
+    duration_ms: float | None = None
+    lag_ms: float | None = None
+    error: str | None = None
+    runs_count: int = 0
+    errors_count: int = 0
+    timeouts_count: int = 0
+    running_count: int = 0
+    started_at: float | None = None
+    woken_at: float | None = None
+    jitter: float = 0.0
+    is_timed_out: bool = False
+
+
+@dataclass(slots=True)
+class DatabasePoolStats:
+    max_connections: int
+    in_use_count: int = 0
+    idle_count: int = 0
+    checkouts_count: int = 0
+    waits_count: int = 0
+    timeouts_count: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
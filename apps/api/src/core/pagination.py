@@ -0,0 +1,81 @@
+import base64
+import binascii
+import json
+
+from peewee import Field, ModelSelect
+
+from src.core.enums import SortOrder
+from src.core.exceptions import InvalidCursorError
+
+
+def encode_cursor(values: list) -> str:
+    payload = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursorError() from exc
+
+    if not isinstance(values, list) or len(values) != 4:
+        raise InvalidCursorError()
+
+    # the values end up in the query, so a cursor not made by encode_cursor is rejected instead of failing there
+    sort_name, sort_order, sort_value, last_id = values
+    if not isinstance(sort_name, str) or not isinstance(sort_order, str):
+        raise InvalidCursorError()
+    if sort_value is not None and not isinstance(sort_value, (str, int, float)):
+        raise InvalidCursorError()
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise InvalidCursorError()
+
+    return values
+
+
+def _after(sort_field: Field, id_field: Field, sort_value, last_id, descending: bool):
+    if sort_field is id_field:
+        return id_field < last_id if descending else id_field > last_id
+
+    # nulls sort first in ascending order and last in descending one
+    if descending:
+        if sort_value is None:
+            return sort_field.is_null() & (id_field < last_id)
+        return (sort_field < sort_value) | ((sort_field == sort_value) & (id_field < last_id)) | sort_field.is_null()
+
+    if sort_value is None:
+        return (sort_field.is_null() & (id_field > last_id)) | sort_field.is_null(False)
+    return (sort_field > sort_value) | ((sort_field == sort_value) & (id_field > last_id))
+
+
+def paginate(
+    query: ModelSelect, sort_field: Field, sort_order: SortOrder, page: int, page_size: int, cursor: str | None = None
+) -> tuple[list, str | None]:
+    # rows are ordered by the sort key and id, a cursor keeps both of the last row of a page, so the next page seeks
+    # right after it instead of skipping every row before it as the page offset does
+    id_field = sort_field.model.id
+    descending = sort_order == SortOrder.desc
+    if sort_field is id_field:
+        order_by = [id_field.desc() if descending else id_field]
+    else:
+        order_by = [sort_field.desc(), id_field.desc()] if descending else [sort_field, id_field]
+    query = query.order_by(*order_by)
+
+    if cursor is None:
+        query = query.offset((page - 1) * page_size)
+    else:
+        sort_name, cursor_order, sort_value, last_id = decode_cursor(cursor)
+        if sort_name != sort_field.name or cursor_order != sort_order.value:
+            raise InvalidCursorError()
+        query = query.where(_after(sort_field, id_field, sort_value, last_id, descending))
+
+    # one more row tells whether there is a next page
+    rows = list(query.limit(page_size + 1))
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last_row = rows[-1]
+    sort_value = sort_field.db_value(getattr(last_row, sort_field.name))
+    return rows, encode_cursor([sort_field.name, sort_order.value, sort_value, last_row.id])
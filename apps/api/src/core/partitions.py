@@ -0,0 +1,83 @@
+import calendar
+from datetime import date, datetime, timedelta, timezone
+
+from peewee import Database
+
+from src.core.enums import PartitionPeriod
+
+MAXVALUE_PARTITION = 'pmax'
+
+
+def period_start(day: date, period: PartitionPeriod) -> date:
+    if period == PartitionPeriod.month:
+        return day.replace(day=1)
+    return day
+
+
+def next_period_start(day: date, period: PartitionPeriod) -> date:
+    if period == PartitionPeriod.month:
+        return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def partition_name(day: date, period: PartitionPeriod) -> str:
+    return day.strftime('p%Y%m' if period == PartitionPeriod.month else 'p%Y%m%d')
+
+
+def day_timestamp(day: date) -> int:
+    return calendar.timegm(day.timetuple())
+
+
+def timestamp_day(timestamp: int) -> date:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+
+
+def list_partitions(database: Database, table_name: str) -> list[tuple[str, int | None]]:
+    # returns (partition name, exclusive upper bound) pairs in partition order, the bound is None for pmax
+    cursor = database.execute_sql(
+        """
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = %s
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+        """,
+        (table_name,),
+    )
+    return [(name, None if description == 'MAXVALUE' else int(description)) for name, description in cursor.fetchall()]
+
+
+def create_future_partitions(database: Database, table_name: str, period: PartitionPeriod, until: date) -> list[str]:
+    partitions = list_partitions(database, table_name)
+    upper_bounds = [upper_bound for _, upper_bound in partitions if upper_bound is not None]
+
+    start = timestamp_day(max(upper_bounds)) if upper_bounds else period_start(until, period)
+    definitions = []
+    while start <= until:
+        end = next_period_start(start, period)
+        definitions.append((partition_name(start, period), day_timestamp(end)))
+        start = end
+
+    if not definitions:
+        return []
+
+    # pmax is expected to be empty, so splitting it does not move any rows
+    database.execute_sql(
+        f'ALTER TABLE `{table_name}` REORGANIZE PARTITION `{MAXVALUE_PARTITION}` INTO ('
+        + ', '.join(f'PARTITION `{name}` VALUES LESS THAN ({upper_bound})' for name, upper_bound in definitions)
+        + f', PARTITION `{MAXVALUE_PARTITION}` VALUES LESS THAN MAXVALUE)'
+    )
+    return [name for name, _ in definitions]
+
+
+def drop_expired_partitions(database: Database, table_name: str, cutoff: int) -> list[str]:
+    expired = [
+        name
+        for name, upper_bound in list_partitions(database, table_name)
+        if upper_bound is not None and upper_bound <= cutoff
+    ]
+    if expired:
+        database.execute_sql(f'ALTER TABLE `{table_name}` DROP PARTITION ' + ', '.join(f'`{name}`' for name in expired))
+
+    return expired
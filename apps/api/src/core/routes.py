@@ -33,13 +33,16 @@ class Campaigns(MethodView):
     @auth.login_required
     def get(self, parameters_payload):
         campaign_service = container.get(CampaignService)
-        campaigns = campaign_service.list(
+        campaigns, next_cursor = campaign_service.list(
             parameters_payload['page'],
             parameters_payload['pageSize'],
             humps.decamelize(parameters_payload['sortBy'].value),
             parameters_payload['sortOrder'],
+            cursor=parameters_payload.get('cursor'),
         )
-        count = campaign_service.count()
+        count = None
+        if parameters_payload.get('cursor') is None:
+            count = campaign_service.count()
 
         return {
             'content': [
@@ -49,7 +52,7 @@ class Campaigns(MethodView):
                 )
                 for c in campaigns
             ],
-            'pagination': parameters_payload | {'total': count},
+            'pagination': parameters_payload | {'total': count, 'nextCursor': next_cursor},
         }
 
     @blueprint.arguments(CampaignCreateRequestSchema)
@@ -90,6 +93,7 @@ class Campaign(MethodView):
             campaign_payload.get('costValue'),
             campaign_payload.get('currency'),
             campaign_payload.get('statusMapper'),
+            campaign_payload.get('dimensionParameters'),
         )
 
 
@@ -110,14 +114,17 @@ class CampaignFlows(MethodView):
     @auth.login_required
     def get(self, parameters_payload, campaignId):
         flow_service = container.get(FlowService)
-        flows = flow_service.list(
+        flows, next_cursor = flow_service.list(
             parameters_payload['page'],
             parameters_payload['pageSize'],
             humps.decamelize(parameters_payload['sortBy'].value),
             parameters_payload['sortOrder'],
             campaign_id=campaignId,
+            cursor=parameters_payload.get('cursor'),
         )
-        count = flow_service.count(campaign_id=campaignId)
+        count = None
+        if parameters_payload.get('cursor') is None:
+            count = flow_service.count(campaign_id=campaignId)
 
         return {
             'content': [
@@ -135,7 +142,7 @@ class CampaignFlows(MethodView):
                 )
                 for f in flows
             ],
-            'pagination': parameters_payload | {'total': count},
+            'pagination': parameters_payload | {'total': count, 'nextCursor': next_cursor},
         }
 
     @blueprint.arguments(FlowCreateRequestSchema, location='form')
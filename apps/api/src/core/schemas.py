@@ -3,9 +3,9 @@ import logging
 
 import rule_engine
 from marshmallow import Schema as MarshmallowSchema
-from marshmallow import ValidationError, fields, validates_schema
+from marshmallow import ValidationError, fields, validate, validates_schema
 
-from src.core.constants import PAGINATION_DEFAULT_PAGE_SIZE
+from src.core.constants import PAGINATION_DEFAULT_PAGE_SIZE, TRACK_CLICK_DIMENSIONS
 from src.core.enums import CostModel, Currency, FlowActionType, FlowSortBy, LeadStatus, SortBy, SortOrder
 from src.core.models import Client
 
@@ -37,6 +37,14 @@ def validate_status_mapper(status_mapper):
         )
 
 
+def validate_dimension_parameters(dimension_parameters):
+    if dimension_parameters is None:
+        return
+
+    if len(set(dimension_parameters)) != len(dimension_parameters):
+        raise ValidationError('dimensionParameters must be unique.', field_name='dimensionParameters')
+
+
 class Schema(MarshmallowSchema):
     pass
 
@@ -58,10 +66,14 @@ class PaginationRequestSchema(Schema):
     pageSize = fields.Integer(dump_default=PAGINATION_DEFAULT_PAGE_SIZE, load_default=PAGINATION_DEFAULT_PAGE_SIZE)
     sortBy = fields.Enum(SortBy, dump_default=SortBy.id, load_default=SortBy.id)
     sortOrder = fields.Enum(SortOrder, dump_default=SortOrder.asc, load_default=SortOrder.asc)
+    # nextCursor of the previous page, the page is sought after it instead of skipped by page number
+    cursor = fields.String()
 
 
 class PaginationResponseSchema(PaginationRequestSchema):
-    total = fields.Integer(required=True)
+    # totals are not counted for pages requested by a cursor
+    total = fields.Integer(required=True, allow_none=True)
+    nextCursor = fields.String(required=True, allow_none=True)
 
 
 class CampaignCreateRequestSchema(Schema):
@@ -82,11 +94,19 @@ class CampaignUpdateRequestSchema(Schema):
     costValue = fields.Decimal(places=2, rounding=decimal.ROUND_DOWN)
     currency = fields.Enum(Currency)
     statusMapper = fields.Dict(allow_none=True, load_default=None)
+    dimensionParameters = fields.List(
+        fields.String(validate=validate.Length(min=1, max=255)),
+        validate=validate.Length(max=TRACK_CLICK_DIMENSIONS),
+    )
 
     @validates_schema
     def validate_status_mapper(self, data, **kwargs):
         validate_status_mapper(data.get('statusMapper'))
 
+    @validates_schema
+    def validate_dimension_parameters(self, data, **kwargs):
+        validate_dimension_parameters(data.get('dimensionParameters'))
+
 
 class CampaignResponseSchema(Schema):
     id = fields.Integer(required=True)
@@ -97,6 +117,8 @@ class CampaignResponseSchema(Schema):
     statusMapper = fields.Dict(allow_none=True)
     internalProcessUrl = fields.String(allow_none=True)
     expensesDistributionParameter = fields.String(allow_none=True)
+    dimensionParameters = fields.List(fields.String(), allow_none=True)
+    materializedDimensionParameters = fields.List(fields.String(), allow_none=True)
 
 
 class CampaignListResponseSchema(Schema):
@@ -114,10 +136,12 @@ class FlowPaginationRequestSchema(Schema):
     pageSize = fields.Integer(dump_default=PAGINATION_DEFAULT_PAGE_SIZE, load_default=PAGINATION_DEFAULT_PAGE_SIZE)
     sortBy = fields.Enum(FlowSortBy, dump_default=FlowSortBy.id, load_default=FlowSortBy.id)
     sortOrder = fields.Enum(SortOrder, dump_default=SortOrder.asc, load_default=SortOrder.asc)
+    cursor = fields.String()
 
 
 class FlowPaginationResponseSchema(FlowPaginationRequestSchema):
-    total = fields.Integer(required=True)
+    total = fields.Integer(required=True, allow_none=True)
+    nextCursor = fields.String(required=True, allow_none=True)
 
 
 class FlowUpdateRequestSchema(Schema):
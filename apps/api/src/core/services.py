@@ -1,9 +1,15 @@
 import dataclasses
+import gzip
 import logging
 import os
+import re
 import shutil
+import struct
 import tempfile
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from typing import Annotated, Protocol
 
 import httpx
@@ -14,21 +20,35 @@ from peewee import fn
 from wireup import Inject, injectable
 
 from src.core.entities import Campaign, Flow
-from src.core.enums import FlowActionType, SortOrder
-from src.core.exceptions import CampaignDoesNotExistError, DoesNotExistError, LandingPageUploadError
-from src.core.models import Client
-from src.core.utils import log_execution_time
+from src.core.enums import FlowActionType, IpLocatorMode
+from src.core.exceptions import (
+    CampaignDoesNotExistError,
+    DoesNotExistError,
+    LandingPageUploadError,
+)
+from src.core.ip2location import Ip2LocationIndex
+from src.core.models import Client, FlowRoute, LandingSnapshot, UserAgentInfo
+from src.core.pagination import paginate
+from src.core.utils import LRUCache, log_execution_time, utcnow
 
 logger = logging.getLogger(__name__)
 
+LANDING_RENDER_MAX_CONNECTIONS = 20
+LANDING_RENDER_MAX_KEEPALIVE_CONNECTIONS = 10
+LANDING_RENDER_REFRESH_WORKERS = 2
+LANDING_SNAPSHOT_FILENAME = '.snapshot.html.gz'
+UNMATCHED_LOG_INTERVAL_SECONDS = 60
+ROLL_SYMBOL = re.compile(r'\broll\b')
+
 
-@injectable
 class IpLocator(Protocol):
     def get_country(self, address):
         pass
 
+    def get_countries(self, addresses):
+        pass
+
 
-@injectable(as_type=IpLocator)
 class Ip2LocationLocator:
     def __init__(self, ip2location_db_path: Annotated[str, Inject(config='IP2LOCATION_DB_PATH')]):
         self.ip2location = None
@@ -50,21 +70,99 @@ class Ip2LocationLocator:
 
         return country
 
+    def get_countries(self, addresses):
+        return {address: self.get_country(address) for address in addresses}
+
+
+class Ip2LocationMemoryLocator:
+    def __init__(self, ip2location_db_path, cache_size):
+        self.index = None
+        try:
+            self.index = Ip2LocationIndex(ip2location_db_path)
+        except (OSError, ValueError, struct.error):
+            logger.warning('IP2Location database is not valid')
+        else:
+            logger.info(
+                'IP2Location database loaded into memory',
+                extra={
+                    'ipv4_ranges': len(self.index.ipv4_starts),
+                    'ipv6_ranges': len(self.index.ipv6_starts_low),
+                    'size_bytes': self.index.size_bytes,
+                },
+            )
+
+        self.cache = LRUCache(cache_size)
+
+    def get_country(self, address):
+        country = self.cache.get(address, default=False)
+        if country is not False:
+            return country
+
+        country = self.index.get_country(address) if self.index is not None else None
+        if country is None:
+            logger.warning('Failed to get country by ip', extra={'address': address})
+
+        self.cache.set(address, country)
+        return country
+
+    def get_countries(self, addresses):
+        if self.index is None:
+            return {address: None for address in addresses}
+
+        # batch lookups are meant for backfills, so they bypass the cache of recent addresses
+        return {address: self.index.get_country(address) for address in addresses}
+
+
+@injectable
+def ip_locator(
+    mode: Annotated[IpLocatorMode, Inject(config='IP_LOCATOR_MODE')],
+    ip2location_db_path: Annotated[str, Inject(config='IP2LOCATION_DB_PATH')],
+    cache_size: Annotated[int, Inject(config='IP_LOCATOR_CACHE_SIZE')],
+) -> IpLocator:
+    if mode == IpLocatorMode.memory:
+        return Ip2LocationMemoryLocator(ip2location_db_path, cache_size)
+
+    return Ip2LocationLocator(ip2location_db_path)
+
 
 @injectable
 class ClientService:
-    def __init__(self, ip_locator: IpLocator):
+    def __init__(
+        self,
+        ip_locator: IpLocator,
+        user_agent_cache_size: Annotated[int, Inject(config='USER_AGENT_CACHE_SIZE')],
+    ):
         self.ip_locator = ip_locator
+        self.user_agent_cache = LRUCache(user_agent_cache_size)
+
+    def cache_stats(self) -> dict[str, dict]:
+        return {'user_agents': self.user_agent_cache.stats()}
+
+    def user_agent_info(self, user_agent) -> UserAgentInfo:
+        user_agent_info = self.user_agent_cache.get(user_agent)
+        if user_agent_info is not None:
+            return user_agent_info
+
+        parsed = user_agents.parse(user_agent)
+        user_agent_info = UserAgentInfo(
+            browser_family=parsed.browser.family,
+            device_family=parsed.device.family,
+            os_family=parsed.os.family,
+            is_bot=parsed.is_bot,
+            is_mobile=parsed.is_mobile,
+        )
+        self.user_agent_cache.set(user_agent, user_agent_info)
+        return user_agent_info
 
     def client_info(self, user_agent, ip_address) -> Client:
-        user_agent = user_agents.parse(user_agent)
+        user_agent_info = self.user_agent_info(user_agent)
         return Client(
-            browser_family=user_agent.browser.family,
-            device_family=user_agent.device.family,
-            os_family=user_agent.os.family,
+            browser_family=user_agent_info.browser_family,
+            device_family=user_agent_info.device_family,
+            os_family=user_agent_info.os_family,
             country=self.ip_locator.get_country(ip_address),
-            is_bot=user_agent.is_bot,
-            is_mobile=user_agent.is_mobile,
+            is_bot=user_agent_info.is_bot,
+            is_mobile=user_agent_info.is_mobile,
         )
 
 
@@ -76,12 +174,8 @@ class CampaignService:
         except Campaign.DoesNotExist as exc:
             raise CampaignDoesNotExistError() from exc
 
-    def list(self, page, page_size, sort_by, sort_order):
-        order_by = getattr(Campaign, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
-
-        return [c for c in Campaign.select().order_by(order_by).limit(page_size).offset((page - 1) * page_size)]
+    def list(self, page, page_size, sort_by, sort_order, cursor=None):
+        return paginate(Campaign.select(), getattr(Campaign, sort_by), sort_order, page, page_size, cursor)
 
     def all(self):
         return [c for c in Campaign.select()]
@@ -97,7 +191,16 @@ class CampaignService:
         campaign.save()
         return campaign
 
-    def update(self, campaign_id, name=None, cost_model=None, cost_value=None, currency=None, status_mapper=None):
+    def update(
+        self,
+        campaign_id,
+        name=None,
+        cost_model=None,
+        cost_value=None,
+        currency=None,
+        status_mapper=None,
+        dimension_parameters=None,
+    ):
         campaign = self.get(campaign_id)
 
         if name:
@@ -115,6 +218,12 @@ class CampaignService:
         if status_mapper is not None:
             campaign.status_mapper = status_mapper
 
+        if dimension_parameters is not None and dimension_parameters != (campaign.dimension_parameters or []):
+            # clicks tracked so far hold the previous dimensions, reports parse parameters until the backfill
+            campaign.dimension_parameters = dimension_parameters
+            campaign.materialized_dimension_parameters = None
+            campaign.dimension_parameters_updated_at = utcnow()
+
         campaign.save()
 
         return campaign
@@ -129,9 +238,40 @@ class FlowService:
         self,
         landing_pages_base_path: Annotated[str, Inject(config='LANDING_PAGES_BASE_PATH')],
         landing_renderer_base_url: Annotated[str, Inject(config='LANDING_PAGE_RENDERER_BASE_URL')],
+        routing_table_ttl_seconds: Annotated[float, Inject(config='FLOW_ROUTING_TABLE_TTL_SECONDS')],
+        unmatched_cache_size: Annotated[int, Inject(config='FLOW_UNMATCHED_CACHE_SIZE')],
+        landing_render_timeout_seconds: Annotated[float, Inject(config='LANDING_RENDER_TIMEOUT_SECONDS')],
+        landing_render_cache_ttl_seconds: Annotated[float, Inject(config='LANDING_RENDER_CACHE_TTL_SECONDS')],
+        landing_render_stale_seconds: Annotated[float, Inject(config='LANDING_RENDER_STALE_SECONDS')],
     ):
         self.landing_pages_base_path = landing_pages_base_path
         self.landing_renderer_base_url = landing_renderer_base_url
+        self.routing_table_ttl_seconds = routing_table_ttl_seconds
+        self._routing_tables: dict[int, tuple[float, list[FlowRoute], bool]] = {}
+        self._routing_tables_lock = Lock()
+        self._routing_table_hits = 0
+        self._routing_table_misses = 0
+        self.unmatched_clients = LRUCache(unmatched_cache_size)
+        self._unmatched_logged: dict[int, tuple[float, int]] = {}
+        self._unmatched_logged_lock = Lock()
+
+        self.landing_render_cache_ttl_seconds = landing_render_cache_ttl_seconds
+        self.landing_render_stale_seconds = landing_render_stale_seconds
+        self.http_client = httpx.Client(
+            timeout=httpx.Timeout(landing_render_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=LANDING_RENDER_MAX_CONNECTIONS,
+                max_keepalive_connections=LANDING_RENDER_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+        self._landing_pages: dict[int, tuple[float, str]] = {}
+        self._landing_page_versions: dict[int, int] = {}
+        self._refreshing_landing_pages: set[int] = set()
+        self._landing_pages_lock = Lock()
+        self._landing_snapshots: dict[int, tuple[float, LandingSnapshot | None]] = {}
+        self._landing_refresh_executor = ThreadPoolExecutor(
+            max_workers=LANDING_RENDER_REFRESH_WORKERS, thread_name_prefix='landing-refresh'
+        )
 
     def _has_index_file(self, path):
         return any(os.path.isfile(os.path.join(path, name)) for name in ('index.html', 'index.php'))
@@ -176,6 +316,7 @@ class FlowService:
         if os.path.exists(landing_dir):
             shutil.rmtree(landing_dir)
         os.makedirs(landing_dir, exist_ok=True)
+        self.invalidate_landing_page(flow_id)
 
         with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
             landing_archive.save(temp_file.name)
@@ -205,12 +346,211 @@ class FlowService:
                 )
                 raise LandingPageUploadError()
 
+        self._store_landing_snapshot(landing_dir)
         return landing_dir
 
+    def _store_landing_snapshot(self, landing_dir):
+        # only plain html landings can be served without the renderer, php ones have to be executed on every hit
+        index_path = os.path.join(landing_dir, 'index.html')
+        if os.path.isfile(os.path.join(landing_dir, 'index.php')) or not os.path.isfile(index_path):
+            return None
+
+        with open(index_path, 'rb') as f:
+            content = f.read()
+
+        snapshot_path = os.path.join(landing_dir, LANDING_SNAPSHOT_FILENAME)
+        with tempfile.NamedTemporaryFile(dir=landing_dir, delete=False) as temp_file:
+            temp_file.write(gzip.compress(content, mtime=0))
+        os.replace(temp_file.name, snapshot_path)
+
+        return snapshot_path
+
+    def _load_landing_snapshot(self, flow_id) -> LandingSnapshot | None:
+        if not self.landing_pages_base_path:
+            return None
+
+        landing_dir = os.path.join(self.landing_pages_base_path, str(flow_id))
+        snapshot_path = os.path.join(landing_dir, LANDING_SNAPSHOT_FILENAME)
+        # landings uploaded before snapshots were introduced get one on first use
+        if not os.path.isfile(snapshot_path) and self._store_landing_snapshot(landing_dir) is None:
+            return None
+
+        with open(snapshot_path, 'rb') as f:
+            gzipped_content = f.read()
+
+        return LandingSnapshot(content=gzip.decompress(gzipped_content), gzipped_content=gzipped_content)
+
+    def _get_landing_snapshot(self, flow_id) -> LandingSnapshot | None:
+        cached = self._landing_snapshots.get(flow_id)
+        if cached is not None and time.monotonic() - cached[0] < self.landing_render_cache_ttl_seconds:
+            return cached[1]
+
+        try:
+            snapshot = self._load_landing_snapshot(flow_id)
+        except OSError:
+            logger.warning('Failed to load landing snapshot', extra={'flow_id': flow_id})
+            snapshot = None
+
+        self._landing_snapshots[flow_id] = (time.monotonic(), snapshot)
+        return snapshot
+
+    @staticmethod
+    def _compile_routing_table(flows) -> list[FlowRoute]:
+        routing_table = []
+        for flow in flows:
+            rule = None
+            if flow.rule is not None:
+                rule = rule_engine.Rule(flow.rule, context=Client.rule_engine_context())
+            routing_table.append(FlowRoute(flow=flow, rule=rule))
+
+        return routing_table
+
+    @staticmethod
+    def _match_route(routing_table: list[FlowRoute], client: Client) -> FlowRoute | None:
+        client_data = dataclasses.asdict(client)
+        for route in routing_table:
+            if route.rule is None or route.rule.matches(client_data):
+                return route
+
+        return None
+
+    def _get_routing_table_entry(self, campaign_id: int) -> tuple[float, list[FlowRoute], bool]:
+        # the entry is (expires_at, routing table, whether any rule depends on the random roll)
+        cached = self._routing_tables.get(campaign_id)
+        if cached is not None and cached[0] > time.monotonic():
+            # hits are counted without the lock every request would wait for, so they are approximate
+            self._routing_table_hits += 1
+            return cached
+
+        with self._routing_tables_lock:
+            cached = self._routing_tables.get(campaign_id)
+            if cached is not None and cached[0] > time.monotonic():
+                self._routing_table_hits += 1
+                return cached
+
+            self._routing_table_misses += 1
+            flows = (
+                Flow.select()
+                .where((Flow.campaign_id == campaign_id) & (Flow.is_enabled == True) & (Flow.is_deleted == False))
+                .order_by(Flow.order_value.desc(), Flow.id.asc())
+            )
+            routing_table = self._compile_routing_table(flows)
+            uses_roll = any(route.rule is not None and ROLL_SYMBOL.search(route.flow.rule) for route in routing_table)
+            entry = (time.monotonic() + self.routing_table_ttl_seconds, routing_table, uses_roll)
+            self._routing_tables[campaign_id] = entry
+
+        return entry
+
+    def _get_routing_table(self, campaign_id: int) -> list[FlowRoute]:
+        return self._get_routing_table_entry(campaign_id)[1]
+
+    def invalidate_unmatched_clients(self) -> None:
+        self.unmatched_clients.clear()
+        with self._unmatched_logged_lock:
+            self._unmatched_logged.clear()
+
+    def _log_unmatched(self, campaign_id: int, routing_table: list[FlowRoute]) -> None:
+        # bot floods produce a discard per request, so the warning is logged once per interval with a suppressed count
+        now = time.monotonic()
+        with self._unmatched_logged_lock:
+            logged_at, suppressed = self._unmatched_logged.get(campaign_id, (None, 0))
+            if logged_at is not None and now - logged_at < UNMATCHED_LOG_INTERVAL_SECONDS:
+                self._unmatched_logged[campaign_id] = (logged_at, suppressed + 1)
+                return
+
+            self._unmatched_logged[campaign_id] = (now, 0)
+
+        logger.warning(
+            'Failed to process flows',
+            extra={
+                'campaign_id': campaign_id,
+                'flows': [r.flow.to_dict() for r in routing_table],
+                'suppressed': suppressed,
+            },
+        )
+
+    def invalidate_routing_table(self, campaign_id: int | None = None) -> None:
+        with self._routing_tables_lock:
+            if campaign_id is None:
+                self._routing_tables.clear()
+                self._routing_table_hits = self._routing_table_misses = 0
+            else:
+                self._routing_tables.pop(campaign_id, None)
+
+    def cache_stats(self) -> dict[str, dict]:
+        # routing tables expire instead of being evicted, their cache is bounded by the number of campaigns
+        with self._routing_tables_lock:
+            routing_tables = {
+                'size': len(self._routing_tables),
+                'maxsize': None,
+                'hits': self._routing_table_hits,
+                'misses': self._routing_table_misses,
+                'evictions': 0,
+            }
+        return {'routing_tables': routing_tables, 'unmatched_clients': self.unmatched_clients.stats()}
+
+    def _fetch_landing_page(self, flow_id):
+        version = self._landing_page_versions.get(flow_id, 0)
+
+        response = self.http_client.get(f'{self.landing_renderer_base_url}/{flow_id}/')
+        response.raise_for_status()
+
+        with self._landing_pages_lock:
+            # the landing archive was replaced while rendering, so this content may already be outdated
+            if self._landing_page_versions.get(flow_id, 0) == version:
+                self._landing_pages[flow_id] = (time.monotonic(), response.text)
+
+        return response.text
+
+    def _refresh_landing_page(self, flow_id):
+        try:
+            self._fetch_landing_page(flow_id)
+        except httpx.HTTPError:
+            logger.warning('Failed to refresh landing page', extra={'flow_id': flow_id})
+        finally:
+            with self._landing_pages_lock:
+                self._refreshing_landing_pages.discard(flow_id)
+
+    def _schedule_landing_page_refresh(self, flow_id):
+        with self._landing_pages_lock:
+            if flow_id in self._refreshing_landing_pages:
+                return
+            self._refreshing_landing_pages.add(flow_id)
+
+        self._landing_refresh_executor.submit(self._refresh_landing_page, flow_id)
+
     @log_execution_time
     def _render_landing_page(self, flow_id):
-        response = httpx.get(f'{self.landing_renderer_base_url}/{flow_id}/')
-        return response.text
+        cached = self._landing_pages.get(flow_id)
+        if cached is not None:
+            rendered_at, content = cached
+            age = time.monotonic() - rendered_at
+            if age < self.landing_render_cache_ttl_seconds:
+                return content
+
+            if age < self.landing_render_cache_ttl_seconds + self.landing_render_stale_seconds:
+                self._schedule_landing_page_refresh(flow_id)
+                return content
+
+        try:
+            return self._fetch_landing_page(flow_id)
+        except httpx.HTTPError as exc:
+            if cached is not None:
+                logger.warning('Failed to render landing page, serving cached content', extra={'flow_id': flow_id})
+                return cached[1]
+
+            if isinstance(exc, httpx.HTTPStatusError):
+                return exc.response.text
+
+            raise
+
+    def invalidate_landing_page(self, flow_id: int | None = None) -> None:
+        with self._landing_pages_lock:
+            flow_ids = {flow_id} if flow_id is not None else set(self._landing_pages) | set(self._landing_snapshots)
+            for id_ in flow_ids:
+                self._landing_pages.pop(id_, None)
+                self._landing_snapshots.pop(id_, None)
+                self._landing_page_versions[id_] = self._landing_page_versions.get(id_, 0) + 1
 
     def get(self, id, campaign_id):
         try:
@@ -223,19 +563,9 @@ class FlowService:
 
         return flow
 
-    def list(self, page, page_size, sort_by, sort_order, campaign_id):
-        order_by = getattr(Flow, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
-
-        return [
-            f
-            for f in Flow.select()
-            .where((Flow.is_deleted == False) & (Flow.campaign == campaign_id))
-            .order_by(order_by)
-            .limit(page_size)
-            .offset((page - 1) * page_size)
-        ]
+    def list(self, page, page_size, sort_by, sort_order, campaign_id, cursor=None):
+        query = Flow.select().where((Flow.is_deleted == False) & (Flow.campaign == campaign_id))
+        return paginate(query, getattr(Flow, sort_by), sort_order, page, page_size, cursor)
 
     def create(
         self,
@@ -261,6 +591,7 @@ class FlowService:
         if action_type == FlowActionType.render:
             self._store_landing_archive(flow.id, landing_archive)
 
+        self.invalidate_routing_table(campaign_id)
         return flow
 
     def update(
@@ -291,12 +622,14 @@ class FlowService:
             flow.is_enabled = is_enabled
 
         flow.save()
+        self.invalidate_routing_table(campaign_id)
         return flow
 
     def delete(self, flow_id, campaign_id):
         flow = self.get(flow_id, campaign_id)
         flow.is_deleted = True
         flow.save()
+        self.invalidate_routing_table(campaign_id)
 
     def bulk_update_order(self, campaign_id, order):
         # TODO: move to repo
@@ -308,38 +641,37 @@ class FlowService:
                     (Flow.campaign_id == campaign_id) & (Flow.id == flow_id)
                 ).execute()
 
+        self.invalidate_routing_table(campaign_id)
+
     def count(self, campaign_id):
         return (
             Flow.select(fn.count(Flow.id)).where((Flow.is_deleted == False) & (Flow.campaign == campaign_id)).scalar()
         )
 
     def process_flows(self, campaign_id: int, client: Client):
-        flows = (
-            Flow.select()
-            .where((Flow.campaign_id == campaign_id) & (Flow.is_enabled == True) & (Flow.is_deleted == False))
-            .order_by(Flow.order_value.desc(), Flow.id.asc())
-        )
+        expires_at, routing_table, uses_roll = self._get_routing_table_entry(campaign_id)
 
-        matched_flow = None
-        for flow in flows:
-            if flow.rule is None:
-                matched_flow = flow
-                break
-
-            rule = rule_engine.Rule(flow.rule, context=Client.rule_engine_context())
-            if rule.matches(dataclasses.asdict(client)):
-                matched_flow = flow
-                break
-
-        if matched_flow is None:
-            logger.warning(
-                'Failed to process flows', extra={'campaign_id': campaign_id, 'flows': [f.to_dict() for f in flows]}
-            )
+        # expires_at identifies the routing table build, so outcomes of a rebuilt table are never reused
+        unmatched_key = (campaign_id, expires_at, client.dimensions(with_roll=uses_roll))
+        if self.unmatched_clients.get(unmatched_key):
+            self._log_unmatched(campaign_id, routing_table)
+            return None, None
+
+        matched_route = self._match_route(routing_table, client)
+        if matched_route is None:
+            self.unmatched_clients.set(unmatched_key, True)
+            self._log_unmatched(campaign_id, routing_table)
             return None, None
 
+        matched_flow = matched_route.flow
+
         if matched_flow.action_type == FlowActionType.redirect:
             return matched_flow.action_type, matched_flow.redirect_url
         elif matched_flow.action_type == FlowActionType.render:
+            snapshot = self._get_landing_snapshot(matched_flow.id)
+            if snapshot is not None:
+                return matched_flow.action_type, snapshot
+
             return matched_flow.action_type, self._render_landing_page(matched_flow.id)
 
         return None, None
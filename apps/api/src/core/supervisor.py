@@ -1,34 +1,115 @@
 import atexit
+import dataclasses
 import logging
+import random
 from collections import defaultdict
 from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
 from queue import Queue
 from threading import Event, Lock, Thread
-from typing import Annotated, TypeAlias
+from time import monotonic
+from typing import Annotated, TypeAlias, TypeVar
 
 from peewee import MySQLDatabase
-from wireup import Inject, injectable
+from wireup import Inject, SyncContainer, injectable
 
-from src.core.db import ReconnectPooledMySQLDatabase
+from src.core.db import ReconnectMySQLDatabase, release_connection
+from src.core.enums import WorkerMode, WorkerPlacement
+from src.core.models import WorkerSchedule, WorkerStats
+from src.core.utils import utcnow
 
 logger = logging.getLogger(__name__)
 
+SUPERVISOR_STOP_TIMEOUT_SECONDS = 5
+
+T = TypeVar('T')
 Worker: TypeAlias = Callable[['WorkerContext'], None]
 _REGISTERED_WORKERS: dict[str, list[Worker]] = defaultdict(list)
+_WORKER_QUEUE_MAXSIZES: dict[str, int] = {}
+_WORKER_PLACEMENTS: dict[str, WorkerPlacement] = {}
+_PROCESS_LOCAL_WORKERS: set[str] = set()
+_WORKER_SCHEDULES: dict[str, WorkerSchedule] = {}
 
 
 def get_worker_name(worker: Worker) -> str:
     return f'{worker.__module__}.{worker.__qualname__}'
 
 
-def register_worker(worker: Worker) -> Worker:
+def register_worker(
+    worker: Worker | None = None,
+    *,
+    queue_maxsize: int = 0,
+    placement: WorkerPlacement = WorkerPlacement.every_process,
+    process_local: bool = False,
+    schedule: WorkerSchedule | None = None,
+):
+    if worker is None:
+        return lambda w: register_worker(
+            w, queue_maxsize=queue_maxsize, placement=placement, process_local=process_local, schedule=schedule
+        )
+
     worker_name = get_worker_name(worker)
     workers = _REGISTERED_WORKERS[worker_name]
     if worker not in workers:
         workers.append(worker)
+    if queue_maxsize:
+        _WORKER_QUEUE_MAXSIZES[worker_name] = queue_maxsize
+    _WORKER_PLACEMENTS[worker_name] = placement
+    if process_local:
+        _PROCESS_LOCAL_WORKERS.add(worker_name)
+    if schedule is not None:
+        _WORKER_SCHEDULES[worker_name] = schedule
     return worker
 
 
+class WorkerLeaderLease:
+    def __init__(self, database: MySQLDatabase, name: str, heartbeat_seconds: float):
+        self.database = database
+        self.name = name
+        self.heartbeat_seconds = heartbeat_seconds
+        self.is_leader = False
+        self._checked_at: float | None = None
+
+    def _scalar(self, sql: str):
+        return self.database.execute_sql(sql, (self.name,)).fetchone()[0]
+
+    def refresh(self) -> bool:
+        now = monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.heartbeat_seconds:
+            return self.is_leader
+
+        self._checked_at = now
+        was_leader = self.is_leader
+        try:
+            # the lock belongs to the connection, a reconnect drops it silently and a dead leader frees it
+            if self.is_leader:
+                self.is_leader = self._scalar('SELECT IS_USED_LOCK(%s) = CONNECTION_ID()') == 1
+            if not self.is_leader:
+                self.is_leader = self._scalar('SELECT GET_LOCK(%s, 0)') == 1
+        except Exception:
+            logger.exception('Failed to refresh worker leader lease', extra={'lock_name': self.name})
+            self.is_leader = False
+
+        if self.is_leader != was_leader:
+            logger.info(
+                'Worker leader lease is acquired' if self.is_leader else 'Worker leader lease is lost',
+                extra={'lock_name': self.name},
+            )
+        return self.is_leader
+
+    def release(self) -> None:
+        if not self.is_leader:
+            return
+
+        self.is_leader = False
+        self._checked_at = None
+        try:
+            self._scalar('SELECT RELEASE_LOCK(%s)')
+        except Exception:
+            logger.exception('Failed to release worker leader lease', extra={'lock_name': self.name})
+
+
 @injectable(lifetime='singleton')
 class WorkerContext:
     def __init__(
@@ -38,18 +119,36 @@ class WorkerContext:
         username: Annotated[str, Inject(config='MARIADB_USER')],
         password: Annotated[str, Inject(config='MARIADB_PASSWORD')],
         db_name: Annotated[str, Inject(config='MARIADB_DATABASE')],
+        track_discard_retention_seconds: Annotated[int, Inject(config='TRACK_DISCARD_RETENTION_SECONDS')],
+        report_gap_seconds: Annotated[int, Inject(config='REPORT_GAP_SECONDS')],
+        report_daily_stats_parameters: Annotated[list[str], Inject(config='REPORT_DAILY_STATS_PARAMETERS')],
+        leader_heartbeat_seconds: Annotated[float, Inject(config='WORKER_LEADER_HEARTBEAT_SECONDS')],
     ):
-        self.database: MySQLDatabase = ReconnectPooledMySQLDatabase(
+        self.track_discard_retention_seconds = track_discard_retention_seconds
+        self.report_gap_seconds = report_gap_seconds
+        self.report_daily_stats_parameters = report_daily_stats_parameters
+        self.database: MySQLDatabase = ReconnectMySQLDatabase(
             db_name,
             user=username,
             password=password,
             host=host,
             port=port,
         )
+        # lock names are server-wide, so databases sharing a server elect their leaders apart
+        self.leader_lease = WorkerLeaderLease(self.database, f'{db_name}.worker_leader', leader_heartbeat_seconds)
         self._queues: dict[str, Queue[dict[str, object]]] = {}
         self._state: dict[str, dict[str, object]] = {}
+        self._wakeups: dict[str, float] = {}
         self._queues_lock = Lock()
         self._state_lock = Lock()
+        self._wakeups_lock = Lock()
+        self.wakeup = Event()
+        self.is_stopping = False
+        # bound by the container module, which imports the modules of every worker
+        self.container: SyncContainer | None = None
+
+    def get(self, service: type[T]) -> T:
+        return self.container.get(service)
 
     def get_queue(self, worker: Worker) -> Queue[dict[str, object]]:
         worker_name = get_worker_name(worker)
@@ -58,10 +157,13 @@ class WorkerContext:
             with self._queues_lock:
                 queue = self._queues.get(worker_name)
                 if queue is None:
-                    queue = Queue()
+                    queue = Queue(maxsize=_WORKER_QUEUE_MAXSIZES.get(worker_name, 0))
                     self._queues[worker_name] = queue
         return queue
 
+    def has_queue(self, worker_name: str) -> bool:
+        return worker_name in self._queues
+
     def get_state(self, worker: Worker) -> dict[str, object]:
         worker_name = get_worker_name(worker)
         state = self._state.get(worker_name)
@@ -73,6 +175,17 @@ class WorkerContext:
                     self._state[worker_name] = state
         return state
 
+    def wake(self, worker: Worker) -> None:
+        # the worker runs on the next pass, ahead of its period
+        with self._wakeups_lock:
+            self._wakeups.setdefault(get_worker_name(worker), monotonic())
+        self.wakeup.set()
+
+    def take_wakeups(self) -> dict[str, float]:
+        with self._wakeups_lock:
+            wakeups, self._wakeups = self._wakeups, {}
+        return wakeups
+
     def close(self) -> None:
         if not self.database.is_closed():
             self.database.close()
@@ -83,37 +196,189 @@ class WorkerSupervisor:
     def __init__(
         self,
         context: WorkerContext,
+        database: MySQLDatabase,
         poll_seconds: Annotated[float, Inject(config='BACKGROUND_SUPERVISOR_POLL_SECONDS')],
+        mode: Annotated[WorkerMode, Inject(config='BACKGROUND_WORKERS_MODE')],
+        pool_size: Annotated[int, Inject(config='BACKGROUND_WORKERS_POOL_SIZE')],
     ):
         self.context = context
+        self.database = database
         self.poll_seconds = poll_seconds
+        self.mode = mode
         self._workers = _REGISTERED_WORKERS
+        # without a pool workers run one after another in the supervisor thread
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='worker') if pool_size else None
+        self._futures: set[Future] = set()
+        self._stats: dict[str, WorkerStats] = {}
+        self._stats_lock = Lock()
         self._stop_event = Event()
         self._thread = Thread(target=self._run, name='worker-supervisor', daemon=True)
         self._thread.start()
         atexit.register(self.stop)
 
-    def enqueue(self, worker: Worker, payload: dict[str, object]) -> None:
-        self.context.get_queue(worker).put(payload)
+    def enqueue(self, worker: Worker, payload: dict[str, object], timeout: float | None = None) -> None:
+        queue = self.context.get_queue(worker)
+        queue.put(payload, timeout=timeout)
+
+        schedule = _WORKER_SCHEDULES.get(get_worker_name(worker))
+        if schedule is not None and schedule.wake_queue_size and queue.qsize() >= schedule.wake_queue_size:
+            self.context.wake(worker)
+
+    def stats(self) -> list[WorkerStats]:
+        with self._stats_lock:
+            return [dataclasses.replace(stats) for stats in self._stats.values()]
 
     def stop(self) -> None:
+        if self._stop_event.is_set():
+            return
+
         self._stop_event.set()
+        self.context.wakeup.set()
+        self._thread.join(timeout=SUPERVISOR_STOP_TIMEOUT_SECONDS)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            # a pooled worker still in flight may hold rows taken from the buffers the drain is about to read
+            _, running = wait_futures(list(self._futures), timeout=SUPERVISOR_STOP_TIMEOUT_SECONDS)
+            if running:
+                logger.warning('Workers did not finish in time before the drain', extra={'running_count': len(running)})
+
+        # a drain next to a worker still running in the supervisor thread would race it over the same buffers
         if self._thread.is_alive():
-            self._thread.join(timeout=1)
+            logger.warning('Worker supervisor did not stop in time, in-process buffers are not drained')
+            return
+
+        # give queue-driven workers a last chance to drain what is buffered in-process
+        self.context.is_stopping = True
+        self._run_workers(queued_only=True)
         self.context.close()
 
     def _run(self) -> None:
+        # the supervisor sleeps until the next worker is due or a worker is woken up
+        timeout = self.poll_seconds
         while not self._stop_event.is_set():
-            self._stop_event.wait(self.poll_seconds)
+            self.context.wakeup.wait(timeout)
             if self._stop_event.is_set():
                 break
 
-            for worker_name, workers in self._workers.items():
-                for worker in workers:
-                    try:
-                        worker(self.context)
-                    except Exception:
-                        logger.exception(
-                            'Failed to execute worker',
-                            extra={'worker_name': worker_name, 'worker': getattr(worker, '__name__', repr(worker))},
-                        )
+            self.context.wakeup.clear()
+            timeout = self._run_workers()
+
+        # the lease is held by the connection of this thread, so it is released here
+        self.context.leader_lease.release()
+
+    def _is_enabled(self, worker_name: str) -> bool:
+        # process-local workers drain in-memory buffers and state, so they stay with web processes
+        if self.mode == WorkerMode.all:
+            return True
+        return (worker_name in _PROCESS_LOCAL_WORKERS) == (self.mode == WorkerMode.local)
+
+    def _get_stats(self, worker_name: str) -> WorkerStats:
+        stats = self._stats.get(worker_name)
+        if stats is None:
+            stats = WorkerStats(name=worker_name)
+            self._stats[worker_name] = stats
+        return stats
+
+    def _due_at(self, schedule: WorkerSchedule, stats: WorkerStats) -> float:
+        if stats.woken_at is not None:
+            return stats.woken_at
+        if stats.started_at is None:
+            return 0.0
+
+        period_seconds = schedule.period_seconds() if callable(schedule.period_seconds) else schedule.period_seconds
+        if period_seconds is None:
+            period_seconds = self.poll_seconds
+        return stats.started_at + period_seconds * (1 + stats.jitter)
+
+    def _run_workers(self, queued_only: bool = False) -> float:
+        now = monotonic()
+        timeout = self.poll_seconds
+        wakeups = self.context.take_wakeups()
+        is_leader = None
+        for worker_name, workers in self._workers.items():
+            if not self._is_enabled(worker_name):
+                continue
+            if queued_only and not self.context.has_queue(worker_name):
+                continue
+
+            schedule = _WORKER_SCHEDULES.get(worker_name, WorkerSchedule())
+            with self._stats_lock:
+                stats = self._get_stats(worker_name)
+                if worker_name in wakeups and stats.woken_at is None:
+                    stats.woken_at = wakeups[worker_name]
+                self._check_timeout(schedule, stats, now)
+                due_at = self._due_at(schedule, stats)
+
+            if not queued_only and due_at > now:
+                timeout = min(timeout, due_at - now)
+                continue
+
+            # singleton workers run in the process holding the lease only, the lease is checked once per pass
+            if _WORKER_PLACEMENTS.get(worker_name) == WorkerPlacement.leader:
+                if is_leader is None:
+                    is_leader = self.context.leader_lease.refresh()
+                if not is_leader:
+                    continue
+
+            for worker in workers:
+                with self._stats_lock:
+                    # a worker still running its previous pass keeps its wakeup for the next one,
+                    # the final drain runs anyway since there is no next pass
+                    if not queued_only and stats.running_count >= schedule.max_concurrency:
+                        break
+
+                    stats.running_count += 1
+                    stats.lag_ms = round((now - due_at) * 1000, 2) if due_at else 0.0
+                    stats.last_run_at = utcnow()
+                    stats.started_at = now
+                    stats.woken_at = None
+                    stats.jitter = random.uniform(0, schedule.jitter_ratio)
+                    stats.is_timed_out = False
+
+                if self._executor is None or queued_only:
+                    self._execute(worker_name, worker, schedule, stats)
+                else:
+                    future = self._executor.submit(self._execute, worker_name, worker, schedule, stats)
+                    self._futures.add(future)
+                    future.add_done_callback(self._futures.discard)
+
+        return timeout
+
+    def _check_timeout(self, schedule: WorkerSchedule, stats: WorkerStats, now: float) -> None:
+        # a thread can not be interrupted, a hanging worker is only reported and keeps its slot
+        if not stats.running_count or stats.is_timed_out or schedule.timeout_seconds is None:
+            return
+
+        if now - stats.started_at > schedule.timeout_seconds:
+            stats.is_timed_out = True
+            stats.timeouts_count += 1
+            logger.warning('Worker timed out', extra={'worker_name': stats.name})
+
+    def _execute(self, worker_name: str, worker: Worker, schedule: WorkerSchedule, stats: WorkerStats) -> None:
+        started_at = monotonic()
+        error = None
+        try:
+            worker(self.context)
+        except Exception as e:
+            logger.exception(
+                'Failed to execute worker',
+                extra={'worker_name': worker_name, 'worker': getattr(worker, '__name__', repr(worker))},
+            )
+            error = repr(e)
+        finally:
+            # a pooled connection is not held by the worker thread between passes
+            release_connection(self.database)
+
+        finished_at = monotonic()
+        with self._stats_lock:
+            self._check_timeout(schedule, stats, finished_at)
+            stats.running_count -= 1
+            stats.runs_count += 1
+            stats.duration_ms = round((finished_at - started_at) * 1000, 2)
+            stats.error = error
+            if error is not None:
+                stats.errors_count += 1
+
+        # the next due worker may be waiting for the freed slot
+        if self._executor is not None:
+            self.context.wakeup.set()
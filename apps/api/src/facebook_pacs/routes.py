@@ -49,18 +49,21 @@ class Executors(MethodView):
         partial_name = parameters_payload.get('partialName')
         if not partial_name or len(partial_name) <= 2:
             partial_name = None
-        executors = executor_service.list(
+        executors, next_cursor = executor_service.list(
             parameters_payload['page'],
             parameters_payload['pageSize'],
             humps.decamelize(parameters_payload['sortBy'].value),
             parameters_payload['sortOrder'],
             partial_name=partial_name,
+            cursor=parameters_payload.get('cursor'),
         )
-        count = executor_service.count(partial_name=partial_name)
+        count = None
+        if parameters_payload.get('cursor') is None:
+            count = executor_service.count(partial_name=partial_name)
 
         return {
             'content': [humps.camelize(e.to_dict()) for e in executors],
-            'pagination': parameters_payload | {'total': count},
+            'pagination': parameters_payload | {'total': count, 'nextCursor': next_cursor},
             'filters': {'partialName': partial_name},
         }
 
@@ -101,18 +104,21 @@ class BusinessPosrfolios(MethodView):
         partial_name = parameters_payload.get('partialName')
         if not partial_name or len(partial_name) <= 2:
             partial_name = None
-        business_portfolios = business_portfolio_service.list(
+        business_portfolios, next_cursor = business_portfolio_service.list(
             parameters_payload['page'],
             parameters_payload['pageSize'],
             humps.decamelize(parameters_payload['sortBy'].value),
             parameters_payload['sortOrder'],
             partial_name=partial_name,
+            cursor=parameters_payload.get('cursor'),
         )
-        count = business_portfolio_service.count(partial_name=partial_name)
+        count = None
+        if parameters_payload.get('cursor') is None:
+            count = business_portfolio_service.count(partial_name=partial_name)
 
         return {
             'content': [humps.camelize(b.to_dict()) for b in business_portfolios],
-            'pagination': parameters_payload | {'total': count},
+            'pagination': parameters_payload | {'total': count, 'nextCursor': next_cursor},
             'filters': {'partialName': partial_name},
         }
 
@@ -170,18 +176,21 @@ class BusinessPortfolioAccessUrls(MethodView):
     @auth.login_required
     def get(self, parameters_payload, businessPortfolioId):
         business_portfolio_service = container.get(BusinessPortfolioService)
-        access_urls = business_portfolio_service.list_access_urls(
+        access_urls, next_cursor = business_portfolio_service.list_access_urls(
             parameters_payload['page'],
             parameters_payload['pageSize'],
             humps.decamelize(parameters_payload['sortBy'].value),
             parameters_payload['sortOrder'],
             businessPortfolioId,
+            cursor=parameters_payload.get('cursor'),
         )
-        count = business_portfolio_service.count_access_urls()
+        count = None
+        if parameters_payload.get('cursor') is None:
+            count = business_portfolio_service.count_access_urls()
 
         return {
             'content': [humps.camelize(a.to_dict()) for a in access_urls],
-            'pagination': parameters_payload | {'total': count},
+            'pagination': parameters_payload | {'total': count, 'nextCursor': next_cursor},
         }
 
     @blueprint.arguments(FacebookPacsBusinessPortfolioAccessUrlRequestSchema)
@@ -217,18 +226,21 @@ class AdCabinets(MethodView):
         partial_name = parameters_payload.get('partialName')
         if not partial_name or len(partial_name) <= 2:
             partial_name = None
-        ad_cabinets = ad_cabinet_service.list(
+        ad_cabinets, next_cursor = ad_cabinet_service.list(
             parameters_payload['page'],
             parameters_payload['pageSize'],
             humps.decamelize(parameters_payload['sortBy'].value),
             parameters_payload['sortOrder'],
             partial_name=partial_name,
+            cursor=parameters_payload.get('cursor'),
         )
-        count = ad_cabinet_service.count(partial_name=partial_name)
+        count = None
+        if parameters_payload.get('cursor') is None:
+            count = ad_cabinet_service.count(partial_name=partial_name)
 
         return {
             'content': [humps.camelize(ac.to_dict()) for ac in ad_cabinets],
-            'pagination': parameters_payload | {'total': count},
+            'pagination': parameters_payload | {'total': count, 'nextCursor': next_cursor},
             'filters': {'partialName': partial_name},
         }
 
@@ -284,17 +296,20 @@ class Campaigns(MethodView):
     @auth.login_required
     def get(self, parameters_payload):
         campaign_service = container.get(CampaignService)
-        campaigns = campaign_service.list(
+        campaigns, next_cursor = campaign_service.list(
             parameters_payload['page'],
             parameters_payload['pageSize'],
             humps.decamelize(parameters_payload['sortBy'].value),
             parameters_payload['sortOrder'],
+            cursor=parameters_payload.get('cursor'),
         )
-        count = campaign_service.count()
+        count = None
+        if parameters_payload.get('cursor') is None:
+            count = campaign_service.count()
 
         return {
             'content': [humps.camelize(c.to_dict() | {'name': c.core_campaign.name}) for c in campaigns],
-            'pagination': parameters_payload | {'total': count},
+            'pagination': parameters_payload | {'total': count, 'nextCursor': next_cursor},
         }
 
     @blueprint.arguments(FacebookPacsCampaignRequestSchema)
@@ -353,18 +368,21 @@ class BusinessPages(MethodView):
         partial_name = parameters_payload.get('partialName')
         if not partial_name or len(partial_name) <= 2:
             partial_name = None
-        business_pages = business_page_service.list(
+        business_pages, next_cursor = business_page_service.list(
             parameters_payload['page'],
             parameters_payload['pageSize'],
             humps.decamelize(parameters_payload['sortBy'].value),
             parameters_payload['sortOrder'],
             partial_name=partial_name,
+            cursor=parameters_payload.get('cursor'),
         )
-        count = business_page_service.count(partial_name=partial_name)
+        count = None
+        if parameters_payload.get('cursor') is None:
+            count = business_page_service.count(partial_name=partial_name)
 
         return {
             'content': [humps.camelize(bp.to_dict()) for bp in business_pages],
-            'pagination': parameters_payload | {'total': count},
+            'pagination': parameters_payload | {'total': count, 'nextCursor': next_cursor},
             'filters': {'partialName': partial_name},
         }
 
@@ -8,8 +8,8 @@ from wireup import Inject, injectable
 
 from src.alerts import Alert, AlertCode, AlertSeverity, register_alert_callback
 from src.alerts.repositories import BusinessPortfolioRepository
-from src.core.enums import SortOrder
 from src.core.exceptions import CampaignDoesNotExistError, DoesNotExistError
+from src.core.pagination import paginate
 from src.core.services import CampaignService as CoreCampaignService
 from src.facebook_pacs import exceptions
 from src.facebook_pacs.entities import (
@@ -22,6 +22,8 @@ from src.facebook_pacs.entities import (
 )
 from src.facebook_pacs.exceptions import ExecutorIsAlreadyBindError
 
+ACCESS_URL_ALERTS_PERIOD_SECONDS = 5 * 60
+
 
 @injectable
 class ExecutorService:
@@ -31,16 +33,12 @@ class ExecutorService:
         except Executor.DoesNotExist as exc:
             raise DoesNotExistError() from exc
 
-    def list(self, page, page_size, sort_by, sort_order, partial_name=None):
-        order_by = getattr(Executor, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
-
+    def list(self, page, page_size, sort_by, sort_order, partial_name=None, cursor=None):
         query = Executor.select()
         if partial_name:
             query = query.where(fn.LOWER(Executor.name).contains(partial_name.lower()))
 
-        return [e for e in query.order_by(order_by).limit(page_size).offset((page - 1) * page_size)]
+        return paginate(query, getattr(Executor, sort_by), sort_order, page, page_size, cursor)
 
     def create(self, name, is_banned):
         executor = Executor(name=name, is_banned=is_banned)
@@ -84,16 +82,12 @@ class BusinessPortfolioService:
         except BusinessPortfolio.DoesNotExist as exc:
             raise DoesNotExistError() from exc
 
-    def list(self, page, page_size, sort_by, sort_order, partial_name=None):
-        order_by = getattr(BusinessPortfolio, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
-
+    def list(self, page, page_size, sort_by, sort_order, partial_name=None, cursor=None):
         query = BusinessPortfolio.select()
         if partial_name:
             query = query.where(fn.LOWER(BusinessPortfolio.name).contains(partial_name.lower()))
 
-        return [bm for bm in query.order_by(order_by).limit(page_size).offset((page - 1) * page_size)]
+        return paginate(query, getattr(BusinessPortfolio, sort_by), sort_order, page, page_size, cursor)
 
     def create(self, name, is_banned):
         business_portfolio = BusinessPortfolio(name=name, is_banned=is_banned)
@@ -149,19 +143,11 @@ class BusinessPortfolioService:
         access_url.save()
         return access_url
 
-    def list_access_urls(self, page, page_size, sort_by, sort_order, business_portfolio_id):
-        order_by = getattr(BusinessPortfolioAccessUrl, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
-
-        return [
-            a
-            for a in BusinessPortfolioAccessUrl.select()
-            .where(BusinessPortfolioAccessUrl.business_portfolio == business_portfolio_id)
-            .order_by(order_by)
-            .limit(page_size)
-            .offset((page - 1) * page_size)
-        ]
+    def list_access_urls(self, page, page_size, sort_by, sort_order, business_portfolio_id, cursor=None):
+        query = BusinessPortfolioAccessUrl.select().where(
+            BusinessPortfolioAccessUrl.business_portfolio == business_portfolio_id
+        )
+        return paginate(query, getattr(BusinessPortfolioAccessUrl, sort_by), sort_order, page, page_size, cursor)
 
     def count_access_urls(self):
         return BusinessPortfolioAccessUrl.select(fn.count(BusinessPortfolioAccessUrl.id)).scalar()
@@ -199,16 +185,12 @@ class AdCabinetService:
         except AdCabinet.DoesNotExist as exc:
             raise DoesNotExistError() from exc
 
-    def list(self, page, page_size, sort_by, sort_order, partial_name=None):
-        order_by = getattr(AdCabinet, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
-
+    def list(self, page, page_size, sort_by, sort_order, partial_name=None, cursor=None):
         query = AdCabinet.select()
         if partial_name:
             query = query.where(fn.LOWER(AdCabinet.name).contains(partial_name.lower()))
 
-        return [ac for ac in query.order_by(order_by).limit(page_size).offset((page - 1) * page_size)]
+        return paginate(query, getattr(AdCabinet, sort_by), sort_order, page, page_size, cursor)
 
     def create(self, name, is_banned):
         ad_cabinet = AdCabinet(name=name, is_banned=is_banned)
@@ -259,16 +241,12 @@ class BusinessPageService:
         except BusinessPage.DoesNotExist as exc:
             raise DoesNotExistError() from exc
 
-    def list(self, page, page_size, sort_by, sort_order, partial_name=None):
-        order_by = getattr(BusinessPage, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
-
+    def list(self, page, page_size, sort_by, sort_order, partial_name=None, cursor=None):
         query = BusinessPage.select()
         if partial_name:
             query = query.where(fn.LOWER(BusinessPage.name).contains(partial_name.lower()))
 
-        return [bp for bp in query.order_by(order_by).limit(page_size).offset((page - 1) * page_size)]
+        return paginate(query, getattr(BusinessPage, sort_by), sort_order, page, page_size, cursor)
 
     def create(self, name, is_banned):
         business_page = BusinessPage(name=name, is_banned=is_banned)
@@ -314,12 +292,8 @@ class CampaignService:
         except Campaign.DoesNotExist as exc:
             raise CampaignDoesNotExistError() from exc
 
-    def list(self, page, page_size, sort_by, sort_order):
-        order_by = getattr(Campaign, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
-
-        return [ac for ac in Campaign.select().order_by(order_by).limit(page_size).offset((page - 1) * page_size)]
+    def list(self, page, page_size, sort_by, sort_order, cursor=None):
+        return paginate(Campaign.select(), getattr(Campaign, sort_by), sort_order, page, page_size, cursor)
 
     def create(
         self,
@@ -395,7 +369,8 @@ class CampaignService:
         return Campaign.select(fn.count(Campaign.id)).scalar()
 
 
-@register_alert_callback
+# access URLs expire in days, there is no point to check them as often as the other alerts
+@register_alert_callback(period_seconds=ACCESS_URL_ALERTS_PERIOD_SECONDS)
 def collect_business_portfolio_access_url_alerts(container):
     business_portfolio_service = container.get(BusinessPortfolioService)
 
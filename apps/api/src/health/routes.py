@@ -1,8 +1,18 @@
 from flask.views import MethodView
 from flask_smorest import Blueprint
-from peewee import MySQLDatabase
+from peewee import MySQLDatabase, OperationalError
+from playhouse.pool import MaxConnectionsExceeded
 
+from src.auth import auth
 from src.container import container
+from src.core.db import ReconnectPooledMySQLDatabase
+from src.core.services import ClientService, FlowService
+from src.core.supervisor import WorkerSupervisor
+from src.health.schemas import (
+    CacheStatsListResponseSchema,
+    DatabasePoolStatsResponseSchema,
+    WorkerStatsListResponseSchema,
+)
 
 blueprint = Blueprint('health', __name__, description='Health')
 
@@ -13,8 +23,85 @@ class Health(MethodView):
     @blueprint.response(200)
     def get(self):
         db_connection = container.get(MySQLDatabase)
+        try:
+            db_connection.connect(reuse_if_open=True)
+        except (OperationalError, MaxConnectionsExceeded):
+            return {'healthy': False}, 503
 
         if db_connection.is_connection_usable():
             return {'healthy': True}
         else:
             return {'healthy': False}, 503
+
+
+@blueprint.route('/workers')
+class WorkerStats(MethodView):
+    @blueprint.response(200, WorkerStatsListResponseSchema)
+    @auth.login_required
+    def get(self):
+        return {
+            'content': [
+                {
+                    'name': stats.name,
+                    'lastRunAt': stats.last_run_at,
+                    'durationMs': stats.duration_ms,
+                    'lagMs': stats.lag_ms,
+                    'error': stats.error,
+                    'runsCount': stats.runs_count,
+                    'errorsCount': stats.errors_count,
+                    'timeoutsCount': stats.timeouts_count,
+                    'runningCount': stats.running_count,
+                }
+                for stats in container.get(WorkerSupervisor).stats()
+            ]
+        }
+
+
+@blueprint.route('/caches')
+class CacheStats(MethodView):
+    @blueprint.response(200, CacheStatsListResponseSchema)
+    @auth.login_required
+    def get(self):
+        # hit rates of the in-process caches of the tracking path, to tune their sizes
+        cache_stats = container.get(ClientService).cache_stats() | container.get(FlowService).cache_stats()
+        content = []
+        for name, stats in cache_stats.items():
+            lookups = stats['hits'] + stats['misses']
+            content.append(
+                {
+                    'name': name,
+                    'size': stats['size'],
+                    'maxsize': stats['maxsize'],
+                    'hits': stats['hits'],
+                    'misses': stats['misses'],
+                    'evictions': stats['evictions'],
+                    'hitRate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+                }
+            )
+
+        return {'content': content}
+
+
+@blueprint.route('/database')
+class DatabasePoolStats(MethodView):
+    @blueprint.response(200, DatabasePoolStatsResponseSchema)
+    @auth.login_required
+    def get(self):
+        # without a pool every thread keeps its own connection, there is nothing to report
+        database = container.get(MySQLDatabase)
+        if not isinstance(database, ReconnectPooledMySQLDatabase):
+            return {'content': None}
+
+        stats = database.pool_stats()
+        return {
+            'content': {
+                'maxConnections': stats.max_connections,
+                'inUseCount': stats.in_use_count,
+                'idleCount': stats.idle_count,
+                'checkoutsCount': stats.checkouts_count,
+                'waitsCount': stats.waits_count,
+                'timeoutsCount': stats.timeouts_count,
+                'waitMsTotal': round(stats.wait_ms_total, 2),
+                'waitMsMax': round(stats.wait_ms_max, 2),
+            }
+        }
@@ -0,0 +1,48 @@
+from marshmallow import fields
+
+from src.core.schemas import Schema
+
+
+class WorkerStatsResponseSchema(Schema):
+    name = fields.String(required=True)
+    lastRunAt = fields.DateTime(allow_none=True)
+    durationMs = fields.Float(allow_none=True)
+    lagMs = fields.Float(allow_none=True)
+    error = fields.String(allow_none=True)
+    runsCount = fields.Integer(required=True)
+    errorsCount = fields.Integer(required=True)
+    timeoutsCount = fields.Integer(required=True)
+    runningCount = fields.Integer(required=True)
+
+
+class WorkerStatsListResponseSchema(Schema):
+    content = fields.Nested(WorkerStatsResponseSchema(many=True), required=True)
+
+
+class CacheStatsResponseSchema(Schema):
+    name = fields.String(required=True)
+    size = fields.Integer(required=True)
+    maxsize = fields.Integer(allow_none=True)
+    hits = fields.Integer(required=True)
+    misses = fields.Integer(required=True)
+    evictions = fields.Integer(required=True)
+    hitRate = fields.Float(required=True)
+
+
+class CacheStatsListResponseSchema(Schema):
+    content = fields.Nested(CacheStatsResponseSchema(many=True), required=True)
+
+
+class DatabasePoolStatsContentSchema(Schema):
+    maxConnections = fields.Integer(required=True)
+    inUseCount = fields.Integer(required=True)
+    idleCount = fields.Integer(required=True)
+    checkoutsCount = fields.Integer(required=True)
+    waitsCount = fields.Integer(required=True)
+    timeoutsCount = fields.Integer(required=True)
+    waitMsTotal = fields.Float(required=True)
+    waitMsMax = fields.Float(required=True)
+
+
+class DatabasePoolStatsResponseSchema(Schema):
+    content = fields.Nested(DatabasePoolStatsContentSchema, allow_none=True, required=True)
@@ -0,0 +1,127 @@
+from array import array
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import compress
+
+from src.core.enums import LeadStatus
+
+LEAD_STATUSES = [status.value for status in LeadStatus]
+EMPTY_EXPENSES = {
+    'expenses': 0,
+    'roi_accepted': 0,
+    'roi_expected': 0,
+    'profit_accepted': 0,
+    'profit_expected': 0,
+}
+
+
+class StatisticsAggregation:
+    # statistics rows are folded into flat columns indexed by cell * days + day, a cell is the integer code of one
+    # combination of group values; the nested report is materialized once, when every row is added
+    def __init__(self, period_start: date, period_end: date):
+        self.period_start = period_start
+        self.days = (period_end - period_start).days + 1
+        self.cells: dict[tuple, int] = {}
+        self.has_rows = bytearray()
+        self.clicks = array('q')
+        self.leads = {status: array('q') for status in LEAD_STATUSES}
+        self.payouts = {status: [] for status in LEAD_STATUSES}
+
+    def cell(self, group_values: tuple) -> int:
+        cell = self.cells.get(group_values)
+        if cell is not None:
+            return cell
+
+        cell = len(self.cells)
+        self.cells[group_values] = cell
+        self.has_rows.extend(bytes(self.days))
+        self.clicks.extend([0] * self.days)
+        for status in LEAD_STATUSES:
+            self.leads[status].extend([0] * self.days)
+            self.payouts[status].extend([0] * self.days)
+        return cell
+
+    def add_rows(self, rows) -> None:
+        # rows only scatter their values into the columns, every sum is left to payouts_by_day and the report
+        days = {self.period_start + timedelta(days=day): day for day in range(self.days)}
+        cells, has_rows, clicks, leads, payouts = self.cells, self.has_rows, self.clicks, self.leads, self.payouts
+        for clicks_count, leads_count, row_payouts, lead_status, row_date, *group_values in rows:
+            day = days.get(row_date)
+            if day is None:
+                continue
+
+            group_values = tuple(group_values)
+            cell = cells.get(group_values)
+            if cell is None:
+                cell = self.cell(group_values)
+
+            index = cell * self.days + day
+            has_rows[index] = 1
+            clicks[index] += clicks_count
+            if lead_status:
+                leads[lead_status][index] = leads_count
+                payouts[lead_status][index] = row_payouts or 0
+
+    def payouts_by_day(self, group_level: int | None = None) -> dict[tuple[int, object], tuple]:
+        # accepted and expected payouts per day, and per value of the first group level when asked; the cells of a
+        # day are a strided slice of a column, and the cells of a group value are picked from it by a mask, so every
+        # sum runs over a whole slice instead of cell by cell
+        accepted, expect = self.payouts[LeadStatus.accept.value], self.payouts[LeadStatus.expect.value]
+        masks = {None: None}
+        if group_level is not None:
+            masks = defaultdict(lambda: bytearray(len(self.cells)))
+            for group_values, cell in self.cells.items():
+                masks[group_values[group_level]][cell] = 1
+
+        payouts = {}
+        for day in range(self.days):
+            day_accepted, day_expect = accepted[day :: self.days], expect[day :: self.days]
+            for group_value, mask in masks.items():
+                cells_accepted = day_accepted if mask is None else compress(day_accepted, mask)
+                cells_expect = day_expect if mask is None else compress(day_expect, mask)
+                # zeros are dropped first, so only payouts of cells with leads are added up as decimals
+                payouts_accepted, payouts_expect = sum(filter(None, cells_accepted)), sum(filter(None, cells_expect))
+                if payouts_accepted or payouts_expect:
+                    payouts[(day, group_value)] = (payouts_accepted, payouts_accepted + payouts_expect)
+
+        return payouts
+
+    def report(self, match_expenses_distribution: bool, sparse: bool = False) -> dict[date, dict]:
+        dates = [self.period_start + timedelta(days=day) for day in range(self.days)]
+        report = {report_date: {} if match_expenses_distribution else dict(EMPTY_EXPENSES) for report_date in dates}
+        # every node without rows holds the same zeros, so they share one statuses object which is never modified
+        empty_statuses = {status: {'leads': 0, 'payouts': 0} for status in LEAD_STATUSES}
+
+        for group_values, cell in self.cells.items():
+            start, end = cell * self.days, (cell + 1) * self.days
+            has_rows = self.has_rows[start:end]
+            if sparse and not any(has_rows):
+                continue
+
+            clicks = self.clicks[start:end]
+            leads = {status: self.leads[status][start:end] for status in LEAD_STATUSES}
+            payouts = {status: self.payouts[status][start:end] for status in LEAD_STATUSES}
+            for day, report_date in enumerate(dates):
+                if not has_rows[day]:
+                    if sparse:
+                        continue
+                    statuses = empty_statuses
+                else:
+                    statuses = {
+                        status: {'leads': leads[status][day], 'payouts': payouts[status][day]}
+                        for status in LEAD_STATUSES
+                    }
+
+                container = report[report_date]
+                for level, group_value in enumerate(group_values):
+                    node = container.get(group_value)
+                    if node is None:
+                        node = container[group_value] = {}
+                        if level == 0 and match_expenses_distribution:
+                            node.update(EMPTY_EXPENSES)
+                    container = node
+
+                container['statuses'] = statuses
+                container['clicks'] = clicks[day]
+
+        return report
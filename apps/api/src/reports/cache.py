@@ -0,0 +1,81 @@
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from threading import Lock
+from typing import Annotated
+
+from wireup import Inject, injectable
+
+from src.core.utils import LRUCache
+
+
+@dataclass(frozen=True)
+class StatisticsReportFragment:
+    report_rows: list[tuple] = field(default_factory=list)
+    expenses_rows: list[tuple] = field(default_factory=list)
+
+    @property
+    def size_bytes(self) -> int:
+        # a rough estimate, good enough to watch the cache growth
+        size = sys.getsizeof(self.report_rows) + sys.getsizeof(self.expenses_rows)
+        for row in self.report_rows + self.expenses_rows:
+            size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+        return size
+
+
+@injectable
+class StatisticsReportCache:
+    # per-day statistics report fragments of closed days, the fragments of a campaign are dropped by bumping
+    # its generation, stale ones are evicted by the LRU later
+    def __init__(
+        self,
+        maxsize: Annotated[int, Inject(config='REPORT_CACHE_SIZE')],
+        ttl_seconds: Annotated[float, Inject(config='REPORT_CACHE_TTL_SECONDS')],
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.fragments = LRUCache(maxsize)
+        self._generations: dict[int, int] = defaultdict(int)
+        self._invalidated_at: dict[int, float] = {}
+        self._lock = Lock()
+
+    def key(self, campaign_id: int, group_parameters: list[str], skip_clicks_without_parameters: bool) -> tuple:
+        with self._lock:
+            generation = self._generations[campaign_id]
+        return campaign_id, generation, tuple(group_parameters), skip_clicks_without_parameters
+
+    def get(self, key: tuple, day: date) -> StatisticsReportFragment | None:
+        entry = self.fragments.get((*key, day))
+        if entry is None:
+            return None
+
+        expires_at, fragment = entry
+        if expires_at <= time.monotonic():
+            return None
+
+        return fragment
+
+    def set(self, key: tuple, day: date, fragment: StatisticsReportFragment) -> None:
+        self.fragments.set((*key, day), (time.monotonic() + self.ttl_seconds, fragment))
+
+    def invalidate(self, campaign_id: int | None = None) -> None:
+        if campaign_id is None:
+            self.fragments.clear()
+            return
+
+        with self._lock:
+            self._generations[campaign_id] += 1
+            self._invalidated_at[campaign_id] = time.monotonic()
+
+    def is_invalidated_within(self, campaign_id: int, seconds: float) -> bool:
+        with self._lock:
+            invalidated_at = self._invalidated_at.get(campaign_id)
+        return invalidated_at is not None and time.monotonic() - invalidated_at < seconds
+
+    def stats(self) -> dict:
+        stats = self.fragments.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['size_bytes'] = sum(fragment.size_bytes for _, fragment in self.fragments.values())
+        return stats
@@ -0,0 +1,60 @@
+import json
+
+PARAMETER_CATALOG_MAX_LENGTH = 255
+# the raw row of the empty parameter name stands for parameter names longer than the catalog column fits
+LONG_PARAMETER_NAMES = ''
+
+
+def catalog_value(value) -> str | None:
+    # values are kept as json_value returns them, nulls, nested and long values are left to a raw row
+    if isinstance(value, str):
+        text = value
+    elif isinstance(value, (bool, int, float)):
+        text = json.dumps(value)
+    else:
+        return None
+
+    return text if len(text) <= PARAMETER_CATALOG_MAX_LENGTH else None
+
+
+def raw_value(json_text: str | None):
+    # a value the catalog can not hold is read from track_click as json_extract returns it
+    if json_text is None:
+        return None
+
+    value = json.loads(json_text)
+    if value is None:
+        return None
+    if isinstance(value, (dict, list)):
+        return json_text
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def value_sort_key(value) -> tuple:
+    # null values of the raw lookups go first
+    return value is not None, value or ''
+
+
+def fold_parameters(clicks) -> dict[tuple[int, str, str, bool], list]:
+    # (campaign_id, parameter, value, is_raw) -> [count, first_seen_at, last_seen_at] of
+    # (campaign_id, parameters, created_at); a raw row only marks that values of its parameter, or parameter names,
+    # are looked up in track_click instead
+    entries: dict[tuple[int, str, str, bool], list] = {}
+    for campaign_id, parameters, created_at in clicks:
+        for parameter, value in (parameters or {}).items():
+            if len(parameter) > PARAMETER_CATALOG_MAX_LENGTH:
+                key = (campaign_id, LONG_PARAMETER_NAMES, '', True)
+            else:
+                value = catalog_value(value)
+                key = (campaign_id, parameter, '', True) if value is None else (campaign_id, parameter, value, False)
+
+            entry = entries.get(key)
+            if entry is None:
+                entries[key] = [1, created_at, created_at]
+                continue
+
+            entry[0] += 1
+            entry[1] = min(entry[1], created_at)
+            entry[2] = max(entry[2], created_at)
+
+    return entries
@@ -1,4 +1,4 @@
-from peewee import CharField, DateField, DecimalField, ForeignKeyField, IntegerField
+from peewee import BigIntegerField, BooleanField, CharField, DateField, DecimalField, ForeignKeyField, IntegerField
 
 from src.core.entities import Campaign, Entity
 from src.core.peewee import BinaryUUIDField, JSONField, UTCTimestampField
@@ -26,3 +26,39 @@ class ReportLead(Entity):
             (('click_id',), True),
             (('campaign_id', 'click_created_at'), False),
         )
+
+
+class ReportLeadOutbox(Entity):
+    # written in the same transaction as lead and postback events, track tables are Aria and stay outside of it
+    click_id = BinaryUUIDField()
+    source = CharField()
+
+    class Meta:
+        table_settings = ('ENGINE=InnoDB',)
+
+
+class ReportDailyStats(Entity):
+    campaign_id = IntegerField()
+    date = DateField()
+    # values of the rollup parameters only, the rest of click parameters are not aggregated
+    parameters = JSONField()
+    parameters_hash = CharField(max_length=32)
+    has_parameters = BooleanField()
+    clicks = IntegerField(default=0)
+    leads_accept = IntegerField(default=0)
+    leads_expect = IntegerField(default=0)
+    leads_reject = IntegerField(default=0)
+    leads_trash = IntegerField(default=0)
+    payouts_accept = DecimalField(max_digits=14, decimal_places=5, default=0)
+    payouts_expect = DecimalField(max_digits=14, decimal_places=5, default=0)
+
+    class Meta:
+        indexes = ((('campaign_id', 'date', 'parameters_hash', 'has_parameters'), True),)
+
+
+class ReportWatermark(Entity):
+    name = CharField()
+    value = BigIntegerField()
+
+    class Meta:
+        indexes = ((('name',), True),)
@@ -5,3 +5,14 @@ class ExpenseSortBy(str, Enum):
     id = 'id'
     createdAt = 'createdAt'
     date = 'date'
+
+
+class ReportWatermarkName(str, Enum):
+    daily_stats_click = 'report_daily_stats.track_click'
+    daily_stats_postback = 'report_daily_stats.track_postback'
+    parameter_catalog_click = 'track_parameter_catalog.track_click'
+
+
+class ReportLeadsSource(str, Enum):
+    report_lead = 'report_lead'
+    track_postback = 'track_postback'
@@ -1,37 +1,62 @@
-from datetime import datetime, time
+import json
+from datetime import datetime, time, timedelta
 from typing import Annotated
 
 from peewee import JOIN, Case, MySQLDatabase, fn
 from pymysql.converters import escape_string
 from wireup import Inject, injectable
 
-from src.core.entities import Campaign
+from src.core.db import ReadReplica
 from src.core.enums import LeadStatus
+from src.core.pagination import paginate
 from src.core.utils import log_execution_time
-from src.reports.entities import Expense, ReportLead
-from src.tracker.entities import TrackClick, TrackDiscard, TrackLead, TrackPostback
+from src.reports.catalog import (
+    LONG_PARAMETER_NAMES,
+    PARAMETER_CATALOG_MAX_LENGTH,
+    fold_parameters,
+    raw_value,
+    value_sort_key,
+)
+from src.reports.entities import Expense, ReportDailyStats, ReportLead, ReportWatermark
+from src.reports.enums import ReportLeadsSource, ReportWatermarkName
+from src.tracker.dimensions import DIMENSION_FIELDS
+from src.tracker.entities import TrackClick, TrackLead, TrackParameterCatalog, TrackPostback
 
 
 @injectable
 class StatisticsReportRepository:
-    def __init__(self, database: MySQLDatabase, gap_seconds: Annotated[int, Inject(config='REPORT_GAP_SECONDS')]):
-        self.database = database
+    def __init__(
+        self,
+        read_replica: ReadReplica,
+        gap_seconds: Annotated[int, Inject(config='REPORT_GAP_SECONDS')],
+        daily_stats_parameters: Annotated[list[str], Inject(config='REPORT_DAILY_STATS_PARAMETERS')],
+        leads_source: Annotated[ReportLeadsSource, Inject(config='REPORT_LEADS_SOURCE')],
+    ):
+        self.read_replica = read_replica
         self.gap_seconds = gap_seconds
+        self.daily_stats_parameters = daily_stats_parameters
+        self.leads_source = leads_source
+
+    def _read_database(self, parameters=None) -> MySQLDatabase:
+        # analytical reads go to the replica while it keeps up, writes and postback lookups stay on the primary
+        if parameters and parameters.get('read_primary'):
+            return self.read_replica.primary
+
+        return self.read_replica.database()
 
     @staticmethod
     def _period_timestamps(parameters):
+        # integer bounds keep track tables partition pruning working, the end bound is exclusive
         period_start = parameters['period_start']
         period_end = parameters.get('period_end')
-        period_start_timestamp = datetime.combine(period_start, time.min).timestamp()
+        period_start_timestamp = int(datetime.combine(period_start, time.min).timestamp())
         period_end_timestamp = None
         if period_end:
-            period_end_timestamp = datetime.combine(period_end, time.max).timestamp()
+            period_end_timestamp = int(datetime.combine(period_end + timedelta(days=1), time.min).timestamp())
 
         return period_start_timestamp, period_end_timestamp
 
-    @log_execution_time
-    def _leads_statistics(self, parameters):
-        period_start_timestamp, period_end_timestamp = self._period_timestamps(parameters)
+    def _latest_postbacks_join(self, period_start_timestamp, period_end_timestamp):
         cost_value = Case(
             None,
             [
@@ -53,34 +78,65 @@ class StatisticsReportRepository:
         ).where(TrackPostback.created_at >= period_start_timestamp - self.gap_seconds)
 
         if period_end_timestamp:
-            leads_subquery = leads_subquery.where(TrackPostback.created_at < period_end_timestamp + self.gap_seconds)
+            # postbacks of the period clicks keep landing after the period end, so their window lasts at least until now
+            postbacks_until = max(period_end_timestamp, int(datetime.now().timestamp())) + self.gap_seconds
+            leads_subquery = leads_subquery.where(TrackPostback.created_at < postbacks_until)
+
+        on = (TrackClick.click_id == leads_subquery.c.click_id) & (leads_subquery.c.row_number == 1)
+        return leads_subquery, on, leads_subquery.c.click_id, leads_subquery.c.status, leads_subquery.c.cost_value
+
+    @staticmethod
+    def _report_leads_join():
+        # report_lead keeps the latest postback of every click, a lead without postbacks has no status and is not
+        # counted, the same as a click without postbacks; payouts of a click without a lead stay null
+        is_paid = (ReportLead.status == LeadStatus.accept.value) | (ReportLead.status == LeadStatus.expect.value)
+        cost_value = Case(None, [(is_paid, ReportLead.cost_value), (ReportLead.status.is_null(False), 0)])
+        on = (TrackClick.click_id == ReportLead.click_id) & ReportLead.status.is_null(False)
+        return ReportLead, on, ReportLead.click_id, ReportLead.status, cost_value
+
+    @staticmethod
+    def _group_value(group_parameter, dimensions):
+        # materialized dimension columns are read as they are, other parameters are parsed out of every click
+        field = dimensions.get(group_parameter)
+        if field is None:
+            field = fn.json_value(TrackClick.parameters, f'$.{escape_string(group_parameter)}')
+        return field.alias(group_parameter)
+
+    @staticmethod
+    def _dimensions(parameters):
+        return dict(zip(parameters.get('dimension_parameters') or [], DIMENSION_FIELDS))
+
+    def _leads_statistics_query(self, parameters):
+        period_start_timestamp, period_end_timestamp = self._period_timestamps(parameters)
+        if self.leads_source == ReportLeadsSource.track_postback:
+            leads, on, lead_click_id, lead_status, cost_value = self._latest_postbacks_join(
+                period_start_timestamp, period_end_timestamp
+            )
+        else:
+            leads, on, lead_click_id, lead_status, cost_value = self._report_leads_join()
 
         date = fn.date(fn.from_unixtime(TrackClick.created_at)).alias('date')
-        lead_status = leads_subquery.c.status.alias('lead_status')
+        lead_status = lead_status.alias('lead_status')
 
         select = [
             fn.COUNT(TrackClick.click_id).alias('clicks_count'),
-            fn.COUNT(leads_subquery.c.click_id).alias('leads_count'),
-            fn.SUM(leads_subquery.c.cost_value).alias('payouts'),
+            fn.COUNT(lead_click_id).alias('leads_count'),
+            fn.SUM(cost_value).alias('payouts'),
             lead_status,
             date,
         ]
 
         group_by = [date, lead_status]
+        dimensions = self._dimensions(parameters)
         if 'group_parameters' in parameters:
             for group_parameter in parameters['group_parameters']:
-                path = f'$.{escape_string(group_parameter)}'
-                parameter = fn.json_value(TrackClick.parameters, path).alias(group_parameter)
+                parameter = self._group_value(group_parameter, dimensions)
                 select.append(parameter)
                 group_by.append(parameter)
 
         query = (
             TrackClick.select(*select)
-            .join(
-                leads_subquery,
-                JOIN.LEFT_OUTER,
-                on=((TrackClick.click_id == leads_subquery.c.click_id) & (leads_subquery.c.row_number == 1)),
-            )
+            .join(leads, JOIN.LEFT_OUTER, on=on)
             .where(
                 (TrackClick.campaign_id == parameters['campaign_id'])
                 & (TrackClick.created_at >= period_start_timestamp - self.gap_seconds)
@@ -91,11 +147,16 @@ class StatisticsReportRepository:
             query = query.where(TrackClick.created_at < period_end_timestamp + self.gap_seconds)
 
         if parameters.get('skip_clicks_without_parameters'):
-            query = query.where(fn.json_length(TrackClick.parameters) > 0)
+            if dimensions:
+                query = query.where(TrackClick.has_parameters == True)
+            else:
+                query = query.where(fn.json_length(TrackClick.parameters) > 0)
 
-        query = query.group_by(*group_by).order_by(date)
+        return query.group_by(*group_by).order_by(date)
 
-        cursor = self.database.execute(query)
+    @log_execution_time
+    def _leads_statistics(self, parameters):
+        cursor = self._read_database(parameters).execute(self._leads_statistics_query(parameters))
         return cursor.fetchall()
 
     def _expenses(self, parameters):
@@ -106,68 +167,280 @@ class StatisticsReportRepository:
         if parameters['period_end']:
             query = query.where(Expense.date <= parameters['period_end'])
 
-        cursor = self.database.execute(query)
+        cursor = self._read_database(parameters).execute(query)
         return cursor.fetchall()
 
-    @log_execution_time
-    def _available_parameters(self, parameters):
+    def _available_parameters_query(self, parameters):
         period_start_timestamp, period_end_timestamp = self._period_timestamps(parameters)
         query = TrackClick.select(TrackClick.parameters).where(
             (TrackClick.campaign_id == parameters['campaign_id']) & (TrackClick.created_at >= period_start_timestamp)
         )
 
         if period_end_timestamp:
-            query = query.where(TrackClick.created_at <= period_end_timestamp)
+            query = query.where(TrackClick.created_at < period_end_timestamp)
 
-        query = query.order_by(TrackClick.id.desc()).limit(1)
+        return query.order_by(TrackClick.id.desc()).limit(1)
 
-        cursor = self.database.execute(query)
+    @log_execution_time
+    def _available_parameters(self, parameters):
+        cursor = self._read_database(parameters).execute(self._available_parameters_query(parameters))
         return cursor.fetchone()
 
-    def get(self, parameters):
-        leads_statistics = self._leads_statistics(parameters)
-        available_parameters = self._available_parameters(parameters)
+    @staticmethod
+    def _watermark(name, database):
+        query = ReportWatermark.select(ReportWatermark.value).where(ReportWatermark.name == name.value)
+        return query.scalar(database) or 0
+
+    def _daily_stats_until(self, parameters):
+        # closed days are read from report_daily_stats up to the first day the rollup worker has not caught up with
+        if not set(parameters.get('group_parameters', [])) <= set(self.daily_stats_parameters):
+            return None
+
+        database = self._read_database(parameters)
+        click_watermark = self._watermark(ReportWatermarkName.daily_stats_click, database)
+        postback_watermark = self._watermark(ReportWatermarkName.daily_stats_postback, database)
+
+        pending_click_created_at = (
+            TrackClick.select(fn.MIN(TrackClick.created_at))
+            .where((TrackClick.campaign_id == parameters['campaign_id']) & (TrackClick.id > click_watermark))
+            .scalar(database)
+        )
+        pending_postback_click_created_at = (
+            TrackPostback.select(fn.MIN(TrackClick.created_at))
+            .join(TrackClick, JOIN.INNER, on=(TrackPostback.click_id == TrackClick.click_id))
+            .where((TrackClick.campaign_id == parameters['campaign_id']) & (TrackPostback.id > postback_watermark))
+            .scalar(database)
+        )
+
+        until = datetime.now().date()
+        for created_at in (pending_click_created_at, pending_postback_click_created_at):
+            if created_at is not None:
+                until = min(until, datetime.fromtimestamp(created_at).date())
+
+        return until
+
+    @log_execution_time
+    def _daily_stats(self, parameters, until):
+        select = [
+            fn.SUM(ReportDailyStats.clicks),
+            fn.SUM(ReportDailyStats.leads_accept),
+            fn.SUM(ReportDailyStats.leads_expect),
+            fn.SUM(ReportDailyStats.leads_reject),
+            fn.SUM(ReportDailyStats.leads_trash),
+            fn.SUM(ReportDailyStats.payouts_accept),
+            fn.SUM(ReportDailyStats.payouts_expect),
+            ReportDailyStats.date,
+        ]
+
+        group_by = [ReportDailyStats.date]
+        for group_parameter in parameters.get('group_parameters', []):
+            path = f'$.{escape_string(group_parameter)}'
+            parameter = fn.json_value(ReportDailyStats.parameters, path).alias(group_parameter)
+            select.append(parameter)
+            group_by.append(parameter)
+
+        query = ReportDailyStats.select(*select).where(
+            (ReportDailyStats.campaign_id == parameters['campaign_id'])
+            & (ReportDailyStats.date >= parameters['period_start'])
+            & (ReportDailyStats.date < until)
+        )
+
+        if parameters.get('period_end'):
+            query = query.where(ReportDailyStats.date <= parameters['period_end'])
+
+        if parameters.get('skip_clicks_without_parameters'):
+            query = query.where(ReportDailyStats.has_parameters)
+
+        query = query.group_by(*group_by)
+
+        # rollup rows are unfolded into the (clicks, leads, payouts, lead status, date, *parameters) rows
+        # the raw statistics query returns, one per lead status and one for clicks without leads
+        rows = []
+        cursor = self._read_database(parameters).execute(query)
+        for clicks, accept, expect, reject, trash, payouts_accept, payouts_expect, date, *values in cursor.fetchall():
+            clicks = int(clicks)
+            for status, leads_count, payouts in (
+                (LeadStatus.accept, int(accept), payouts_accept),
+                (LeadStatus.expect, int(expect), payouts_expect),
+                (LeadStatus.reject, int(reject), 0),
+                (LeadStatus.trash, int(trash), 0),
+            ):
+                if leads_count:
+                    rows.append((leads_count, leads_count, payouts, status.value, date, *values))
+                    clicks -= leads_count
+
+            if clicks:
+                rows.append((clicks, 0, None, None, date, *values))
+
+        return rows
+
+    def get_statistics(self, parameters):
+        daily_stats_until = self._daily_stats_until(parameters)
+        if daily_stats_until is None or daily_stats_until <= parameters['period_start']:
+            leads_statistics = self._leads_statistics(parameters)
+        else:
+            leads_statistics = self._daily_stats(parameters, daily_stats_until)
+            if not parameters.get('period_end') or parameters['period_end'] >= daily_stats_until:
+                # the raw query also returns clicks from the gap before its period start, these days are in the rollup
+                leads_statistics += [
+                    row
+                    for row in self._leads_statistics(parameters | {'period_start': daily_stats_until})
+                    if row[4] >= daily_stats_until
+                ]
+
         expenses = self._expenses(parameters)
-        return leads_statistics, expenses, available_parameters
+        return leads_statistics, expenses
+
+    def get_available_parameters(self, parameters):
+        return self._available_parameters(parameters)
+
+    @staticmethod
+    def _pending_catalog_entries(campaign_id, watermark, database):
+        # clicks the catalog worker has not folded yet, a few seconds of traffic once it has caught up
+        clicks = TrackClick.select(TrackClick.campaign_id, TrackClick.parameters, TrackClick.created_at).where(
+            (TrackClick.campaign_id == campaign_id) & (TrackClick.id > watermark)
+        )
+        return fold_parameters(clicks.bind(database).tuples())
+
+    @staticmethod
+    def _catalog_page(catalog, pending, prefix, limit):
+        # the catalog page is the first limit of its values in the same order, so merging it with the pending values
+        # and cutting again gives the first limit of both
+        values = set(catalog)
+        values.update(value for value in pending if not prefix or (value is not None and value.startswith(prefix)))
+        return sorted(values, key=value_sort_key)[:limit]
+
+    @staticmethod
+    def _has_raw_entry(campaign_id, parameter, pending, database):
+        if (campaign_id, parameter, '', True) in pending:
+            return True
+
+        query = TrackParameterCatalog.select().where(
+            (TrackParameterCatalog.campaign_id == campaign_id)
+            & (TrackParameterCatalog.parameter == parameter)
+            & (TrackParameterCatalog.is_raw == True)
+        )
+        return query.bind(database).exists()
+
+    @staticmethod
+    def _raw_parameters(campaign_id, database):
+        # names the catalog can not hold are read from the keys of every click, as they were before the catalog
+        keys = fn.json_keys(TrackClick.parameters).coerce(False)
+        query = TrackClick.select(keys).distinct().where((TrackClick.campaign_id == campaign_id) & keys.is_null(False))
+        parameters = set()
+        for (names,) in query.bind(database).tuples():
+            parameters.update(p for p in json.loads(names) if not p or len(p) > PARAMETER_CATALOG_MAX_LENGTH)
+        return parameters
+
+    @staticmethod
+    def _raw_values(campaign_id, parameter, database):
+        # values the catalog can not hold are read from every click of the campaign, as they were before the catalog
+        value = fn.json_extract(TrackClick.parameters, f'$.{escape_string(parameter)}').coerce(False)
+        query = (
+            TrackClick.select(value).distinct().where((TrackClick.campaign_id == campaign_id) & value.is_null(False))
+        )
+        if len(parameter) <= PARAMETER_CATALOG_MAX_LENGTH:
+            query = query.where(
+                fn.json_type(value).in_(['NULL', 'OBJECT', 'ARRAY'])
+                | (fn.char_length(fn.json_unquote(value)) > PARAMETER_CATALOG_MAX_LENGTH)
+            )
+        return {raw_value(json_text) for (json_text,) in query.bind(database).tuples()}
+
+    @log_execution_time
+    def get_catalog_parameters(self, campaign_id, prefix=None, limit=None):
+        database = self._read_database()
+        watermark = self._watermark(ReportWatermarkName.parameter_catalog_click, database)
+        query = (
+            TrackParameterCatalog.select(TrackParameterCatalog.parameter)
+            .distinct()
+            .where(
+                (TrackParameterCatalog.campaign_id == campaign_id)
+                & ((TrackParameterCatalog.parameter != LONG_PARAMETER_NAMES) | (TrackParameterCatalog.is_raw == False))
+            )
+            .order_by(TrackParameterCatalog.parameter)
+        )
+        if prefix:
+            query = query.where(TrackParameterCatalog.parameter.startswith(prefix))
+        if limit:
+            query = query.limit(limit)
+
+        entries = self._pending_catalog_entries(campaign_id, watermark, database)
+        pending = {parameter for _, parameter, _, is_raw in entries if parameter != LONG_PARAMETER_NAMES or not is_raw}
+        parameters = self._catalog_page(
+            [parameter for (parameter,) in query.bind(database).tuples()], pending, prefix, limit
+        )
+        if self._has_raw_entry(campaign_id, LONG_PARAMETER_NAMES, entries, database):
+            parameters = self._catalog_page(parameters, self._raw_parameters(campaign_id, database), prefix, limit)
+        return parameters
+
+    @log_execution_time
+    def get_catalog_values(self, campaign_id, parameter, prefix=None, limit=None):
+        database = self._read_database()
+        watermark = self._watermark(ReportWatermarkName.parameter_catalog_click, database)
+        query = (
+            TrackParameterCatalog.select(TrackParameterCatalog.value)
+            .where(
+                (TrackParameterCatalog.campaign_id == campaign_id)
+                & (TrackParameterCatalog.parameter == parameter)
+                & (TrackParameterCatalog.is_raw == False)
+            )
+            .order_by(TrackParameterCatalog.value)
+        )
+        if prefix:
+            query = query.where(TrackParameterCatalog.value.startswith(prefix))
+        if limit:
+            query = query.limit(limit)
+
+        entries = self._pending_catalog_entries(campaign_id, watermark, database)
+        pending = {
+            value for _, pending_parameter, value, is_raw in entries if pending_parameter == parameter and not is_raw
+        }
+        values = self._catalog_page([value for (value,) in query.bind(database).tuples()], pending, prefix, limit)
+        if len(parameter) > PARAMETER_CATALOG_MAX_LENGTH or self._has_raw_entry(
+            campaign_id, parameter, entries, database
+        ):
+            values = self._catalog_page(values, self._raw_values(campaign_id, parameter, database), prefix, limit)
+        return values
 
     def get_distribution_values(self, parameters):
-        group_values = [fn.json_value(TrackClick.parameters, f'$.{p}').alias(p) for p in parameters['group_parameters']]
+        dimensions = self._dimensions(parameters)
+        group_values = [self._group_value(p, dimensions) for p in parameters['group_parameters']]
         query = (
             TrackClick.select(*group_values)
             .where(TrackClick.campaign_id == parameters['campaign_id'])
             .group_by(*group_values)
         )
-        cursor = self.database.execute(query)
+        cursor = self._read_database(parameters).execute(query)
         return cursor.fetchall()
 
     @log_execution_time
-    def get_leads(self, page, page_size, sort_by, desc, campaign_id):
+    def get_leads(self, page, page_size, sort_by, sort_order, campaign_id, cursor=None):
         if sort_by == 'created_at':
-            order_by = ReportLead.click_created_at
+            sort_field = ReportLead.click_created_at
         else:
-            order_by = getattr(ReportLead, sort_by)
-
-        if desc:
-            order_by = order_by.desc()
-
-        query = (
-            ReportLead.select(
-                ReportLead.click_id,
-                ReportLead.click_created_at,
-                ReportLead.status,
-                ReportLead.cost_value,
-                ReportLead.currency,
+            sort_field = getattr(ReportLead, sort_by)
+
+        # the (campaign_id, click_created_at) index ends with the primary key, so a cursor seeks on it for either order
+        database = self._read_database()
+        query = ReportLead.select(
+            ReportLead.id,
+            ReportLead.click_id,
+            ReportLead.click_created_at,
+            ReportLead.status,
+            ReportLead.cost_value,
+            ReportLead.currency,
+        ).where(ReportLead.campaign_id == campaign_id)
+        leads, next_cursor = paginate(query.bind(database), sort_field, sort_order, page, page_size, cursor)
+
+        total = None
+        if cursor is None:
+            total = (
+                ReportLead.select(fn.COUNT(ReportLead.id)).where(ReportLead.campaign_id == campaign_id).scalar(database)
             )
-            .where(ReportLead.campaign_id == campaign_id)
-            .order_by(order_by)
-            .limit(page_size)
-            .offset((page - 1) * page_size)
-        )
-
-        total = ReportLead.select(fn.COUNT(ReportLead.id)).where(ReportLead.campaign_id == campaign_id).scalar()
-        return list(query), total
+        return leads, total, next_cursor
 
     def get_lead(self, click_id):
+        # postbacks are looked up right after they are tracked, so they are read from the primary
         click = TrackClick.get_or_none(TrackClick.click_id == click_id)
         if click is None:
             return None, [], []
@@ -179,31 +452,3 @@ class StatisticsReportRepository:
         )
 
         return click, list(leads_query), list(postbacks_query)
-
-    def campaign_window_totals(self, *, start_5m: int, start_1h: int, start_1d: int):
-        query = (
-            TrackClick.select(
-                TrackClick.campaign_id.alias('campaign_id'),
-                Campaign.name.alias('campaign_name'),
-                fn.SUM(TrackClick.created_at >= start_5m).alias('total_5m'),
-                fn.SUM(TrackClick.created_at >= start_1h).alias('total_1h'),
-                fn.SUM(TrackClick.created_at >= start_1d).alias('total_1d'),
-            )
-            .join(Campaign, JOIN.INNER, on=(TrackClick.campaign_id == Campaign.id))
-            .where(TrackClick.created_at >= start_1d)
-            .group_by(TrackClick.campaign_id, Campaign.name)
-        )
-        return list(query.dicts())
-
-    def campaign_window_discard_totals(self, *, start_5m: int, start_1h: int, start_1d: int):
-        query = (
-            TrackDiscard.select(
-                TrackDiscard.campaign_id.alias('campaign_id'),
-                fn.SUM(TrackDiscard.created_at >= start_5m).alias('discard_5m'),
-                fn.SUM(TrackDiscard.created_at >= start_1h).alias('discard_1h'),
-                fn.SUM(TrackDiscard.created_at >= start_1d).alias('discard_1d'),
-            )
-            .where(TrackDiscard.created_at >= start_1d)
-            .group_by(TrackDiscard.campaign_id)
-        )
-        return list(query.dicts())
@@ -5,6 +5,7 @@ from src.auth import auth
 from src.container import container
 from src.core.blueprint import Blueprint
 from src.core.services import CampaignService
+from src.reports.cache import StatisticsReportCache
 from src.reports.schemas import (
     ExpensesDistributionParametersRequestSchema,
     ExpensesDistributionParametersResponseSchema,
@@ -16,6 +17,8 @@ from src.reports.schemas import (
     LeadReportListResponse,
     LeadResponseSchema,
     PostbacksReportRequestSchema,
+    ReportLeadOutboxResponse,
+    StatisticsReportCacheResponse,
     StatisticsReportRequest,
     StatisticsReportResponse,
 )
@@ -38,6 +41,7 @@ class StatisticsReport(MethodView):
                 'period_end': params.get('periodEnd'),
                 'group_parameters': params['groupParameters'],
                 'skip_clicks_without_parameters': params['skipClicksWithoutParameters'],
+                'sparse': params['sparse'],
             }
         )
         return {
@@ -50,6 +54,14 @@ class StatisticsReport(MethodView):
         }
 
 
+@blueprint.route('/statistics/cache')
+class StatisticsReportCacheStats(MethodView):
+    @blueprint.response(200, StatisticsReportCacheResponse)
+    @auth.login_required
+    def get(self):
+        return {'content': humps.camelize(container.get(StatisticsReportCache).stats())}
+
+
 @blueprint.route('/expenses')
 class ExpensesReport(MethodView):
     @blueprint.arguments(ExpensesReportRequestSchema, location='query')
@@ -57,7 +69,7 @@ class ExpensesReport(MethodView):
     @auth.login_required
     def get(self, params):
         report_service = container.get(ReportService)
-        expenses, total = report_service.list_expenses(
+        expenses, total, next_cursor = report_service.list_expenses(
             params['page'],
             params['pageSize'],
             humps.decamelize(params['sortBy'].value),
@@ -65,10 +77,11 @@ class ExpensesReport(MethodView):
             params['campaignId'],
             params.get('periodStart'),
             params.get('periodEnd'),
+            params.get('cursor'),
         )
         return {
             'content': [e.to_dict() for e in expenses],
-            'pagination': params | {'total': total},
+            'pagination': params | {'total': total, 'nextCursor': next_cursor},
             'filters': {
                 'periodStart': params.get('periodStart'),
                 'periodEnd': params.get('periodEnd'),
@@ -93,12 +106,13 @@ class PostbacksReport(MethodView):
     @auth.login_required
     def get(self, params):
         report_service = container.get(ReportService)
-        postbacks, total = report_service.list_postbacks(
+        postbacks, total, next_cursor = report_service.list_postbacks(
             params['page'],
             params['pageSize'],
             humps.decamelize(params['sortBy'].value),
             params['sortOrder'],
             params['campaignId'],
+            params.get('cursor'),
         )
         return {
             'content': [
@@ -111,11 +125,19 @@ class PostbacksReport(MethodView):
                 }
                 for p in postbacks
             ],
-            'pagination': params | {'total': total},
+            'pagination': params | {'total': total, 'nextCursor': next_cursor},
             'filters': {'campaignId': params['campaignId']},
         }
 
 
+@blueprint.route('/leads/outbox')
+class ReportLeadOutboxStats(MethodView):
+    @blueprint.response(200, ReportLeadOutboxResponse)
+    @auth.login_required
+    def get(self):
+        return {'content': humps.camelize(container.get(ReportService).get_report_lead_outbox_stats())}
+
+
 @blueprint.route('/leads/<uuid:clickId>')
 class Lead(MethodView):
     @blueprint.response(200, LeadResponseSchema)
@@ -161,7 +183,9 @@ class FilterCampaignExpensesDistributionParameters(MethodView):
     @auth.login_required
     def get(self, params):
         helpers_service = container.get(ReportHelperService)
-        parameters = helpers_service.list_expenses_distribution_parameters(params['campaignId'])
+        parameters = helpers_service.list_expenses_distribution_parameters(
+            params['campaignId'], params.get('prefix'), params.get('limit')
+        )
         return [{'parameter': p} for p in parameters]
 
 
@@ -172,5 +196,7 @@ class FilterCampaignExpensesDistributionParameterValues(MethodView):
     @auth.login_required
     def get(self, params):
         helpers_service = container.get(ReportHelperService)
-        values = helpers_service.list_expenses_distribution_parameter_values(params['campaignId'], params['parameter'])
+        values = helpers_service.list_expenses_distribution_parameter_values(
+            params['campaignId'], params['parameter'], params.get('prefix'), params.get('limit')
+        )
         return [{'value': v} for v in values]
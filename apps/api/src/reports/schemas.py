@@ -1,4 +1,4 @@
-from marshmallow import INCLUDE, fields
+from marshmallow import INCLUDE, fields, validate
 
 from src.core.schemas import ComaSeparatedStringsField, PaginationRequestSchema, PaginationResponseSchema, Schema
 from src.reports.enums import ExpenseSortBy
@@ -10,6 +10,7 @@ class StatisticsReportRequest(Schema):
     periodEnd = fields.Date(required=False)
     groupParameters = ComaSeparatedStringsField(dump_default=[], load_default=[])
     skipClicksWithoutParameters = fields.Boolean(dump_default=False, load_default=False)
+    sparse = fields.Boolean(dump_default=False, load_default=False)
 
     class Meta:
         unknown = INCLUDE
@@ -26,6 +27,29 @@ class StatisticsReportResponse(Schema):
     content = fields.Nested(StatisticsReportContent())
 
 
+class StatisticsReportCacheContent(Schema):
+    size = fields.Integer(required=True)
+    maxsize = fields.Integer(required=True)
+    hits = fields.Integer(required=True)
+    misses = fields.Integer(required=True)
+    evictions = fields.Integer(required=True)
+    hitRate = fields.Float(required=True)
+    sizeBytes = fields.Integer(required=True)
+
+
+class StatisticsReportCacheResponse(Schema):
+    content = fields.Nested(StatisticsReportCacheContent())
+
+
+class ReportLeadOutboxContent(Schema):
+    backlog = fields.Integer(required=True)
+    lagSeconds = fields.Integer(required=True)
+
+
+class ReportLeadOutboxResponse(Schema):
+    content = fields.Nested(ReportLeadOutboxContent())
+
+
 class ExpensesReportDistribution(Schema):
     date = fields.Date(required=True)
     distribution = fields.Dict()
@@ -60,6 +84,8 @@ class ExpensesReportListResponse(Schema):
 
 class ExpensesDistributionParametersRequestSchema(Schema):
     campaignId = fields.Integer(required=True)
+    prefix = fields.String(required=False)
+    limit = fields.Integer(required=False, validate=validate.Range(min=1))
 
 
 class ExpensesDistributionParametersResponseSchema(Schema):
@@ -69,10 +95,12 @@ class ExpensesDistributionParametersResponseSchema(Schema):
 class ExpensesDistributionParameterValuesRequestSchema(Schema):
     campaignId = fields.Integer(required=True)
     parameter = fields.String(required=True)
+    prefix = fields.String(required=False)
+    limit = fields.Integer(required=False, validate=validate.Range(min=1))
 
 
 class ExpensesDistributionParameterValuesResponseSchema(Schema):
-    value = fields.String(required=True)
+    value = fields.String(required=True, allow_none=True)
 
 
 class PostbacksReportFilterSchema(Schema):
@@ -6,13 +6,19 @@ from wireup import injectable
 
 from src.alerts import Alert, AlertCode, AlertSeverity, register_alert_callback
 from src.core.entities import Campaign
-from src.core.enums import LeadStatus, SortOrder
+from src.core.enums import LeadStatus
+from src.core.pagination import paginate
 from src.core.services import CampaignService
 from src.core.utils import utcnow
+from src.reports.aggregation import EMPTY_EXPENSES, StatisticsAggregation
+from src.reports.cache import StatisticsReportCache, StatisticsReportFragment
 from src.reports.entities import Expense
 from src.reports.exceptions import ClickDoesNotExistError, ExpensesDistributionParameterError
 from src.reports.repositories import StatisticsReportRepository
-from src.tracker.entities import TrackClick
+from src.reports.workers import report_lead_outbox_stats
+from src.tracker.counters import TrackCounters
+from src.tracker.dimensions import materialized_dimension_parameters
+from src.tracker.enums import TrackEventType
 from src.tracker.services import TrackService
 
 DISCARD_WINDOW_SECONDS = {
@@ -30,173 +36,65 @@ class ReportService:
         campaign_service: CampaignService,
         track_service: TrackService,
         statistics_report_repository: StatisticsReportRepository,
+        statistics_report_cache: StatisticsReportCache,
     ):
         self.campaign_service = campaign_service
         self.track_service = track_service
         self.statistics_report_repository = statistics_report_repository
+        self.statistics_report_cache = statistics_report_cache
 
-    def _calculate_sum_of_clicks(self, stats):
-        print(stats)
-        return 0
-
-    def _get_payouts(self, statistics_container, group_parameters):
-        if len(group_parameters) > 0:
-            payouts_accepted_sum = 0
-            payouts_expected_sum = 0
-
-            for stats in statistics_container.values():
-                if not isinstance(stats, dict):
-                    continue
-
-                payouts_accepted, payouts_expected = self._get_payouts(stats, group_parameters[1:])
-                payouts_accepted_sum += payouts_accepted
-                payouts_expected_sum += payouts_expected
-
-            return payouts_accepted_sum, payouts_expected_sum
-
-        payouts_accepted = sum(
-            stats['payouts']
-            for status, stats in statistics_container['statuses'].items()
-            if status == LeadStatus.accept
-        )
-        payouts_expected = sum(
-            stats['payouts']
-            for status, stats in statistics_container['statuses'].items()
-            if status in {LeadStatus.accept, LeadStatus.expect}
-        )
-
-        return payouts_accepted, payouts_expected
-
-    def _fill_clicks(self, statistics_container, group_values, clicks_count, leads_count, payouts, lead_status):
-        if len(group_values) == 0:
-            statistics_container['clicks'] += clicks_count
-            if lead_status:
-                statistics_container['statuses'][lead_status]['leads'] = leads_count
-                statistics_container['statuses'][lead_status]['payouts'] = payouts or 0
-
-            return
-
-        group_value = group_values[0]
-        self._fill_clicks(
-            statistics_container[group_value], group_values[1:], clicks_count, leads_count, payouts, lead_status
-        )
-
-    def _fill_clicks_empty(self, statistics_container, grouped_values, set_expenses):
-        if len(grouped_values) == 0:
-            statistics_container['statuses'] = {status.value: {'leads': 0, 'payouts': 0} for status in LeadStatus}
-
-            statistics_container['clicks'] = 0
+    @staticmethod
+    def _attach_expenses(container, expenses, payouts_accepted, payouts_expected):
+        container['expenses'] = expenses.quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
+        if expenses <= 0:
             return
 
-        grouped_value = grouped_values[0]
-        statistics_container.setdefault(grouped_value, {})
-
-        if set_expenses:
-            statistics_container[grouped_value]['expenses'] = 0
-            statistics_container[grouped_value]['roi_accepted'] = 0
-            statistics_container[grouped_value]['roi_expected'] = 0
-            statistics_container[grouped_value]['profit_accepted'] = 0
-            statistics_container[grouped_value]['profit_expected'] = 0
-
-            set_expenses = False
-
-        self._fill_clicks_empty(statistics_container[grouped_value], grouped_values[1:], set_expenses)
-
-    def _build_empty_statistics_report(self, parameters, match_expenses_distribution):
-        grouped_rows = [()]
-        if parameters['group_parameters']:
-            grouped_rows = self.statistics_report_repository.get_distribution_values(parameters)
-
-        report = {}
-
-        period_start_date = parameters['period_start']
-        period_end_date = utcnow().date()
-        if parameters['period_end']:
-            period_end_date = parameters['period_end']
-
-        days_delta = period_end_date - period_start_date
-        for day in range(days_delta.days + 1):
-            date = period_start_date + timedelta(days=day)
-
-            report[date] = {}
-
-            if not match_expenses_distribution:
-                report[date]['expenses'] = 0
-                report[date]['roi_accepted'] = 0
-                report[date]['roi_expected'] = 0
-                report[date]['profit_accepted'] = 0
-                report[date]['profit_expected'] = 0
-
-            for grouped_values in grouped_rows:
-                self._fill_clicks_empty(report[date], grouped_values, match_expenses_distribution)
+        profit_accepted = payouts_accepted - expenses
+        profit_expected = payouts_expected - expenses
+        roi_accepted = profit_accepted / expenses * 100
+        roi_expected = profit_expected / expenses * 100
 
-        return report
+        container['profit_accepted'] = profit_accepted.quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
+        container['profit_expected'] = profit_expected.quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
+        container['roi_accepted'] = roi_accepted.quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
+        container['roi_expected'] = roi_expected.quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
 
     def _build_statistics_report(self, report_rows, expenses_rows, parameters, match_expenses_distribution):
-        report = self._build_empty_statistics_report(parameters, match_expenses_distribution)
-
-        for clicks_count, leads_count, payouts, lead_status, date, *parameters_values in report_rows:
-            if date not in report:
-                continue
+        period_end = parameters['period_end'] or utcnow().date()
+        aggregation = StatisticsAggregation(parameters['period_start'], period_end)
+
+        sparse = parameters.get('sparse', False)
+        if not sparse:
+            # a dense report has a zero-filled node for every known combination of group values on every day
+            grouped_rows = [()]
+            if parameters['group_parameters']:
+                grouped_rows = self.statistics_report_repository.get_distribution_values(parameters)
+            for grouped_values in grouped_rows:
+                aggregation.cell(tuple(grouped_values))
 
-            self._fill_clicks(report[date], parameters_values, clicks_count, leads_count, payouts, lead_status)
+        aggregation.add_rows(report_rows)
+        report = aggregation.report(match_expenses_distribution, sparse)
+        payouts = aggregation.payouts_by_day(0 if match_expenses_distribution else None)
 
         date2distribution = {date: json.loads(distribution) for date, distribution in expenses_rows}
+        for day, (date, day_report) in enumerate(report.items()):
+            distribution = date2distribution.get(date)
+            if not distribution:
+                continue
 
-        for date in report:
             # extend records with expenses
             if match_expenses_distribution:
-                distribution = date2distribution.get(date)
-                if distribution:
-                    for distribution_value, expenses in distribution.items():
-                        payouts_accepted, payouts_expected = self._get_payouts(
-                            report[date][distribution_value], parameters['group_parameters'][1:]
-                        )
-
-                        expenses = Decimal.from_float(expenses)
-                        report[date][distribution_value]['expenses'] = expenses.quantize(
-                            Decimal('0.01'), rounding=ROUND_FLOOR
-                        )
-
-                        if expenses > 0:
-                            profit_accepted = payouts_accepted - expenses
-                            profit_expected = payouts_expected - expenses
-                            roi_accepted = profit_accepted / expenses * 100
-                            roi_expected = profit_expected / expenses * 100
-
-                            report[date][distribution_value]['profit_accepted'] = profit_accepted.quantize(
-                                Decimal('0.01'), rounding=ROUND_FLOOR
-                            )
-                            report[date][distribution_value]['profit_expected'] = profit_expected.quantize(
-                                Decimal('0.01'), rounding=ROUND_FLOOR
-                            )
-                            report[date][distribution_value]['roi_accepted'] = roi_accepted.quantize(
-                                Decimal('0.01'), rounding=ROUND_FLOOR
-                            )
-                            report[date][distribution_value]['roi_expected'] = roi_expected.quantize(
-                                Decimal('0.01'), rounding=ROUND_FLOOR
-                            )
+                for distribution_value, expenses in distribution.items():
+                    container = day_report.get(distribution_value)
+                    if container is None:
+                        container = day_report[distribution_value] = dict(EMPTY_EXPENSES)
+                    payouts_accepted, payouts_expected = payouts.get((day, distribution_value), (0, 0))
+                    self._attach_expenses(container, Decimal.from_float(expenses), payouts_accepted, payouts_expected)
             else:
-                distribution = date2distribution.get(date)
-                if distribution:
-                    payouts_accepted, payouts_expected = self._get_payouts(report[date], parameters['group_parameters'])
-                    expenses = Decimal.from_float(sum(distribution.values()))
-
-                    report[date]['expenses'] = expenses.quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
-                    if expenses > 0:
-                        profit_accepted = payouts_accepted - expenses
-                        profit_expected = payouts_expected - expenses
-                        roi_accepted = profit_accepted / expenses * 100
-                        roi_expected = profit_expected / expenses * 100
-
-                        report[date]['profit_accepted'] = profit_accepted.quantize(
-                            Decimal('0.01'), rounding=ROUND_FLOOR
-                        )
-                        report[date]['profit_expected'] = profit_expected.quantize(
-                            Decimal('0.01'), rounding=ROUND_FLOOR
-                        )
-                        report[date]['roi_accepted'] = roi_accepted.quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
-                        report[date]['roi_expected'] = roi_expected.quantize(Decimal('0.01'), rounding=ROUND_FLOOR)
+                payouts_accepted, payouts_expected = payouts.get((day, None), (0, 0))
+                self._attach_expenses(
+                    day_report, Decimal.from_float(sum(distribution.values())), payouts_accepted, payouts_expected
+                )
 
         return report
 
@@ -253,6 +151,58 @@ class ReportService:
 
         return total
 
+    def _statistics_fragments(self, parameters, start, end):
+        report_rows, expenses_rows = self.statistics_report_repository.get_statistics(
+            parameters | {'period_start': start, 'period_end': end}
+        )
+
+        # the raw statistics also return clicks from the gap around the period, they belong to other fragments
+        fragments = {start + timedelta(days=day): StatisticsReportFragment() for day in range((end - start).days + 1)}
+        for row in report_rows:
+            if row[4] in fragments:
+                fragments[row[4]].report_rows.append(row)
+        for row in expenses_rows:
+            if row[0] in fragments:
+                fragments[row[0]].expenses_rows.append(row)
+
+        return fragments
+
+    def _statistics_rows(self, parameters):
+        now = utcnow()
+        period_start = parameters['period_start']
+        period_end = parameters['period_end'] or now.date()
+        # clicks of a day get their postbacks within the gap after it, later only new postbacks and expenses change
+        # the day, and both invalidate the cached fragments of the campaign
+        gap = timedelta(seconds=self.statistics_report_repository.gap_seconds)
+        closed_before = min(period_end + timedelta(days=1), (now - gap).date())
+
+        cache_key = self.statistics_report_cache.key(
+            parameters['campaign_id'], parameters['group_parameters'], parameters.get('skip_clicks_without_parameters')
+        )
+
+        fragments = {}
+        missing_days = []
+        day = period_start
+        while day < closed_before:
+            fragment = self.statistics_report_cache.get(cache_key, day)
+            if fragment is None:
+                missing_days.append(day)
+            else:
+                fragments[day] = fragment
+            day += timedelta(days=1)
+
+        if missing_days:
+            for day, fragment in self._statistics_fragments(parameters, missing_days[0], missing_days[-1]).items():
+                fragments[day] = fragment
+                self.statistics_report_cache.set(cache_key, day, fragment)
+
+        if closed_before <= period_end:
+            fragments.update(self._statistics_fragments(parameters, max(period_start, closed_before), period_end))
+
+        report_rows = [row for fragment in fragments.values() for row in fragment.report_rows]
+        expenses_rows = [row for fragment in fragments.values() for row in fragment.expenses_rows]
+        return report_rows, expenses_rows
+
     def statistics_report(self, parameters):
         campaign = self.campaign_service.get(parameters['campaign_id'])
 
@@ -261,6 +211,11 @@ class ReportService:
         if campaign.expenses_distribution_parameter in parameters['group_parameters']:
             group_parameters.insert(0, campaign.expenses_distribution_parameter)
         parameters['group_parameters'] = group_parameters
+        parameters['dimension_parameters'] = materialized_dimension_parameters(campaign)
+        # a replica may not have the writes which invalidated the campaign fragments yet, caching what it returns
+        # would undo the invalidation until the fragments expire
+        max_lag_seconds = self.statistics_report_repository.read_replica.max_lag_seconds
+        parameters['read_primary'] = self.statistics_report_cache.is_invalidated_within(campaign.id, max_lag_seconds)
 
         match_expenses_distribution = False
         if (
@@ -269,7 +224,8 @@ class ReportService:
         ):
             match_expenses_distribution = True
 
-        report_rows, expenses_rows, available_parameters_row = self.statistics_report_repository.get(parameters)
+        report_rows, expenses_rows = self._statistics_rows(parameters)
+        available_parameters_row = self.statistics_report_repository.get_available_parameters(parameters)
         report = self._build_statistics_report(report_rows, expenses_rows, parameters, match_expenses_distribution)
         total = self._build_total(report_rows, expenses_rows, parameters['period_start'], parameters['period_end'])
 
@@ -298,11 +254,11 @@ class ReportService:
                 update={Expense.distribution: date_distribution['distribution']},
             ).execute()
 
-    def list_expenses(self, page, page_size, sort_by, sort_order, campaign_id, period_start=None, period_end=None):
-        order_by = getattr(Expense, sort_by)
-        if sort_order == SortOrder.desc:
-            order_by = order_by.desc()
+        self.statistics_report_cache.invalidate(campaign.id)
 
+    def list_expenses(
+        self, page, page_size, sort_by, sort_order, campaign_id, period_start=None, period_end=None, cursor=None
+    ):
         query = Expense.select(Expense, Campaign).join(Campaign).where(Expense.campaign == campaign_id)
 
         if period_start is not None:
@@ -311,35 +267,30 @@ class ReportService:
         if period_end is not None:
             query = query.where(Expense.date <= period_end)
 
-        total = query.count()
+        total = query.count() if cursor is None else None
 
-        query = query.order_by(order_by).limit(page_size).offset((page - 1) * page_size)
-        expenses = [e for e in query]
-        if expenses:
-            return expenses, total
+        expenses, next_cursor = paginate(query, getattr(Expense, sort_by), sort_order, page, page_size, cursor)
+        if expenses or cursor is not None:
+            return expenses, total, next_cursor
 
         # cover case for no reports
         campaign = self.campaign_service.get(campaign_id)
 
         dates = self.track_service.get_click_dates(
             campaign.id,
-            datetime.combine(period_start, time.min).timestamp(),
-            datetime.combine(period_end, time.max).timestamp(),
+            int(datetime.combine(period_start, time.min).timestamp()),
+            int(datetime.combine(period_end, time.max).timestamp()),
         )
         if len(dates) == 0:
             dates = [datetime.today()]
 
         expenses = [Expense(campaign=campaign, date=d, distribution={}) for d in dates]
 
-        return expenses, 0
+        return expenses, 0, None
 
-    def list_postbacks(self, page, page_size, sort_by, sort_order, campaign_id):
+    def list_postbacks(self, page, page_size, sort_by, sort_order, campaign_id, cursor=None):
         self.campaign_service.get(campaign_id)
-        postbacks, total = self.statistics_report_repository.get_leads(
-            page, page_size, sort_by, sort_order == SortOrder.desc, campaign_id
-        )
-
-        return postbacks, total
+        return self.statistics_report_repository.get_leads(page, page_size, sort_by, sort_order, campaign_id, cursor)
 
     def get_lead(self, click_id):
         click, leads, postbacks = self.statistics_report_repository.get_lead(click_id)
@@ -348,9 +299,17 @@ class ReportService:
 
         return click, leads, postbacks
 
+    @staticmethod
+    def get_report_lead_outbox_stats():
+        # the outbox is shared by every process, so its backlog is read from the table instead of a worker state
+        return report_lead_outbox_stats()
+
 
 @injectable
 class ReportHelperService:
+    def __init__(self, statistics_report_repository: StatisticsReportRepository):
+        self.statistics_report_repository = statistics_report_repository
+
     @staticmethod
     def build_discard_metric(discard_count: int, total_count: int) -> dict:
         rate = round(discard_count / total_count, 4) if total_count else 0.0
@@ -379,67 +338,35 @@ class ReportHelperService:
         )
         return f'Campaign "{campaign_name}" has discards. {metrics_text}. Review flow routing.'
 
-    def list_expenses_distribution_parameters(self, campaign_id):
-        parameters = set()
-        query = TrackClick.select(TrackClick.parameters).where(TrackClick.campaign_id == campaign_id)
-        for click in query:
-            if click.parameters:
-                parameters.update(click.parameters.keys())
+    def list_expenses_distribution_parameters(self, campaign_id, prefix=None, limit=None):
+        return self.statistics_report_repository.get_catalog_parameters(campaign_id, prefix, limit)
 
-        return sorted(parameters)
-
-    def list_expenses_distribution_parameter_values(self, campaign_id, parameter):
-        values = set()
-        query = TrackClick.select(TrackClick.parameters).where(TrackClick.campaign_id == campaign_id)
-        for click in query:
-            if not click.parameters or parameter not in click.parameters:
-                continue
-            value = click.parameters.get(parameter)
-            values.add(value)
-
-        return sorted(values)
+    def list_expenses_distribution_parameter_values(self, campaign_id, parameter, prefix=None, limit=None):
+        return self.statistics_report_repository.get_catalog_values(campaign_id, parameter, prefix, limit)
 
 
 @register_alert_callback
 def collect_discard_alerts(container):
-    statistics_report_repository = container.get(StatisticsReportRepository)
+    track_counters = container.get(TrackCounters)
 
-    now_timestamp = int(utcnow().timestamp())
-    window_starts = {window: now_timestamp - seconds for window, seconds in DISCARD_WINDOW_SECONDS.items()}
-
-    totals_by_campaign = {
-        row['campaign_id']: row
-        for row in statistics_report_repository.campaign_window_totals(
-            start_5m=window_starts['5m'],
-            start_1h=window_starts['1h'],
-            start_1d=window_starts['1d'],
-        )
-    }
-    discard_by_campaign = {
-        row['campaign_id']: row
-        for row in statistics_report_repository.campaign_window_discard_totals(
-            start_5m=window_starts['5m'],
-            start_1h=window_starts['1h'],
-            start_1d=window_starts['1d'],
-        )
-    }
+    now_timestamp = int(datetime.now().timestamp())
+    totals_by_campaign = track_counters.window_totals(TrackEventType.click, DISCARD_WINDOW_SECONDS, now_timestamp)
+    discard_by_campaign = track_counters.window_totals(TrackEventType.discard, DISCARD_WINDOW_SECONDS, now_timestamp)
+    campaign_names = {}
+    if totals_by_campaign:
+        query = Campaign.select(Campaign.id, Campaign.name).where(Campaign.id.in_(list(totals_by_campaign)))
+        campaign_names = dict(query.tuples())
 
     alerts = []
-    for campaign_id, total_row in totals_by_campaign.items():
-        discard_row = discard_by_campaign.get(campaign_id, {})
+    for campaign_id, totals in sorted(totals_by_campaign.items()):
+        campaign_name = campaign_names.get(campaign_id)
+        if campaign_name is None:
+            continue
+
+        discards = discard_by_campaign.get(campaign_id, {})
         metrics = {
-            '5m': ReportHelperService.build_discard_metric(
-                int(discard_row.get('discard_5m') or 0),
-                int(total_row.get('total_5m') or 0),
-            ),
-            '1h': ReportHelperService.build_discard_metric(
-                int(discard_row.get('discard_1h') or 0),
-                int(total_row.get('total_1h') or 0),
-            ),
-            '1d': ReportHelperService.build_discard_metric(
-                int(discard_row.get('discard_1d') or 0),
-                int(total_row.get('total_1d') or 0),
-            ),
+            window: ReportHelperService.build_discard_metric(discards.get(window, 0), totals[window])
+            for window in DISCARD_WINDOW_SECONDS
         }
 
         severity = ReportHelperService.get_discard_severity(metrics['1h'])
@@ -449,11 +376,11 @@ def collect_discard_alerts(container):
         alerts.append(
             Alert(
                 code=AlertCode.CORE_CAMPAIGN_DISCARD,
-                message=ReportHelperService.format_discard_message(total_row['campaign_name'], metrics),
+                message=ReportHelperService.format_discard_message(campaign_name, metrics),
                 severity=severity,
                 payload={
                     'campaignId': campaign_id,
-                    'campaignName': total_row['campaign_name'],
+                    'campaignName': campaign_name,
                     'severityWindow': '1h',
                     'metrics': metrics,
                 },
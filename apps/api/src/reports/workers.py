@@ -1,76 +1,107 @@
 import logging
-from queue import Empty
+from datetime import date, datetime, time, timedelta
 from time import monotonic
 
-from peewee import JOIN
+from peewee import JOIN, Case, Value, fn
+from pymysql.converters import escape_string
 
+from src.core.enums import LeadStatus, WorkerPlacement
+from src.core.models import WorkerSchedule
 from src.core.supervisor import WorkerContext, register_worker
-from src.reports.entities import ReportLead
-from src.tracker.entities import TrackClick, TrackPostback
+from src.reports.cache import StatisticsReportCache
+from src.reports.catalog import fold_parameters
+from src.reports.entities import ReportDailyStats, ReportLead, ReportLeadOutbox, ReportWatermark
+from src.reports.enums import ReportWatermarkName
+from src.tracker.entities import TrackClick, TrackParameterCatalog, TrackPostback
 from src.tracker.enums import TrackSource
 
 logger = logging.getLogger(__name__)
 
-LAST_EXECUTED_AT_STATE_KEY = 'last_executed_at'
-MIN_QUEUE_SIZE = 100
+LAST_OUTBOX_STATE_KEY = 'last_outbox'
+REPORT_LEAD_OUTBOX_CHUNK_SIZE = 1000
 AGGREGATION_PERIOD_SECONDS = 10
+AGGREGATION_JITTER_RATIO = 0.1
+DAILY_STATS_PERIOD_SECONDS = 60
+DAILY_STATS_TIMEOUT_SECONDS = 5 * 60
+DAILY_STATS_BATCH_SIZE = 50000
+PARAMETER_CATALOG_PERIOD_SECONDS = 10
+PARAMETER_CATALOG_TIMEOUT_SECONDS = 60
+PARAMETER_CATALOG_BATCH_SIZE = 50000
+PARAMETER_CATALOG_INSERT_SIZE = 1000
 
 
-@register_worker
+# every process polls the shared outbox, jitter keeps them from polling in lockstep
+@register_worker(
+    schedule=WorkerSchedule(period_seconds=lambda: AGGREGATION_PERIOD_SECONDS, jitter_ratio=AGGREGATION_JITTER_RATIO)
+)
 def refresh_report_leads_worker(context: WorkerContext) -> None:
-    queue = context.get_queue(refresh_report_leads_worker)
     state = context.get_state(refresh_report_leads_worker)
-    if queue.qsize() == 0:
-        return
 
-    now = monotonic()
-    last_executed_at = state.get(LAST_EXECUTED_AT_STATE_KEY)
-    if queue.qsize() < MIN_QUEUE_SIZE and last_executed_at and now - last_executed_at < AGGREGATION_PERIOD_SECONDS:
-        return
+    # a failed chunk stays in the outbox and is retried after the period
+    started_at = monotonic()
+    claimed = _refresh_report_leads_chunk(context)
+    state[LAST_OUTBOX_STATE_KEY] = report_lead_outbox_stats() | {
+        'claimed': claimed,
+        'duration_ms': int((monotonic() - started_at) * 1000),
+    }
+    if claimed == REPORT_LEAD_OUTBOX_CHUNK_SIZE:
+        # a full chunk means a backlog, the next chunk is claimed right away
+        context.wake(refresh_report_leads_worker)
 
-    lead_click_ids = set()
-    postback_click_ids = set()
-    while True:
-        try:
-            payload = queue.get_nowait()
-        except Empty:
-            break
-
-        click_id = payload.get('click_id')
-        source = payload.get('source')
-        if click_id is None or source not in {TrackSource.lead.value, TrackSource.postback.value}:
-            logger.warning('Tracked bad report lead payload', extra={'payload': payload})
-            continue
 
-        if source == TrackSource.lead.value:
-            lead_click_ids.add(click_id)
-        elif source == TrackSource.postback.value:
-            postback_click_ids.add(click_id)
+def _refresh_report_leads_chunk(context: WorkerContext) -> int:
+    # claimed rows stay locked until the upserts commit, other processes skip them and a crash hands them back
+    with ReportLeadOutbox._meta.database.atomic():
+        outbox = list(
+            ReportLeadOutbox.select(ReportLeadOutbox.id, ReportLeadOutbox.click_id, ReportLeadOutbox.source)
+            .order_by(ReportLeadOutbox.id)
+            .limit(REPORT_LEAD_OUTBOX_CHUNK_SIZE)
+            .for_update(skip_locked=True)
+            .tuples()
+        )
+        if not outbox:
+            return 0
 
-    logger.info(
-        'Refreshing report_lead table',
-        extra={'lead_click_ids': list(lead_click_ids), 'postback_click_ids': list(postback_click_ids)},
-    )
+        lead_click_ids = set()
+        postback_click_ids = set()
+        for _, click_id, source in outbox:
+            if source == TrackSource.lead.value:
+                lead_click_ids.add(click_id)
+            elif source == TrackSource.postback.value:
+                postback_click_ids.add(click_id)
+            else:
+                logger.warning('Tracked bad report lead outbox row', extra={'click_id': click_id, 'source': source})
 
-    try:
-        _upsert_report_leads_for_leads(lead_click_ids)
-    except Exception:
-        logger.exception('Failed to report_lead table from lead events', extra={'click_ids': list(lead_click_ids)})
-
-    try:
-        _upsert_report_leads_for_postbacks(postback_click_ids)
-    except Exception:
-        logger.exception(
-            'Failed to report_lead table from postback events',
-            extra={'click_ids': list(postback_click_ids)},
+        logger.info(
+            'Refreshing report_lead table',
+            extra={'lead_click_ids': list(lead_click_ids), 'postback_click_ids': list(postback_click_ids)},
         )
 
+        # both upserts are idempotent, a chunk processed twice leaves report_lead as it is
+        _upsert_report_leads_for_leads(lead_click_ids)
+        campaign_ids = _upsert_report_leads_for_postbacks(postback_click_ids)
+        ReportLeadOutbox.delete().where(ReportLeadOutbox.id.in_([row_id for row_id, _, _ in outbox])).execute()
+
+    if campaign_ids:
+        _invalidate_statistics_report_cache(context, campaign_ids)
+
     logger.info(
         'Refreshing report_lead table is completed',
         extra={'lead_click_ids': list(lead_click_ids), 'postback_click_ids': list(postback_click_ids)},
     )
+    return len(outbox)
 
-    state[LAST_EXECUTED_AT_STATE_KEY] = now
+
+def report_lead_outbox_stats() -> dict:
+    backlog, lag_seconds = (
+        ReportLeadOutbox.select(
+            fn.COUNT(ReportLeadOutbox.id),
+            fn.COALESCE(fn.UNIX_TIMESTAMP() - fn.MIN(ReportLeadOutbox.created_at), 0),
+        )
+        .tuples()
+        .get()
+    )
+    return {'backlog': backlog, 'lag_seconds': max(int(lag_seconds), 0)}
 
 
 def _upsert_report_leads_for_leads(click_ids: set) -> None:
@@ -94,9 +125,9 @@ def _upsert_report_leads_for_leads(click_ids: set) -> None:
     insert_query.on_conflict_ignore().execute()
 
 
-def _upsert_report_leads_for_postbacks(click_ids: set) -> None:
+def _upsert_report_leads_for_postbacks(click_ids: set) -> set:
     if not click_ids:
-        return
+        return set()
 
     query = (
         TrackClick.select(
@@ -132,7 +163,7 @@ def _upsert_report_leads_for_postbacks(click_ids: set) -> None:
         )
 
     if not rows:
-        return
+        return set()
 
     ReportLead.insert_many(rows).on_conflict(
         preserve=(
@@ -143,3 +174,237 @@ def _upsert_report_leads_for_postbacks(click_ids: set) -> None:
             ReportLead.currency,
         ),
     ).execute()
+    return {row['campaign_id'] for row in rows}
+
+
+def _invalidate_statistics_report_cache(context: WorkerContext, campaign_ids: set) -> None:
+    # statistics reports read lead statuses from report_lead, days cached before the refresh are stale now
+    statistics_report_cache = context.get(StatisticsReportCache)
+    for campaign_id in campaign_ids:
+        statistics_report_cache.invalidate(campaign_id)
+
+
+@register_worker(
+    placement=WorkerPlacement.leader,
+    schedule=WorkerSchedule(
+        period_seconds=lambda: DAILY_STATS_PERIOD_SECONDS, timeout_seconds=DAILY_STATS_TIMEOUT_SECONDS
+    ),
+)
+def refresh_report_daily_stats_worker(context: WorkerContext) -> None:
+    started_at = monotonic()
+
+    click_watermark = _get_watermark(ReportWatermarkName.daily_stats_click)
+    postback_watermark = _get_watermark(ReportWatermarkName.daily_stats_postback)
+    # a batch bounds the first run over existing tables, the rest is picked up by the next runs
+    click_until = min(TrackClick.select(fn.MAX(TrackClick.id)).scalar() or 0, click_watermark + DAILY_STATS_BATCH_SIZE)
+    postback_until = min(
+        TrackPostback.select(fn.MAX(TrackPostback.id)).scalar() or 0, postback_watermark + DAILY_STATS_BATCH_SIZE
+    )
+
+    if click_until <= click_watermark and postback_until <= postback_watermark:
+        return
+
+    days = _daily_stats_dirty_days(click_watermark, click_until, postback_watermark, postback_until)
+    for campaign_id, day in sorted(days):
+        _refresh_daily_stats(campaign_id, day, context.report_gap_seconds, context.report_daily_stats_parameters)
+
+    _set_watermark(ReportWatermarkName.daily_stats_click, click_until)
+    _set_watermark(ReportWatermarkName.daily_stats_postback, postback_until)
+
+    logger.info(
+        'report_daily_stats table is refreshed',
+        extra={
+            'click_watermark': click_until,
+            'postback_watermark': postback_until,
+            'refreshed_days': len(days),
+            'duration_ms': int((monotonic() - started_at) * 1000),
+        },
+    )
+
+
+@register_worker(
+    placement=WorkerPlacement.leader,
+    schedule=WorkerSchedule(
+        period_seconds=lambda: PARAMETER_CATALOG_PERIOD_SECONDS, timeout_seconds=PARAMETER_CATALOG_TIMEOUT_SECONDS
+    ),
+)
+def refresh_parameter_catalog_worker(context: WorkerContext) -> None:
+    started_at = monotonic()
+
+    click_watermark = _get_watermark(ReportWatermarkName.parameter_catalog_click)
+    # a batch bounds the first run over an existing track_click table, the rest is picked up by the next runs
+    click_until = min(
+        TrackClick.select(fn.MAX(TrackClick.id)).scalar() or 0, click_watermark + PARAMETER_CATALOG_BATCH_SIZE
+    )
+    if click_until <= click_watermark:
+        return
+
+    clicks = TrackClick.select(
+        TrackClick.campaign_id, TrackClick.parameters, fn.COALESCE(TrackClick.created_at, fn.UNIX_TIMESTAMP())
+    ).where((TrackClick.id > click_watermark) & (TrackClick.id <= click_until))
+    entries = fold_parameters(clicks.tuples())
+    rows = [
+        {
+            'campaign_id': campaign_id,
+            'parameter': parameter,
+            'value': value,
+            'is_raw': is_raw,
+            'count': count,
+            'first_seen_at': first_seen_at,
+            'last_seen_at': last_seen_at,
+        }
+        for (campaign_id, parameter, value, is_raw), (count, first_seen_at, last_seen_at) in entries.items()
+    ]
+    # counts are added up, so the catalog rows and the watermark move together
+    with TrackParameterCatalog._meta.database.atomic():
+        for offset in range(0, len(rows), PARAMETER_CATALOG_INSERT_SIZE):
+            TrackParameterCatalog.insert_many(rows[offset : offset + PARAMETER_CATALOG_INSERT_SIZE]).on_conflict(
+                update={
+                    TrackParameterCatalog.count: TrackParameterCatalog.count + fn.VALUES(TrackParameterCatalog.count),
+                    TrackParameterCatalog.first_seen_at: fn.LEAST(
+                        TrackParameterCatalog.first_seen_at, fn.VALUES(TrackParameterCatalog.first_seen_at)
+                    ),
+                    TrackParameterCatalog.last_seen_at: fn.GREATEST(
+                        TrackParameterCatalog.last_seen_at, fn.VALUES(TrackParameterCatalog.last_seen_at)
+                    ),
+                }
+            ).execute()
+
+        _set_watermark(ReportWatermarkName.parameter_catalog_click, click_until)
+
+    logger.info(
+        'track_parameter_catalog table is refreshed',
+        extra={
+            'click_watermark': click_until,
+            'catalog_rows': len(rows),
+            'duration_ms': int((monotonic() - started_at) * 1000),
+        },
+    )
+
+
+def _daily_stats_dirty_days(click_watermark, click_until, postback_watermark, postback_until) -> set:
+    # days are recomputed as a whole, a new postback changes the lead status of a click from any earlier day
+    created_at = fn.min(TrackClick.created_at)
+    clicks_query = (
+        TrackClick.select(TrackClick.campaign_id, created_at)
+        .where((TrackClick.id > click_watermark) & (TrackClick.id <= click_until))
+        .group_by(TrackClick.campaign_id, fn.date(fn.from_unixtime(TrackClick.created_at)))
+    )
+    postbacks_query = (
+        TrackPostback.select(TrackClick.campaign_id, created_at)
+        .join(TrackClick, JOIN.INNER, on=(TrackPostback.click_id == TrackClick.click_id))
+        .where((TrackPostback.id > postback_watermark) & (TrackPostback.id <= postback_until))
+        .group_by(TrackClick.campaign_id, fn.date(fn.from_unixtime(TrackClick.created_at)))
+    )
+
+    days = set()
+    for query in (clicks_query, postbacks_query):
+        for campaign_id, timestamp in query.tuples():
+            days.add((campaign_id, datetime.fromtimestamp(timestamp).date()))
+
+    return days
+
+
+def _get_watermark(name: ReportWatermarkName) -> int:
+    return ReportWatermark.select(ReportWatermark.value).where(ReportWatermark.name == name.value).scalar() or 0
+
+
+def _set_watermark(name: ReportWatermarkName, value: int) -> None:
+    ReportWatermark.insert(name=name.value, value=value).on_conflict(
+        update={ReportWatermark.value: fn.GREATEST(ReportWatermark.value, value)}
+    ).execute()
+
+
+def _latest_postbacks_query(created_from, created_to=None):
+    cost_value = Case(
+        None,
+        [
+            (
+                (TrackPostback.status == LeadStatus.accept.value) | (TrackPostback.status == LeadStatus.expect),
+                TrackPostback.cost_value,
+            )
+        ],
+        0,
+    )
+
+    query = TrackPostback.select(
+        TrackPostback.click_id,
+        TrackPostback.status,
+        fn.row_number().over(partition_by=TrackPostback.click_id, order_by=TrackPostback.id.desc()).alias('row_number'),
+        cost_value.alias('cost_value'),
+    ).where(TrackPostback.created_at >= created_from)
+
+    if created_to:
+        query = query.where(TrackPostback.created_at < created_to)
+
+    return query
+
+
+def _refresh_daily_stats(campaign_id: int, day: date, gap_seconds: int, parameter_names: list[str]) -> None:
+    day_start = int(datetime.combine(day, time.min).timestamp())
+    day_end = int(datetime.combine(day + timedelta(days=1), time.min).timestamp())
+
+    # postbacks of the day clicks may land any time later, the same as the raw statistics query counts them
+    leads_subquery = _latest_postbacks_query(day_start - gap_seconds)
+
+    parameters = fn.json_object(
+        *[
+            argument
+            for name in parameter_names
+            for argument in (name, fn.json_value(TrackClick.parameters, f'$.{escape_string(name)}'))
+        ]
+    )
+    has_parameters = fn.json_length(TrackClick.parameters) > 0
+
+    def leads_count(status):
+        return fn.SUM(Case(None, [(leads_subquery.c.status == status.value, 1)], 0))
+
+    def payouts(status):
+        return fn.COALESCE(
+            fn.SUM(Case(None, [(leads_subquery.c.status == status.value, leads_subquery.c.cost_value)], 0)), 0
+        )
+
+    query = (
+        TrackClick.select(
+            Value(campaign_id),
+            Value(day),
+            fn.md5(parameters),
+            parameters,
+            has_parameters,
+            fn.COUNT(TrackClick.id),
+            leads_count(LeadStatus.accept),
+            leads_count(LeadStatus.expect),
+            leads_count(LeadStatus.reject),
+            leads_count(LeadStatus.trash),
+            payouts(LeadStatus.accept),
+            payouts(LeadStatus.expect),
+        )
+        .join(
+            leads_subquery,
+            JOIN.LEFT_OUTER,
+            on=((TrackClick.click_id == leads_subquery.c.click_id) & (leads_subquery.c.row_number == 1)),
+        )
+        .where(
+            (TrackClick.campaign_id == campaign_id)
+            & (TrackClick.created_at >= day_start)
+            & (TrackClick.created_at < day_end)
+        )
+        .group_by(parameters, has_parameters)
+    )
+
+    fields = [
+        ReportDailyStats.campaign_id,
+        ReportDailyStats.date,
+        ReportDailyStats.parameters_hash,
+        ReportDailyStats.parameters,
+        ReportDailyStats.has_parameters,
+        ReportDailyStats.clicks,
+        ReportDailyStats.leads_accept,
+        ReportDailyStats.leads_expect,
+        ReportDailyStats.leads_reject,
+        ReportDailyStats.leads_trash,
+        ReportDailyStats.payouts_accept,
+        ReportDailyStats.payouts_expect,
+    ]
+    # clicks are never deleted, so a group once seen in a day never disappears and upserting it is enough
+    ReportDailyStats.insert_from(query, fields=fields).on_conflict(preserve=fields[5:]).execute()
@@ -0,0 +1,53 @@
+import time
+
+import click
+from peewee import Value, fn
+
+from src.container import container
+from src.core.entities import Campaign
+from src.tracker.dimensions import (
+    CLICK_DIMENSIONS_BACKFILL_BATCH_SIZE,
+    CLICK_DIMENSIONS_SETTLE_SECONDS,
+    backfill_click_dimensions,
+)
+from src.tracker.entities import TrackClick
+
+
+@click.command(
+    'backfill-click-dimensions',
+    help='Fill track_click dimension columns of a campaign history and switch its reports to them.',
+)
+@click.argument('campaign_id', type=int)
+@click.option('--batch-size', type=int, default=CLICK_DIMENSIONS_BACKFILL_BATCH_SIZE, show_default=True)
+def backfill_click_dimensions_command(campaign_id, batch_size):
+    campaign = Campaign.get_or_none(Campaign.id == campaign_id)
+    if campaign is None:
+        raise click.ClickException(f'Campaign {campaign_id} does not exist')
+
+    dimension_parameters = campaign.dimension_parameters
+    if not dimension_parameters:
+        raise click.ClickException(f'Campaign {campaign_id} has no dimension parameters')
+
+    # clicks tracked after the last id are written with the declared dimensions, once every process has reloaded them
+    updated_at = campaign.dimension_parameters_updated_at
+    settle_seconds = container.config.get('TRACK_DIMENSIONS_TTL_SECONDS') + CLICK_DIMENSIONS_SETTLE_SECONDS
+    if updated_at is not None:
+        wait_seconds = settle_seconds - (time.time() - updated_at.timestamp())
+        if wait_seconds > 0:
+            click.echo(f'Waiting {wait_seconds:.0f}s for tracking processes to reload dimension parameters')
+            time.sleep(wait_seconds)
+
+    until_id = TrackClick.select(fn.MAX(TrackClick.id)).scalar() or 0
+    updated = backfill_click_dimensions(campaign_id, dimension_parameters, until_id, batch_size)
+
+    # dimension parameters changed in the meantime are left to their own backfill
+    declared = Value(dimension_parameters, Campaign.dimension_parameters.db_value, unpack=False)
+    is_materialized = (
+        Campaign.update(materialized_dimension_parameters=dimension_parameters)
+        .where((Campaign.id == campaign_id) & (Campaign.dimension_parameters == declared))
+        .execute()
+    )
+    if not is_materialized:
+        raise click.ClickException(f'Dimension parameters of campaign {campaign_id} changed during the backfill')
+
+    click.echo(f'Backfilled {updated} clicks of campaign {campaign_id} into {", ".join(dimension_parameters)}')
@@ -0,0 +1 @@
+TRACK_BATCH_MAX_EVENTS = 5000
@@ -0,0 +1,160 @@
+import time
+from collections import Counter
+from threading import Lock
+
+from peewee import chunked, fn
+from wireup import injectable
+
+from src.tracker.entities import TrackCounter
+from src.tracker.enums import TrackEventType
+
+TRACK_COUNTERS_BUCKET_SECONDS = 60
+TRACK_COUNTERS_WINDOW_SECONDS = 24 * 60 * 60
+TRACK_COUNTERS_RELOAD_SECONDS = 10
+TRACK_COUNTERS_PERSIST_BATCH_SIZE = 500
+
+
+def bucket_start(timestamp: float) -> int:
+    return int(timestamp) // TRACK_COUNTERS_BUCKET_SECONDS * TRACK_COUNTERS_BUCKET_SECONDS
+
+
+class RollingCounter:
+    # a ring of per-minute buckets over the longest window, a slot is reused once its minute falls out of the window
+    def __init__(self, size: int):
+        self.bucket_starts = [0] * size
+        self.counts = [0] * size
+
+    def add(self, bucket: int, count: int) -> None:
+        index = bucket // TRACK_COUNTERS_BUCKET_SECONDS % len(self.counts)
+        if self.bucket_starts[index] != bucket:
+            if self.bucket_starts[index] > bucket:
+                return
+
+            self.bucket_starts[index] = bucket
+            self.counts[index] = 0
+
+        self.counts[index] += count
+
+    def totals(self, now: int, windows: dict[str, int]) -> dict[str, int]:
+        current_bucket = bucket_start(now)
+        totals = dict.fromkeys(windows, 0)
+        for bucket, count in zip(self.bucket_starts, self.counts):
+            if not count:
+                continue
+
+            age = current_bucket - bucket
+            for window, seconds in windows.items():
+                if age < seconds:
+                    totals[window] += count
+
+        return totals
+
+
+@injectable
+class TrackCounters:
+    # buckets persisted by every process, reloaded periodically and merged with the increments of this process
+    # which are not persisted yet, so every process serves the same windows
+    def __init__(self):
+        self._counters: dict[tuple[int, TrackEventType], RollingCounter] = {}
+        self._pending: Counter[tuple[int, TrackEventType, int]] = Counter()
+        self._persisting_count = 0
+        self._persisted_generation = 0
+        self._loaded_at: float | None = None
+        self._lock = Lock()
+
+    def increment(self, campaign_id: int, event_type: TrackEventType, bucket: int, count: int = 1) -> None:
+        # tracking only touches memory, the persisted buckets are reloaded by the readers of the windows
+        with self._lock:
+            _add_count(self._counters, campaign_id, event_type, bucket, count)
+            self._pending[(campaign_id, event_type, bucket)] += count
+
+    def window_totals(self, event_type: TrackEventType, windows: dict[str, int], now: int) -> dict[int, dict[str, int]]:
+        self._load()
+        with self._lock:
+            return {
+                campaign_id: counter.totals(now, windows)
+                for (campaign_id, counter_event_type), counter in self._counters.items()
+                if counter_event_type == event_type
+            }
+
+    def persist(self, counts: Counter[tuple[int, str, int]]) -> None:
+        # a reload while the buckets are written could count them both as persisted and as pending
+        with self._lock:
+            self._persisting_count += 1
+
+        try:
+            rows = [
+                {'campaign_id': campaign_id, 'event_type': event_type, 'bucket_start': bucket, 'count': count}
+                for (campaign_id, event_type, bucket), count in counts.items()
+            ]
+            for batch in chunked(rows, TRACK_COUNTERS_PERSIST_BATCH_SIZE):
+                TrackCounter.insert_many(batch).on_conflict(
+                    update={TrackCounter.count: TrackCounter.count + fn.VALUES(TrackCounter.count)}
+                ).execute()
+
+            with self._lock:
+                for (campaign_id, event_type, bucket), count in counts.items():
+                    key = (campaign_id, TrackEventType(event_type), bucket)
+                    self._pending[key] -= count
+                    if self._pending[key] <= 0:
+                        del self._pending[key]
+        finally:
+            with self._lock:
+                self._persisting_count -= 1
+                self._persisted_generation += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._pending.clear()
+            self._loaded_at = None
+
+    def _load(self) -> None:
+        # counters are rebuilt from the buckets persisted by persist_track_counters_worker of every process
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded_at is not None and now - self._loaded_at < TRACK_COUNTERS_RELOAD_SECONDS:
+                return
+            if self._persisting_count:
+                return
+            persisted_generation = self._persisted_generation
+
+        window_start = bucket_start(time.time()) - TRACK_COUNTERS_WINDOW_SECONDS
+        query = TrackCounter.select(
+            TrackCounter.campaign_id, TrackCounter.event_type, TrackCounter.bucket_start, TrackCounter.count
+        ).where(TrackCounter.bucket_start > window_start)
+
+        # the query runs without the lock, so increments are not held up, and the counters are swapped at once
+        counters = {}
+        for campaign_id, event_type, bucket, count in query.tuples():
+            _add_count(counters, campaign_id, TrackEventType(event_type), bucket, count)
+
+        with self._lock:
+            # buckets persisted meanwhile may be in the rows and in the pending increments at once
+            if self._persisting_count or self._persisted_generation != persisted_generation:
+                return
+
+            # increments which failed to reach the persist worker stay pending until they fall out of the window
+            for (campaign_id, event_type, bucket), count in list(self._pending.items()):
+                if bucket <= window_start:
+                    del self._pending[(campaign_id, event_type, bucket)]
+                    continue
+                _add_count(counters, campaign_id, event_type, bucket, count)
+
+            self._counters = counters
+            self._loaded_at = now
+
+
+def _add_count(
+    counters: dict[tuple[int, TrackEventType], RollingCounter],
+    campaign_id: int,
+    event_type: TrackEventType,
+    bucket: int,
+    count: int,
+) -> None:
+    counter = counters.get((campaign_id, event_type))
+    if counter is None:
+        counter = RollingCounter(TRACK_COUNTERS_WINDOW_SECONDS // TRACK_COUNTERS_BUCKET_SECONDS)
+        counters[(campaign_id, event_type)] = counter
+
+    counter.add(bucket, count)
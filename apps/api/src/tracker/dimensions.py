@@ -0,0 +1,78 @@
+import logging
+
+from peewee import fn
+from pymysql.converters import escape_string
+
+from src.core.constants import TRACK_CLICK_DIMENSIONS
+from src.core.entities import Campaign
+from src.reports.catalog import PARAMETER_CATALOG_MAX_LENGTH, catalog_value
+from src.tracker.entities import TrackClick
+
+logger = logging.getLogger(__name__)
+
+CLICK_DIMENSIONS_BACKFILL_BATCH_SIZE = 50000
+# clicks built before a change of the dimension parameters may still wait in write-behind buffers
+CLICK_DIMENSIONS_SETTLE_SECONDS = 60
+
+DIMENSION_FIELDS = tuple(getattr(TrackClick, f'dimension_{index + 1}') for index in range(TRACK_CLICK_DIMENSIONS))
+
+
+def click_dimensions(parameters: dict, dimension_parameters: list[str]) -> dict:
+    # dimension values are kept as json_value returns them, longer values than the column fits are left null
+    row = {'has_parameters': bool(parameters)}
+    for index, field in enumerate(DIMENSION_FIELDS):
+        value = None
+        if index < len(dimension_parameters) and isinstance(parameters, dict):
+            value = catalog_value(parameters.get(dimension_parameters[index]))
+        row[field.name] = value
+
+    return row
+
+
+def materialized_dimension_parameters(campaign: Campaign) -> list[str]:
+    # the declared parameters are only grouped by once the campaign history is backfilled
+    if not campaign.dimension_parameters or campaign.materialized_dimension_parameters != campaign.dimension_parameters:
+        return []
+
+    return campaign.dimension_parameters
+
+
+def backfill_click_dimensions(campaign_id: int, dimension_parameters: list[str], until_id: int, batch_size: int) -> int:
+    update = {TrackClick.has_parameters: fn.json_length(TrackClick.parameters) > 0}
+    for index, field in enumerate(DIMENSION_FIELDS):
+        value = None
+        if index < len(dimension_parameters):
+            value = fn.json_value(TrackClick.parameters, f'$.{escape_string(dimension_parameters[index])}')
+            value = fn.IF(fn.CHAR_LENGTH(value) <= PARAMETER_CATALOG_MAX_LENGTH, value, None)
+        update[field] = value
+
+    # id ranges keep every statement short, they span the campaign's own clicks and skip the clicks of other
+    # campaigns in between
+    first_id, until_id = (
+        TrackClick.select(fn.MIN(TrackClick.id), fn.MAX(TrackClick.id))
+        .where((TrackClick.campaign_id == campaign_id) & (TrackClick.id <= until_id))
+        .tuples()
+        .get()
+    )
+    if first_id is None:
+        return 0
+
+    updated = 0
+    last_id = first_id - 1
+    while last_id < until_id:
+        updated += (
+            TrackClick.update(update)
+            .where(
+                (TrackClick.campaign_id == campaign_id)
+                & (TrackClick.id > last_id)
+                & (TrackClick.id <= last_id + batch_size)
+            )
+            .execute()
+        )
+        last_id += batch_size
+        logger.info(
+            'Click dimensions backfill progress',
+            extra={'campaign_id': campaign_id, 'last_id': min(last_id, until_id), 'until_id': until_id},
+        )
+
+    return updated
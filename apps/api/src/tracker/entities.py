@@ -1,17 +1,25 @@
-from peewee import BooleanField, CharField, DecimalField, IntegerField
+from peewee import BigIntegerField, BooleanField, CharField, DecimalField, IntegerField
 
 from src.core.entities import Entity
-from src.core.peewee import BinaryUUIDField, JSONField
+from src.core.peewee import BinaryUUIDField, JSONField, UTCTimestampField
 
 
 class TrackClick(Entity):
     click_id = BinaryUUIDField()
     campaign_id = IntegerField()
     parameters = JSONField()
+    has_parameters = BooleanField(null=True)
+    dimension_1 = CharField(null=True)
+    dimension_2 = CharField(null=True)
+    dimension_3 = CharField(null=True)
 
     class Meta:
         table_settings = ('ENGINE=Aria', 'TRANSACTIONAL=0')
-        indexes = ((('click_id',), False),)
+        indexes = (
+            (('click_id',), False),
+            (('campaign_id', 'created_at'), False),
+            (('campaign_id', 'dimension_1'), False),
+        )
 
 
 class TrackPostback(Entity):
@@ -49,3 +57,31 @@ class TrackDiscard(Entity):
             (('campaign_id', 'created_at'), False),
             (('created_at',), False),
         )
+
+
+class TrackCounter(Entity):
+    campaign_id = IntegerField()
+    event_type = CharField()
+    bucket_start = BigIntegerField()
+    count = IntegerField(default=0)
+
+    class Meta:
+        indexes = (
+            (('campaign_id', 'event_type', 'bucket_start'), True),
+            (('bucket_start',), False),
+        )
+
+
+class TrackParameterCatalog(Entity):
+    # distinct click parameter values of a campaign, binary collation keeps values differing in case apart
+    campaign_id = IntegerField()
+    parameter = CharField(collation='utf8mb4_bin')
+    value = CharField(collation='utf8mb4_bin')
+    # a raw row holds no value, it marks values of its parameter which are looked up in track_click instead
+    is_raw = BooleanField(default=False)
+    first_seen_at = UTCTimestampField(utc=True)
+    last_seen_at = UTCTimestampField(utc=True)
+    count = IntegerField(default=0)
+
+    class Meta:
+        indexes = ((('campaign_id', 'parameter', 'is_raw', 'value'), True),)
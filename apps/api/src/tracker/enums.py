@@ -4,3 +4,16 @@ from enum import Enum
 class TrackSource(str, Enum):
     lead = 'lead'
     postback = 'postback'
+
+
+class TrackEventType(str, Enum):
+    click = 'click'
+    lead = 'lead'
+    postback = 'postback'
+    discard = 'discard'
+
+
+class TrackBatchLineStatus(str, Enum):
+    accepted = 'accepted'
+    rejected = 'rejected'
+    failed = 'failed'
@@ -0,0 +1,11 @@
+from src.core.exceptions import ApplicationError
+
+
+class TrackBatchTooLargeError(ApplicationError):
+    http_status_code = 413
+    message = 'Track batch is too large'
+
+
+class TrackBatchMalformedError(ApplicationError):
+    http_status_code = 400
+    message = 'Track batch must be a JSON array or NDJSON'
@@ -1,13 +1,20 @@
+import json
 from uuid import uuid4
 
 from flask import make_response, redirect, request
 from flask.views import MethodView
+from marshmallow import ValidationError
 
 from src.container import container
 from src.core.blueprint import Blueprint
 from src.core.enums import FlowActionType
+from src.core.models import LandingSnapshot
 from src.core.services import ClientService, FlowService
+from src.tracker.constants import TRACK_BATCH_MAX_EVENTS
+from src.tracker.enums import TrackBatchLineStatus, TrackEventType
+from src.tracker.exceptions import TrackBatchMalformedError, TrackBatchTooLargeError
 from src.tracker.schemas import (
+    TrackBatchResponseSchema,
     TrackClickRequestSchema,
     TrackLeadRequestSchema,
     TrackPostbackRequestSchema,
@@ -18,6 +25,57 @@ from src.tracker.services import TrackService
 blueprint = Blueprint('tracker', __name__, description='Tracker')
 process_blueprint = Blueprint('process', __name__, description='Tracker Process')
 
+TRACK_BATCH_SCHEMAS = {
+    TrackEventType.click: TrackClickRequestSchema(),
+    TrackEventType.lead: TrackLeadRequestSchema(),
+    TrackEventType.postback: TrackPostbackRequestSchema(),
+}
+MALFORMED_BATCH_LINE = object()
+
+
+def _read_batch_lines():
+    if request.mimetype == 'application/json':
+        events = request.get_json(silent=True)
+        if not isinstance(events, list):
+            raise TrackBatchMalformedError()
+
+        yield from enumerate(events, start=1)
+        return
+
+    for line_number, line in enumerate(request.stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, MALFORMED_BATCH_LINE
+
+
+def _load_batch_event(event):
+    if event is MALFORMED_BATCH_LINE:
+        raise ValidationError({'_schema': ['Invalid JSON.']})
+
+    if not isinstance(event, dict):
+        raise ValidationError({'_schema': ['Event must be a JSON object.']})
+
+    event = dict(event)
+    try:
+        event_type = TrackEventType(event.pop('type', None))
+    except ValueError:
+        event_type = None
+
+    if event_type not in TRACK_BATCH_SCHEMAS:
+        raise ValidationError({'type': [f'Must be one of: {", ".join(t.value for t in TRACK_BATCH_SCHEMAS)}.']})
+
+    payload = TRACK_BATCH_SCHEMAS[event_type].load(event)
+    return event_type, {
+        'clickId': payload.pop('clickId'),
+        'campaignId': payload.pop('campaignId', None),
+        'parameters': payload,
+    }
+
 
 @blueprint.route('/click')
 class TrackClick(MethodView):
@@ -65,6 +123,63 @@ class TrackLead(MethodView):
         track_click_service.track_lead(track_payload.pop('clickId'), parameters=track_payload)
 
 
+@blueprint.route('/batch')
+class TrackBatch(MethodView):
+    @blueprint.response(200, TrackBatchResponseSchema)
+    def post(self):
+        track_click_service = container.get(TrackService)
+
+        events = []
+        event_results = []
+        results = []
+        for line_number, event in _read_batch_lines():
+            if len(results) == TRACK_BATCH_MAX_EVENTS:
+                raise TrackBatchTooLargeError()
+
+            try:
+                event_type, payload = _load_batch_event(event)
+            except ValidationError as e:
+                results.append(
+                    {
+                        'line': line_number,
+                        'type': event.get('type') if isinstance(event, dict) else None,
+                        'status': TrackBatchLineStatus.rejected.value,
+                        'errors': e.messages,
+                    }
+                )
+                continue
+
+            events.append((event_type, payload))
+            event_results.append(
+                {'line': line_number, 'type': event_type.value, 'status': TrackBatchLineStatus.accepted.value}
+            )
+            results.append(event_results[-1])
+
+        # a line is accepted only once its event is written
+        failed_count = 0
+        for result, is_written in zip(event_results, track_click_service.track_batch(events)):
+            if not is_written:
+                result['status'] = TrackBatchLineStatus.failed.value
+                failed_count += 1
+
+        return {
+            'content': results,
+            'accepted': len(events) - failed_count,
+            'rejected': len(results) - len(events),
+            'failed': failed_count,
+        }
+
+
+def _landing_snapshot_response(snapshot):
+    if 'gzip' not in request.accept_encodings:
+        return make_response(snapshot.content)
+
+    response = make_response(snapshot.gzipped_content)
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 @process_blueprint.route('/<int:campaignId>')
 class Process(MethodView):
     @process_blueprint.arguments(TrackProcessRequestSchema, location='query')
@@ -88,6 +203,8 @@ class Process(MethodView):
         if action_type == FlowActionType.redirect:
             return redirect(subject)
         elif action_type == FlowActionType.render:
+            if isinstance(subject, LandingSnapshot):
+                return _landing_snapshot_response(subject)
             return make_response(subject)
         else:
             track_click_service.track_discard(click_id, campaignId, client)
@@ -30,3 +30,17 @@ class TrackProcessRequestSchema(Schema):
 
     class Meta:
         unknown = INCLUDE
+
+
+class TrackBatchLineResponseSchema(Schema):
+    line = fields.Integer(required=True)
+    type = fields.String(allow_none=True)
+    status = fields.String(required=True)
+    errors = fields.Dict(allow_none=True)
+
+
+class TrackBatchResponseSchema(Schema):
+    content = fields.Nested(TrackBatchLineResponseSchema(many=True), required=True)
+    accepted = fields.Integer(required=True)
+    rejected = fields.Integer(required=True)
+    failed = fields.Integer(required=True)
@@ -1,23 +1,85 @@
 import logging
-from typing import Optional
+import time
+from collections import Counter, defaultdict
+from queue import Full
+from threading import Lock
+from typing import Annotated, Optional
 
 from peewee import fn
-from wireup import injectable
+from wireup import Inject, injectable
 
 from src.core.entities import Campaign
 from src.core.enums import LeadStatus
 from src.core.supervisor import WorkerSupervisor
-from src.reports.workers import refresh_report_leads_worker
-from src.tracker.entities import TrackClick, TrackDiscard, TrackLead, TrackPostback
-from src.tracker.enums import TrackSource
+from src.core.utils import utcnow
+from src.reports.cache import StatisticsReportCache
+from src.tracker.counters import TrackCounters, bucket_start
+from src.tracker.dimensions import click_dimensions
+from src.tracker.entities import TrackClick
+from src.tracker.enums import TrackEventType
+from src.tracker.workers import (
+    TRACK_EVENT_ENTITIES,
+    TRACK_EVENT_SOURCES,
+    WRITE_BEHIND_ENQUEUE_TIMEOUT_SECONDS,
+    flush_track_events_worker,
+    persist_track_counters_worker,
+    unwritten_track_events,
+    write_track_events,
+    write_track_events_one_by_one,
+)
 
 logger = logging.getLogger(__name__)
 
 
 @injectable
 class TrackService:
-    def __init__(self, worker_supervisor: WorkerSupervisor):
+    def __init__(
+        self,
+        worker_supervisor: WorkerSupervisor,
+        statistics_report_cache: StatisticsReportCache,
+        track_counters: TrackCounters,
+        write_behind_enabled: Annotated[bool, Inject(config='TRACK_WRITE_BEHIND_ENABLED')],
+        discard_write_behind_enabled: Annotated[bool, Inject(config='TRACK_DISCARD_WRITE_BEHIND_ENABLED')],
+        dimensions_ttl_seconds: Annotated[float, Inject(config='TRACK_DIMENSIONS_TTL_SECONDS')],
+    ):
         self.worker_supervisor = worker_supervisor
+        self.statistics_report_cache = statistics_report_cache
+        self.track_counters = track_counters
+        self.write_behind_enabled = write_behind_enabled
+        self.discard_write_behind_enabled = discard_write_behind_enabled
+        self.dimensions_ttl_seconds = dimensions_ttl_seconds
+        self._dimension_parameters: dict[int, tuple[float, list[str]]] = {}
+        self._dimension_parameters_lock = Lock()
+
+    def _get_dimension_parameters(self, campaign_id: int) -> list[str]:
+        cached = self._dimension_parameters.get(campaign_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        with self._dimension_parameters_lock:
+            cached = self._dimension_parameters.get(campaign_id)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+
+            campaign = Campaign.select(Campaign.dimension_parameters).where(Campaign.id == campaign_id).first()
+            dimension_parameters = (campaign.dimension_parameters if campaign else None) or []
+            self._dimension_parameters[campaign_id] = (
+                time.monotonic() + self.dimensions_ttl_seconds,
+                dimension_parameters,
+            )
+
+        return dimension_parameters
+
+    def invalidate_dimension_parameters(self, campaign_id: int | None = None) -> None:
+        with self._dimension_parameters_lock:
+            if campaign_id is None:
+                self._dimension_parameters.clear()
+            else:
+                self._dimension_parameters.pop(campaign_id, None)
+
+    def _click_row(self, click_id: str, campaign_id: int, parameters: dict) -> dict:
+        row = {'click_id': click_id, 'campaign_id': campaign_id, 'parameters': parameters}
+        return row | click_dimensions(parameters, self._get_dimension_parameters(campaign_id))
 
     def _get_campaign_by_click_id(self, click_id: str) -> Optional[Campaign]:
         click = TrackClick.get_or_none(TrackClick.click_id == click_id)
@@ -32,6 +94,17 @@ class TrackService:
 
         return campaign
 
+    def _get_campaigns_by_click_ids(self, click_ids) -> dict:
+        if not click_ids:
+            return {}
+
+        query = (
+            Campaign.select(Campaign, TrackClick.click_id)
+            .join(TrackClick, on=(TrackClick.campaign_id == Campaign.id))
+            .where(TrackClick.click_id.in_(list(click_ids)))
+        )
+        return {campaign.click_id: campaign for campaign in query.objects()}
+
     def _map_status(self, parameters: dict, status_mapper) -> str:
         if not isinstance(status_mapper, dict):
             logger.warning('Failed to get status mapper', extra={'status_mapper': status_mapper})
@@ -60,29 +133,76 @@ class TrackService:
         )
         return LeadStatus.trash.value
 
+    def _write_event(self, event_type: TrackEventType, row: dict) -> bool:
+        # returns True when the event is buffered and will be written by flush_track_events_worker
+        if event_type == TrackEventType.discard:
+            write_behind = self.discard_write_behind_enabled
+        else:
+            write_behind = self.write_behind_enabled
+
+        if write_behind:
+            payload = {'event_type': event_type.value, 'row': row | {'created_at': utcnow()}}
+            try:
+                self.worker_supervisor.enqueue(
+                    flush_track_events_worker, payload, timeout=WRITE_BEHIND_ENQUEUE_TIMEOUT_SECONDS
+                )
+                return True
+            except Full:
+                logger.warning(
+                    'Track events buffer is full, writing event directly', extra={'event_type': event_type.value}
+                )
+
+        write_track_events(TRACK_EVENT_ENTITIES[event_type], [row], TRACK_EVENT_SOURCES.get(event_type))
+        return False
+
+    def _count_events(self, event_type: TrackEventType, counts: Counter) -> None:
+        # counters only feed alerts, the events are tracked already, so a failure here is logged and never raised
+        try:
+            self._increment_counters(event_type, counts)
+        except Exception:
+            logger.exception('Failed to count track events', extra={'event_type': event_type.value})
+
+    def _increment_counters(self, event_type: TrackEventType, counts: Counter) -> None:
+        bucket = bucket_start(time.time())
+        for campaign_id, count in counts.items():
+            self.track_counters.increment(campaign_id, event_type, bucket, count)
+            payload = {
+                'campaign_id': campaign_id,
+                'event_type': event_type.value,
+                'bucket_start': bucket,
+                'count': count,
+            }
+            try:
+                self.worker_supervisor.enqueue(persist_track_counters_worker, payload, timeout=0)
+            except Full:
+                # in-memory counters stay correct, only a rebuild after a restart misses these events
+                logger.warning('Track counters buffer is full', extra={'event_type': event_type.value})
+
     def track_click(self, click_id: str, campaign_id: int, parameters: dict) -> None:
-        click = TrackClick(click_id=click_id, campaign_id=campaign_id, parameters=parameters)
-        click.save()
+        self._write_event(TrackEventType.click, self._click_row(click_id, campaign_id, parameters))
+        self._count_events(TrackEventType.click, Counter([campaign_id]))
 
     def track_discard(self, click_id: str, campaign_id: int, client) -> None:
-        discard = TrackDiscard(
-            click_id=click_id,
-            campaign_id=campaign_id,
-            country=client.country,
-            browser_family=client.browser_family,
-            os_family=client.os_family,
-            device_family=client.device_family,
-            is_mobile=client.is_mobile,
-            is_bot=client.is_bot,
+        self._write_event(
+            TrackEventType.discard,
+            {
+                'click_id': click_id,
+                'campaign_id': campaign_id,
+                'country': client.country,
+                'browser_family': client.browser_family,
+                'os_family': client.os_family,
+                'device_family': client.device_family,
+                'is_mobile': client.is_mobile,
+                'is_bot': client.is_bot,
+            },
         )
-        discard.save()
+        self._count_events(TrackEventType.discard, Counter([campaign_id]))
 
-    def track_postback(self, click_id: str, parameters: dict) -> None:
+    def _postback_row(self, click_id: str, parameters: dict, campaign: Optional[Campaign]) -> dict:
         status = None
         cost_value = None
         currency = None
 
-        campaign = self._get_campaign_by_click_id(click_id)
         if campaign:
             status = self._map_status(parameters, campaign.status_mapper)
             if status in {LeadStatus.accept.value, LeadStatus.expect.value}:
@@ -93,26 +213,89 @@ class TrackService:
                 'Tracking postback for not found campaign', extra={'click_id': click_id, 'parameters': parameters}
             )
 
-        postback = TrackPostback(
-            click_id=click_id,
-            parameters=parameters,
-            status=status,
-            cost_value=cost_value,
-            currency=currency,
-        )
-        postback.save()
-        self.worker_supervisor.enqueue(
-            refresh_report_leads_worker,
-            {'click_id': click_id, 'source': TrackSource.postback.value},
-        )
+        return {
+            'click_id': click_id,
+            'parameters': parameters,
+            'status': status,
+            'cost_value': cost_value,
+            'currency': currency,
+        }
+
+    def track_postback(self, click_id: str, parameters: dict) -> None:
+        campaign = self._get_campaign_by_click_id(click_id)
+        postback = self._postback_row(click_id, parameters, campaign)
+        self._write_event(TrackEventType.postback, postback)
+        if campaign:
+            # a postback changes the lead status of a click from any day, closed ones included
+            self.statistics_report_cache.invalidate(campaign.id)
 
     def track_lead(self, click_id: str, parameters: dict) -> None:
-        lead = TrackLead(click_id=click_id, parameters=parameters)
-        lead.save()
-        self.worker_supervisor.enqueue(
-            refresh_report_leads_worker,
-            {'click_id': click_id, 'source': TrackSource.lead.value},
-        )
+        self._write_event(TrackEventType.lead, {'click_id': click_id, 'parameters': parameters})
+
+    def track_batch(self, events: list[tuple[TrackEventType, dict]]) -> list[bool]:
+        payloads = defaultdict(list)
+        indexes = defaultdict(list)
+        for index, (event_type, payload) in enumerate(events):
+            payloads[event_type].append(payload)
+            indexes[event_type].append(index)
+
+        # clicks go first, so postbacks of the same batch can be attributed to their campaigns
+        clicks = [
+            self._click_row(p['clickId'], p['campaignId'], p['parameters']) for p in payloads[TrackEventType.click]
+        ]
+        click_written, written_clicks = self._write_batch_events(TrackEventType.click, clicks)
+        self._count_events(TrackEventType.click, Counter(click['campaign_id'] for click in written_clicks))
+
+        leads = [{'click_id': p['clickId'], 'parameters': p['parameters']} for p in payloads[TrackEventType.lead]]
+        lead_written, _ = self._write_batch_events(TrackEventType.lead, leads)
+
+        campaigns = self._get_campaigns_by_click_ids({p['clickId'] for p in payloads[TrackEventType.postback]})
+        postbacks = [
+            self._postback_row(p['clickId'], p['parameters'], campaigns.get(p['clickId']))
+            for p in payloads[TrackEventType.postback]
+        ]
+        postback_written, written_postbacks = self._write_batch_events(TrackEventType.postback, postbacks)
+
+        for campaign_id in {campaigns[p['click_id']].id for p in written_postbacks if p['click_id'] in campaigns}:
+            self.statistics_report_cache.invalidate(campaign_id)
+
+        written = [False] * len(events)
+        for event_type, event_written in (
+            (TrackEventType.click, click_written),
+            (TrackEventType.lead, lead_written),
+            (TrackEventType.postback, postback_written),
+        ):
+            for index, is_written in zip(indexes[event_type], event_written):
+                written[index] = is_written
+
+        return written
+
+    def _write_batch_events(self, event_type: TrackEventType, rows: list[dict]) -> tuple[list[bool], list[dict]]:
+        if not rows:
+            return [], []
+
+        entity = TRACK_EVENT_ENTITIES[event_type]
+        source = TRACK_EVENT_SOURCES.get(event_type)
+        # a batch sent again does not write its clicks twice
+        unwritten = unwritten_track_events(entity, rows)
+        failed_rows = set()
+        try:
+            write_track_events(entity, unwritten, source)
+        except Exception:
+            logger.exception('Failed to write track batch', extra={'event_type': event_type.value})
+            # the non-transactional track table keeps the rows written before the failure, only clicks can be told
+            # apart by their click id, so other events of the failed insert are written again one by one
+            retried = unwritten
+            try:
+                retried = unwritten_track_events(entity, unwritten)
+            except Exception:
+                logger.exception('Failed to read written track events', extra={'event_type': event_type.value})
+
+            is_written = write_track_events_one_by_one(entity, retried, source)
+            failed_rows = {id(row) for row, row_written in zip(retried, is_written) if not row_written}
+
+        # lines of failed rows are reported, so the sender knows which ones to send again
+        return [id(row) not in failed_rows for row in rows], [row for row in unwritten if id(row) not in failed_rows]
 
     def get_click_dates(self, campaign_id, start_period, end_period):
         date = fn.date(fn.from_unixtime(TrackClick.created_at)).distinct().alias('date')
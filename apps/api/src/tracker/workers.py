@@ -1,45 +1,307 @@
 import logging
 import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from queue import Empty
 
+from peewee import chunked
+
+from src.core.enums import PartitionPeriod, WorkerPlacement
+from src.core.models import WorkerSchedule
+from src.core.partitions import create_future_partitions, drop_expired_partitions, next_period_start, timestamp_day
 from src.core.supervisor import WorkerContext, register_worker
-from src.tracker.entities import TrackDiscard
+from src.reports.cache import StatisticsReportCache
+from src.reports.entities import ReportLeadOutbox
+from src.tracker.counters import TRACK_COUNTERS_WINDOW_SECONDS, TrackCounters, bucket_start
+from src.tracker.entities import TrackClick, TrackCounter, TrackDiscard, TrackLead, TrackPostback
+from src.tracker.enums import TrackEventType, TrackSource
 
 logger = logging.getLogger(__name__)
 
-LAST_EXECUTED_AT_STATE_KEY = 'last_executed_at'
-DISCARD_RETENTION_SECONDS = 30 * 60 * 60
+LAST_FLUSH_STATE_KEY = 'last_flush'
+RETRY_FLUSH_STATE_KEY = 'retry_flush'
 DISCARD_CLEANUP_PERIOD_SECONDS = 5 * 60
+DISCARD_CLEANUP_TIMEOUT_SECONDS = 60
+DISCARD_PARTITIONS_AHEAD_DAYS = 3
+TRACK_PARTITIONS_PERIOD_SECONDS = 60 * 60
+TRACK_PARTITIONS_TIMEOUT_SECONDS = 60
+TRACK_PARTITIONS_AHEAD_MONTHS = 2
+TRACK_PARTITIONED_ENTITIES = (TrackClick, TrackLead, TrackPostback)
 
+WRITE_BEHIND_BUFFER_SIZE = 10000
+WRITE_BEHIND_BATCH_SIZE = 500
+WRITE_BEHIND_FLUSH_PERIOD_SECONDS = 1
+WRITE_BEHIND_ENQUEUE_TIMEOUT_SECONDS = 0.05
+WRITE_BEHIND_FLUSH_ATTEMPTS = 3
 
-@register_worker
-def cleanup_discard_worker(context: WorkerContext) -> None:
-    state = context.get_state(cleanup_discard_worker)
+TRACK_COUNTERS_BUFFER_SIZE = 10000
+TRACK_COUNTERS_PERSIST_PERIOD_SECONDS = 10
 
-    started_at = time.monotonic()
-    last_executed_at = state.get(LAST_EXECUTED_AT_STATE_KEY)
-    if last_executed_at and started_at - last_executed_at < DISCARD_CLEANUP_PERIOD_SECONDS:
-        return
+TRACK_EVENT_ENTITIES = {
+    TrackEventType.click: TrackClick,
+    TrackEventType.lead: TrackLead,
+    TrackEventType.postback: TrackPostback,
+    TrackEventType.discard: TrackDiscard,
+}
+TRACK_EVENT_SOURCES = {
+    TrackEventType.lead: TrackSource.lead,
+    TrackEventType.postback: TrackSource.postback,
+}
 
-    cutoff = int(time.time()) - DISCARD_RETENTION_SECONDS
+
+@register_worker(
+    placement=WorkerPlacement.leader,
+    schedule=WorkerSchedule(
+        period_seconds=lambda: DISCARD_CLEANUP_PERIOD_SECONDS, timeout_seconds=DISCARD_CLEANUP_TIMEOUT_SECONDS
+    ),
+)
+def cleanup_discard_worker(context: WorkerContext) -> None:
+    started_at = time.monotonic()
+    now = int(time.time())
+    cutoff = now - context.track_discard_retention_seconds
     logger.info(
         'Cleaning up track_discard table',
         extra={
             'cutoff': cutoff,
-            'retention_seconds': DISCARD_RETENTION_SECONDS,
+            'retention_seconds': context.track_discard_retention_seconds,
         },
     )
 
-    deleted_rows = TrackDiscard.delete().where(TrackDiscard.created_at < cutoff).execute()
+    database = TrackDiscard._meta.database
+    table_name = TrackDiscard._meta.table_name
+    until = timestamp_day(now) + timedelta(days=DISCARD_PARTITIONS_AHEAD_DAYS)
+    created_partitions = create_future_partitions(database, table_name, PartitionPeriod.day, until)
+    # a daily partition is dropped once all of its rows are expired, so retention is rounded up to whole days
+    dropped_partitions = drop_expired_partitions(database, table_name, cutoff)
     duration_ms = int((time.monotonic() - started_at) * 1000)
 
     logger.info(
         'track_discard cleanup is completed',
         extra={
             'cutoff': cutoff,
-            'retention_seconds': DISCARD_RETENTION_SECONDS,
-            'deleted_rows': deleted_rows,
+            'retention_seconds': context.track_discard_retention_seconds,
+            'created_partitions': created_partitions,
+            'dropped_partitions': dropped_partitions,
             'duration_ms': duration_ms,
         },
     )
 
-    state[LAST_EXECUTED_AT_STATE_KEY] = started_at
+
+@register_worker(
+    placement=WorkerPlacement.leader,
+    schedule=WorkerSchedule(
+        period_seconds=lambda: TRACK_PARTITIONS_PERIOD_SECONDS, timeout_seconds=TRACK_PARTITIONS_TIMEOUT_SECONDS
+    ),
+)
+def maintain_track_partitions_worker(context: WorkerContext) -> None:
+    started_at = time.monotonic()
+    until = timestamp_day(int(time.time()))
+    for _ in range(TRACK_PARTITIONS_AHEAD_MONTHS):
+        until = next_period_start(until, PartitionPeriod.month)
+
+    # track tables are kept forever, so only monthly partitions ahead of time are created and nothing is dropped
+    created_partitions = {}
+    for entity in TRACK_PARTITIONED_ENTITIES:
+        table_name = entity._meta.table_name
+        created_partitions[table_name] = create_future_partitions(
+            entity._meta.database, table_name, PartitionPeriod.month, until
+        )
+
+    logger.info(
+        'Track partitions maintenance is completed',
+        extra={
+            'created_partitions': created_partitions,
+            'duration_ms': int((time.monotonic() - started_at) * 1000),
+        },
+    )
+
+
+# a full batch wakes the worker up ahead of its period
+@register_worker(
+    queue_maxsize=WRITE_BEHIND_BUFFER_SIZE,
+    process_local=True,
+    schedule=WorkerSchedule(
+        period_seconds=lambda: WRITE_BEHIND_FLUSH_PERIOD_SECONDS, wake_queue_size=WRITE_BEHIND_BATCH_SIZE
+    ),
+)
+def flush_track_events_worker(context: WorkerContext) -> None:
+    queue = context.get_queue(flush_track_events_worker)
+    state = context.get_state(flush_track_events_worker)
+
+    # rows of a failed write are kept for the next pass together with the number of attempts made to write them
+    retries = state.pop(RETRY_FLUSH_STATE_KEY, {})
+    buffer_depth = queue.qsize()
+    if buffer_depth == 0 and not retries:
+        return
+
+    started_at = time.monotonic()
+
+    rows_by_event_type = defaultdict(list)
+    while True:
+        try:
+            payload = queue.get_nowait()
+        except Empty:
+            break
+
+        rows_by_event_type[TrackEventType(payload['event_type'])].append(payload['row'])
+
+    batch_sizes = {}
+    next_retries = {}
+    dropped_counts = {}
+    written_postbacks = []
+    for event_type, entity in TRACK_EVENT_ENTITIES.items():
+        source = TRACK_EVENT_SOURCES.get(event_type)
+        attempts, retried_rows = retries.get(event_type, (0, []))
+        rows = retried_rows + rows_by_event_type.get(event_type, [])
+        if not rows:
+            continue
+
+        try:
+            if retried_rows:
+                rows = unwritten_track_events(entity, retried_rows) + rows_by_event_type.get(event_type, [])
+            write_track_events(entity, rows, source)
+        except Exception:
+            logger.exception(
+                'Failed to flush track events', extra={'event_type': event_type.value, 'rows_count': len(rows)}
+            )
+            attempts += 1
+            if attempts >= WRITE_BEHIND_FLUSH_ATTEMPTS:
+                # rows keeping a batch failing are written one by one, the ones failing on their own are dropped;
+                # an unavailable database fails every row, so then the rows wait for it instead
+                try:
+                    entity._meta.database.execute_sql('SELECT 1')
+                    rows = unwritten_track_events(entity, rows)
+                except Exception:
+                    logger.exception('Failed to check track events', extra={'event_type': event_type.value})
+                else:
+                    written = write_track_events_one_by_one(entity, rows, source)
+                    dropped_counts[event_type.value] = len(rows) - sum(written)
+                    if event_type == TrackEventType.postback:
+                        written_postbacks += [row for row, is_written in zip(rows, written) if is_written]
+                    continue
+
+            if len(rows) > WRITE_BEHIND_BUFFER_SIZE:
+                dropped_counts[event_type.value] = len(rows) - WRITE_BEHIND_BUFFER_SIZE
+                rows = rows[-WRITE_BEHIND_BUFFER_SIZE:]
+            next_retries[event_type] = (attempts, rows)
+            continue
+
+        batch_sizes[event_type.value] = len(rows)
+        if event_type == TrackEventType.postback:
+            written_postbacks += rows
+
+    if written_postbacks:
+        _invalidate_postback_campaigns(context, written_postbacks)
+
+    if dropped_counts:
+        logger.error('Track events are dropped', extra={'dropped_counts': dropped_counts})
+
+    state[RETRY_FLUSH_STATE_KEY] = next_retries
+    duration_ms = round((time.monotonic() - started_at) * 1000, 2)
+    state[LAST_FLUSH_STATE_KEY] = {
+        'buffer_depth': buffer_depth,
+        'batch_sizes': batch_sizes,
+        'retry_counts': {event_type.value: len(rows) for event_type, (_, rows) in next_retries.items()},
+        'dropped_counts': dropped_counts,
+        'duration_ms': duration_ms,
+    }
+    logger.info('Track events are flushed', extra=state[LAST_FLUSH_STATE_KEY])
+
+
+@register_worker(
+    queue_maxsize=TRACK_COUNTERS_BUFFER_SIZE,
+    process_local=True,
+    schedule=WorkerSchedule(period_seconds=lambda: TRACK_COUNTERS_PERSIST_PERIOD_SECONDS),
+)
+def persist_track_counters_worker(context: WorkerContext) -> None:
+    queue = context.get_queue(persist_track_counters_worker)
+
+    started_at = time.monotonic()
+
+    counts = Counter()
+    while True:
+        try:
+            payload = queue.get_nowait()
+        except Empty:
+            break
+
+        counts[(payload['campaign_id'], payload['event_type'], payload['bucket_start'])] += payload['count']
+
+    context.get(TrackCounters).persist(counts)
+
+    # buckets outside of the longest window are not needed to rebuild the counters
+    expired_count = (
+        TrackCounter.delete()
+        .where(TrackCounter.bucket_start <= bucket_start(time.time()) - TRACK_COUNTERS_WINDOW_SECONDS)
+        .execute()
+    )
+
+    if counts or expired_count:
+        logger.info(
+            'Track counters are persisted',
+            extra={
+                'buckets_count': len(counts),
+                'expired_count': expired_count,
+                'duration_ms': int((time.monotonic() - started_at) * 1000),
+            },
+        )
+
+
+def write_track_events(entity, rows: list[dict], source: TrackSource | None = None) -> None:
+    for batch in chunked(rows, WRITE_BEHIND_BATCH_SIZE):
+        if source is None:
+            entity.insert_many(batch).execute()
+            continue
+
+        # the outbox rows become visible to refresh_report_leads_worker only once the events are written
+        with ReportLeadOutbox._meta.database.atomic():
+            outbox = [{'click_id': row['click_id'], 'source': source.value} for row in batch]
+            ReportLeadOutbox.insert_many(outbox).execute()
+            entity.insert_many(batch).execute()
+
+
+def unwritten_track_events(entity, rows: list[dict]) -> list[dict]:
+    # a failed multi-row insert into a non-transactional track table keeps the rows written before the failure,
+    # clicks are the only events identified by their click id, other events may be written twice
+    if entity is not TrackClick:
+        return rows
+
+    written_click_ids = set()
+    for batch in chunked([row['click_id'] for row in rows], WRITE_BEHIND_BATCH_SIZE):
+        query = TrackClick.select(TrackClick.click_id).where(TrackClick.click_id.in_(batch))
+        written_click_ids.update(click_id for (click_id,) in query.tuples())
+
+    return [row for row in rows if row['click_id'] not in written_click_ids]
+
+
+def _invalidate_postback_campaigns(context: WorkerContext, rows: list[dict]) -> None:
+    # track_postback invalidates the reports of a buffered postback before it is written, so reports cached
+    # in between miss it
+    campaign_ids = set()
+    try:
+        for batch in chunked({row['click_id'] for row in rows}, WRITE_BEHIND_BATCH_SIZE):
+            query = TrackClick.select(TrackClick.campaign_id).distinct().where(TrackClick.click_id.in_(batch))
+            campaign_ids.update(campaign_id for (campaign_id,) in query.tuples())
+    except Exception:
+        logger.exception('Failed to read campaigns of postbacks')
+        # reports of every campaign are invalidated then, instead of keeping stale ones
+        campaign_ids = {None}
+
+    statistics_report_cache = context.get(StatisticsReportCache)
+    for campaign_id in campaign_ids:
+        statistics_report_cache.invalidate(campaign_id)
+
+
+def write_track_events_one_by_one(entity, rows: list[dict], source: TrackSource | None = None) -> list[bool]:
+    written = []
+    for row in rows:
+        try:
+            write_track_events(entity, [row], source)
+        except Exception:
+            logger.exception('Failed to write track event', extra={'event_type': entity._meta.table_name})
+            written.append(False)
+            continue
+
+        written.append(True)
+
+    return written
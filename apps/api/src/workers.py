@@ -0,0 +1,35 @@
+import logging
+import os
+import signal
+from threading import Event
+
+from src.core.enums import WorkerMode
+from src.core.logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    configure_logging()
+
+    # web processes started with BACKGROUND_WORKERS_MODE=local keep the workers draining their own memory
+    os.environ['BACKGROUND_WORKERS_MODE'] = WorkerMode.shared.value
+    # the auth package resolves the container on import, so it is imported first to break the cycle
+    from src.auth import auth  # noqa: F401
+    from src.container import container
+    from src.core.supervisor import WorkerSupervisor
+
+    stop_event = Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    supervisor = container.get(WorkerSupervisor)
+    logger.info('Background workers are started', extra={'mode': supervisor.mode.value})
+    stop_event.wait()
+
+    supervisor.stop()
+    logger.info('Background workers are stopped')
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,7 @@
-pytest_plugins = ['tests.fixtures.db', 'tests.fixtures.payloads', 'tests.fixtures.entities', 'tests.fixtures.utils']
+pytest_plugins = [
+    'tests.fixtures.db',
+    'tests.fixtures.payloads',
+    'tests.fixtures.entities',
+    'tests.fixtures.utils',
+    'tests.fixtures.ip2location',
+]
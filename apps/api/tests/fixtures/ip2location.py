@@ -0,0 +1,80 @@
+import ipaddress
+import struct
+
+import pytest
+
+IPV4_RANGES = [
+    ('0.0.0.0', '-'),
+    ('1.0.0.0', 'AU'),
+    ('5.2.0.0', 'MD'),
+    ('5.3.0.0', 'RO'),
+    ('8.8.8.0', 'US'),
+    ('8.8.9.0', '-'),
+    ('100.0.0.0', 'DE'),
+    ('224.0.0.0', '-'),
+]
+
+IPV6_RANGES = [
+    ('::', '-'),
+    ('2001:db8::', 'NL'),
+    ('2001:db8:0:0:8000::', 'FR'),
+    ('2001:db9::', '-'),
+    ('2a00:1450::', 'IE'),
+    ('2a00:1451::', '-'),
+]
+
+
+def build_ip2location_db(path, ipv4_ranges, ipv6_ranges):
+    # writes a minimal IP2Location DB1 BIN file: a 64 bytes header, ipv4 and ipv6 rows, then country strings
+    header_size = 64
+    ipv4_row_width, ipv6_row_width = 8, 20
+    ipv4_address = header_size + 1
+    ipv6_address = ipv4_address + (len(ipv4_ranges) + 2) * ipv4_row_width
+    countries_address = ipv6_address + (len(ipv6_ranges) + 2) * ipv6_row_width - 1
+
+    countries = bytearray()
+    country_pointers = {}
+    for _, country in ipv4_ranges + ipv6_ranges:
+        if country not in country_pointers:
+            country_pointers[country] = countries_address + len(countries)
+            encoded = country.encode()
+            countries += bytes([len(encoded)]) + encoded + bytes([len(encoded)]) + encoded
+
+    ipv4_rows = bytearray()
+    for start, country in ipv4_ranges + [('255.255.255.255', '-')]:
+        ipv4_rows += struct.pack('<II', int(ipaddress.IPv4Address(start)), country_pointers[country])
+    ipv4_rows += bytes(ipv4_row_width)
+
+    ipv6_rows = bytearray()
+    for start, country in ipv6_ranges + [('ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff', '-')]:
+        number = int(ipaddress.IPv6Address(start))
+        ipv6_rows += struct.pack('<QQI', number & 0xFFFFFFFFFFFFFFFF, number >> 64, country_pointers[country])
+    ipv6_rows += bytes(ipv6_row_width)
+
+    header = struct.pack(
+        '<BBBBBIIIIIIBBB',
+        1,
+        2,
+        24,
+        1,
+        1,
+        len(ipv4_ranges),
+        ipv4_address,
+        len(ipv6_ranges),
+        ipv6_address,
+        0,
+        0,
+        1,
+        1,
+        1,
+    )
+
+    with open(path, 'wb') as f:
+        f.write(header.ljust(header_size, b'\0') + ipv4_rows + ipv6_rows + countries)
+
+    return str(path)
+
+
+@pytest.fixture
+def ip2location_db_path(tmp_path):
+    return build_ip2location_db(tmp_path / 'IP2LOCATION-LITE-DB1.IPV6.BIN', IPV4_RANGES, IPV6_RANGES)
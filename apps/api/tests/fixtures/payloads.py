@@ -35,7 +35,12 @@ def expenses_distribution_parameter():
 
 
 @pytest.fixture
-def campaign_payload(campaign_name, status_mapper, expenses_distribution_parameter):
+def dimension_parameters():
+    return None
+
+
+@pytest.fixture
+def campaign_payload(campaign_name, status_mapper, expenses_distribution_parameter, dimension_parameters):
     return {
         'name': campaign_name,
         'cost_model': 'cpa',
@@ -43,6 +48,7 @@ def campaign_payload(campaign_name, status_mapper, expenses_distribution_paramet
         'currency': 'usd',
         'status_mapper': status_mapper,
         'expenses_distribution_parameter': expenses_distribution_parameter,
+        'dimension_parameters': dimension_parameters,
     }
 
 
@@ -1,6 +1,7 @@
 import base64
 import os
 import pathlib
+import shutil
 from unittest import mock
 
 import pytest
@@ -22,6 +23,14 @@ def landing_pages_base_path(tmpdir_factory):
     return str(tmpdir_factory.mktemp('landings'))
 
 
+@pytest.fixture(autouse=True)
+def cleanup_landing_pages(landing_pages_base_path):
+    yield
+
+    for name in os.listdir(landing_pages_base_path):
+        shutil.rmtree(os.path.join(landing_pages_base_path, name))
+
+
 @pytest.fixture(autouse=True)
 def mock_environment(mysql, landing_pages_base_path):
     environ = os.environ | {
@@ -56,6 +65,74 @@ def create_tables(mock_environment, mysql):
         db.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_caches(mock_environment):
+    yield
+
+    from src.alerts.services import AlertService
+    from src.container import container
+    from src.core.services import ClientService, FlowService
+    from src.core.supervisor import WorkerContext
+    from src.reports.cache import StatisticsReportCache
+    from src.tracker.counters import TrackCounters
+    from src.tracker.services import TrackService
+    from src.tracker.workers import persist_track_counters_worker
+
+    container.get(FlowService).invalidate_routing_table()
+    container.get(FlowService).invalidate_landing_page()
+    container.get(FlowService).invalidate_unmatched_clients()
+    container.get(ClientService).user_agent_cache.clear()
+    container.get(StatisticsReportCache).invalidate()
+    container.get(AlertService).reset()
+    container.get(TrackCounters).reset()
+    container.get(TrackService).invalidate_dimension_parameters()
+    # counters of a test must not be persisted into the database of the next one
+    container.get(WorkerContext).get_queue(persist_track_counters_worker).queue.clear()
+
+
+@pytest.fixture
+def pooled_database(mock_environment):
+    from src.container import container
+    from src.core.db import ReconnectPooledMySQLDatabase
+    from src.core.entities import database_proxy
+
+    # the suite runs the default unpooled database, tests of the pool swap the container one for a pooled one
+    database = ReconnectPooledMySQLDatabase(
+        container.config.get('MARIADB_DATABASE'),
+        max_connections=10,
+        user=container.config.get('MARIADB_USER'),
+        password=container.config.get('MARIADB_PASSWORD'),
+        host=container.config.get('MARIADB_HOST'),
+        port=container.config.get('MARIADB_PORT'),
+    )
+    unpooled_database = container.get(MySQLDatabase)
+    database_proxy.initialize(database)
+    try:
+        with container.override.injectable(MySQLDatabase, database):
+            yield database
+    finally:
+        database_proxy.initialize(unpooled_database)
+        database.close_all()
+
+
+@pytest.fixture
+def read_partitions(mysql):
+    def _read_partitions(table_name):
+        with mysql.cursor() as cur:
+            cur.execute(
+                """
+                SELECT PARTITION_NAME
+                FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                ORDER BY PARTITION_ORDINAL_POSITION
+                """,
+                (table_name,),
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    return _read_partitions
+
+
 @pytest.fixture
 def client():
     from src.api import app
@@ -29,6 +29,9 @@ def test_create_campaign(client, authorization, campaign_payload, read_from_db):
         'currency': request_payload['currency'],
         'expenses_distribution_parameter': None,
         'status_mapper': mock.ANY,
+        'dimension_parameters': None,
+        'materialized_dimension_parameters': None,
+        'dimension_parameters_updated_at': None,
         'created_at': mock.ANY,
     }
 
@@ -48,6 +51,8 @@ def test_campaigns_list(client, authorization, environment, campaign_payload, wr
                 'costValue': 1.0,
                 'currency': 'usd',
                 'expensesDistributionParameter': None,
+                'dimensionParameters': None,
+                'materializedDimensionParameters': None,
                 'id': index + 1,
                 'name': f'Campaign {index}',
                 'internalProcessUrl': f'{environment["INTERNAL_PROCESS_BASE_URL"]}/{index + 1}',
@@ -55,10 +60,44 @@ def test_campaigns_list(client, authorization, environment, campaign_payload, wr
             }
             for index in range(20)
         ],
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 25},
+        'pagination': {
+            'page': 1,
+            'pageSize': 20,
+            'sortBy': 'id',
+            'sortOrder': 'asc',
+            'total': 25,
+            'nextCursor': mock.ANY,
+        },
     }
 
 
+def test_campaigns_list__cursor(client, authorization, write_to_db):
+    for ci in range(5):
+        write_to_db('campaign', {'name': f'Campaign {ci}', 'cost_model': 'cpm', 'cost_value': 1, 'currency': 'usd'})
+
+    first_page = client.get(
+        '/api/v2/core/campaigns', headers={'Authorization': authorization}, query_string={'pageSize': 2}
+    ).json
+    assert [c['id'] for c in first_page['content']] == [1, 2]
+    assert first_page['pagination']['total'] == 5
+
+    query_string = {'pageSize': 2, 'cursor': first_page['pagination']['nextCursor']}
+    second_page = client.get(
+        '/api/v2/core/campaigns', headers={'Authorization': authorization}, query_string=query_string
+    )
+    assert second_page.status_code == 200, second_page.text
+    assert [c['id'] for c in second_page.json['content']] == [3, 4]
+    assert second_page.json['pagination']['total'] is None
+
+    # a cursor keeps the sort of the page it was taken from
+    response = client.get(
+        '/api/v2/core/campaigns',
+        headers={'Authorization': authorization},
+        query_string=query_string | {'sortOrder': 'desc'},
+    )
+    assert response.status_code == 400, response.text
+
+
 def test_get_campaign(client, authorization, campaign, environment):
     response = client.get(f'/api/v2/core/campaigns/{campaign["id"]}', headers={'Authorization': authorization})
 
@@ -70,6 +109,8 @@ def test_get_campaign(client, authorization, campaign, environment):
         'costValue': campaign['cost_value'],
         'currency': campaign['currency'],
         'expensesDistributionParameter': campaign['expenses_distribution_parameter'],
+        'dimensionParameters': None,
+        'materializedDimensionParameters': None,
         'internalProcessUrl': f'{environment["INTERNAL_PROCESS_BASE_URL"]}/{campaign["id"]}',
         'statusMapper': json.loads(campaign['status_mapper']),
     }
@@ -104,3 +145,36 @@ def test_update_campaign(client, authorization, campaign, read_from_db, request_
 
     campaign = read_from_db('campaign')
     assert campaign[db_key] == request_value
+
+
+def test_update_campaign__dimension_parameters(client, authorization, campaign, read_from_db):
+    response = client.patch(
+        f'/api/v2/core/campaigns/{campaign["id"]}',
+        headers={'Authorization': authorization},
+        json={'dimensionParameters': ['ad_name', 'utm_source']},
+    )
+
+    assert response.status_code == 200, response.text
+
+    campaign = read_from_db('campaign')
+    assert json.loads(campaign['dimension_parameters']) == ['ad_name', 'utm_source']
+    # reports keep parsing click parameters until the history is backfilled
+    assert json.loads(campaign['materialized_dimension_parameters']) is None
+    assert campaign['dimension_parameters_updated_at'] is not None
+
+
+@pytest.mark.parametrize(
+    'dimension_parameters_payload',
+    [['ad_name', 'ad_name'], ['ad_name', 'utm_source', 'utm_medium', 'utm_campaign'], ['']],
+)
+def test_update_campaign__invalid_dimension_parameters(
+    client, authorization, campaign, read_from_db, dimension_parameters_payload
+):
+    response = client.patch(
+        f'/api/v2/core/campaigns/{campaign["id"]}',
+        headers={'Authorization': authorization},
+        json={'dimensionParameters': dimension_parameters_payload},
+    )
+
+    assert response.status_code == 422, response.text
+    assert read_from_db('campaign')['dimension_parameters'] is None
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def _pooled_database(max_connections, timeout):
+    from src.container import container
+    from src.core.db import ReconnectPooledMySQLDatabase
+
+    return ReconnectPooledMySQLDatabase(
+        container.config.get('MARIADB_DATABASE'),
+        max_connections=max_connections,
+        timeout=timeout,
+        user=container.config.get('MARIADB_USER'),
+        password=container.config.get('MARIADB_PASSWORD'),
+        host=container.config.get('MARIADB_HOST'),
+        port=container.config.get('MARIADB_PORT'),
+    )
+
+
+def test_request__checks_connection_back_in(client, campaign, authorization, pooled_database):
+    from peewee import MySQLDatabase
+
+    from src.container import container
+
+    response = client.get(f'/api/v2/core/campaigns/{campaign["id"]}', headers={'Authorization': authorization})
+
+    assert response.status_code == 200, response.text
+    assert container.get(MySQLDatabase) is pooled_database
+    assert pooled_database.is_closed()
+    assert pooled_database.pool_stats().checkouts_count > 0
+
+
+def test_pooled_database__waits_for_released_connection():
+    from playhouse.pool import MaxConnectionsExceeded
+
+    database = _pooled_database(max_connections=1, timeout=0.1)
+
+    def select_one():
+        try:
+            return database.execute_sql('SELECT 1').fetchone()[0]
+        finally:
+            database.close()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        try:
+            database.connect()
+            with pytest.raises(MaxConnectionsExceeded):
+                executor.submit(select_one).result()
+
+            stats = database.pool_stats()
+            assert (stats.in_use_count, stats.waits_count, stats.timeouts_count) == (1, 1, 1)
+            assert stats.wait_ms_max >= 100
+        finally:
+            database.close()
+
+        assert executor.submit(select_one).result() == 1
+
+    stats = database.pool_stats()
+    assert (stats.in_use_count, stats.idle_count, stats.checkouts_count) == (0, 1, 3)
+    database.close_all()
@@ -87,7 +87,14 @@ def test_flows_list(client, authorization, campaign, flow_rule, write_to_db):
             }
             for index in range(20)
         ],
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 25},
+        'pagination': {
+            'page': 1,
+            'pageSize': 20,
+            'sortBy': 'id',
+            'sortOrder': 'asc',
+            'total': 25,
+            'nextCursor': mock.ANY,
+        },
     }
 
 
@@ -145,7 +152,7 @@ def test_flows_list__filters_by_campaign(client, authorization, campaign, campai
             }
             for index in range(3)
         ],
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 3},
+        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 3, 'nextCursor': None},
     }
 
 
@@ -235,7 +242,14 @@ def test_flows_list__ordered_by_order_value_desc(client, authorization, campaign
                 'isEnabled': second['is_enabled'],
             },
         ],
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'orderValue', 'sortOrder': 'desc', 'total': 3},
+        'pagination': {
+            'page': 1,
+            'pageSize': 20,
+            'sortBy': 'orderValue',
+            'sortOrder': 'desc',
+            'total': 3,
+            'nextCursor': None,
+        },
     }
 
 
@@ -263,7 +277,7 @@ def test_flows_list__filter_out_deleted(client, authorization, campaign, flow_ru
     assert response.status_code == 200, response.text
     assert response.json == {
         'content': [],
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 0},
+        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 0, 'nextCursor': None},
     }
 
 
@@ -0,0 +1,64 @@
+import pytest
+
+from src.core.services import Ip2LocationLocator, Ip2LocationMemoryLocator
+
+ADDRESSES = [
+    '1.2.3.4',
+    '5.2.255.255',
+    '5.3.0.0',
+    '8.8.8.8',
+    '8.8.9.1',
+    '100.1.1.1',
+    '224.0.0.1',
+    '255.255.255.255',
+    '::ffff:5.2.1.1',
+    '2002:0502:0101::1',
+    '2001:db8::1',
+    '2001:db8:0:0:7fff::1',
+    '2001:db8:0:0:8000::',
+    '2001:db8:1::',
+    '2001:db9::1',
+    '2a00:1450:4001::1',
+    '::1',
+    'not an address',
+]
+
+
+@pytest.mark.parametrize('address', ADDRESSES)
+def test_memory_locator__matches_file_locator(ip2location_db_path, address):
+    file_locator = Ip2LocationLocator(ip2location_db_path)
+    memory_locator = Ip2LocationMemoryLocator(ip2location_db_path, cache_size=16)
+
+    assert memory_locator.get_country(address) == file_locator.get_country(address)
+
+
+def test_memory_locator__get_countries(ip2location_db_path):
+    memory_locator = Ip2LocationMemoryLocator(ip2location_db_path, cache_size=16)
+
+    assert memory_locator.get_countries(['5.2.0.1', '2001:db8:0:0:8000::1', '8.8.9.1', 'not an address']) == {
+        '5.2.0.1': 'MD',
+        '2001:db8:0:0:8000::1': 'FR',
+        '8.8.9.1': None,
+        'not an address': None,
+    }
+
+
+def test_memory_locator__caches_recent_addresses(ip2location_db_path):
+    memory_locator = Ip2LocationMemoryLocator(ip2location_db_path, cache_size=16)
+
+    assert memory_locator.get_country('5.2.0.1') == 'MD'
+    assert memory_locator.get_country('5.2.0.1') == 'MD'
+    assert memory_locator.get_country('8.8.9.1') is None
+    assert memory_locator.get_country('8.8.9.1') is None
+
+    assert memory_locator.cache.stats() == {'size': 2, 'maxsize': 16, 'hits': 2, 'misses': 2, 'evictions': 0}
+
+
+def test_memory_locator__invalid_database(tmp_path):
+    path = tmp_path / 'broken.BIN'
+    path.write_bytes(b'not a database')
+
+    memory_locator = Ip2LocationMemoryLocator(str(path), cache_size=16)
+
+    assert memory_locator.get_country('5.2.0.1') is None
+    assert memory_locator.get_countries(['5.2.0.1']) == {'5.2.0.1': None}
@@ -18,7 +18,14 @@ class TestAdCabinet:
                 }
             ],
             'filters': {'partialName': None},
-            'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1},
+            'pagination': {
+                'page': 1,
+                'pageSize': 20,
+                'sortBy': 'id',
+                'sortOrder': 'asc',
+                'total': 1,
+                'nextCursor': None,
+            },
         }
 
     def test_get_ad_cabinets__filters_by_partial_name(self, client, authorization, write_to_db):
@@ -53,7 +60,14 @@ class TestAdCabinet:
                 },
             ],
             'filters': {'partialName': 'Alp'},
-            'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 2},
+            'pagination': {
+                'page': 1,
+                'pageSize': 20,
+                'sortBy': 'id',
+                'sortOrder': 'asc',
+                'total': 2,
+                'nextCursor': None,
+            },
         }
 
     def test_create_ad_cabinet(self, client, authorization, ad_cabinet_name, read_from_db):
@@ -1,3 +1,6 @@
+from unittest import mock
+
+
 class TestAlerts:
     def test_get_alerts__business_portfolio_without_access_urls(self, client, authorization, business_portfolio):
         response = client.get('/api/v2/alerts', headers={'Authorization': authorization})
@@ -15,7 +18,8 @@ class TestAlerts:
                         'businessPortfolioName': business_portfolio['name'],
                     },
                 }
-            ]
+            ],
+            'computedAt': mock.ANY,
         }
 
     def test_get_alerts__business_portfolio_with_only_expired_access_urls(
@@ -56,7 +60,8 @@ class TestAlerts:
                         'businessPortfolioName': business_portfolio['name'],
                     },
                 }
-            ]
+            ],
+            'computedAt': mock.ANY,
         }
 
     def test_get_alerts__business_portfolio_with_one_expiring_soon_access_url(
@@ -107,7 +112,8 @@ class TestAlerts:
                         'businessPortfolioName': business_portfolio['name'],
                     },
                 }
-            ]
+            ],
+            'computedAt': mock.ANY,
         }
 
     def test_get_alerts__business_portfolio_with_one_in_date_access_url(
@@ -146,7 +152,7 @@ class TestAlerts:
         response = client.get('/api/v2/alerts', headers={'Authorization': authorization})
 
         assert response.status_code == 200, response.text
-        assert response.json == {'content': []}
+        assert response.json == {'content': [], 'computedAt': mock.ANY}
 
     def test_get_alerts__business_portfolio_with_expiring_soon_and_in_date_access_urls(
         self, client, authorization, business_portfolio, timestamp, write_to_db
@@ -194,4 +200,4 @@ class TestAlerts:
         response = client.get('/api/v2/alerts', headers={'Authorization': authorization})
 
         assert response.status_code == 200, response.text
-        assert response.json == {'content': []}
+        assert response.json == {'content': [], 'computedAt': mock.ANY}
@@ -8,7 +8,7 @@ def test_get_business_pages(client, authorization, business_page):
     assert response.json == {
         'content': [{'id': business_page['id'], 'name': business_page['name'], 'isBanned': business_page['is_banned']}],
         'filters': {'partialName': None},
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1},
+        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1, 'nextCursor': None},
     }
 
 
@@ -34,7 +34,7 @@ def test_get_business_pages__filters_by_partial_name(client, authorization, writ
             {'id': alphanumeric['id'], 'name': alphanumeric['name'], 'isBanned': alphanumeric['is_banned']},
         ],
         'filters': {'partialName': 'Alp'},
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 2},
+        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 2, 'nextCursor': None},
     }
 
 
@@ -19,7 +19,14 @@ class TestBusinessPortfolio:
                 }
             ],
             'filters': {'partialName': None},
-            'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1},
+            'pagination': {
+                'page': 1,
+                'pageSize': 20,
+                'sortBy': 'id',
+                'sortOrder': 'asc',
+                'total': 1,
+                'nextCursor': None,
+            },
         }
 
     def test_get_business_portfolios__filters_by_partial_name(self, client, authorization, write_to_db):
@@ -61,7 +68,14 @@ class TestBusinessPortfolio:
                 },
             ],
             'filters': {'partialName': 'Alp'},
-            'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 2},
+            'pagination': {
+                'page': 1,
+                'pageSize': 20,
+                'sortBy': 'id',
+                'sortOrder': 'asc',
+                'total': 2,
+                'nextCursor': None,
+            },
         }
 
     def test_create_business_portfolio(self, client, authorization, business_portfolio_name, read_from_db):
@@ -293,7 +307,14 @@ class TestBusinessPortfolioManageAccessUrls:
                     'expiresAt': date.fromtimestamp(access_url['expires_at']).isoformat(),
                 }
             ],
-            'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1},
+            'pagination': {
+                'page': 1,
+                'pageSize': 20,
+                'sortBy': 'id',
+                'sortOrder': 'asc',
+                'total': 1,
+                'nextCursor': None,
+            },
         }
 
     def test_create_access_url(self, client, authorization, business_portfolio, read_from_db):
@@ -21,7 +21,7 @@ def test_get_campaigns(client, authorization, campaign, campaign_fa):
                 'executor': {'id': campaign_fa['executor_id'], 'isBanned': mock.ANY, 'name': mock.ANY},
             }
         ],
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1},
+        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1, 'nextCursor': None},
     }
 
 
@@ -51,6 +51,9 @@ def test_create_campaign(client, authorization, ad_cabinet, executor, business_p
         'currency': request_payload['currency'],
         'status_mapper': mock.ANY,
         'expenses_distribution_parameter': None,
+        'dimension_parameters': None,
+        'materialized_dimension_parameters': None,
+        'dimension_parameters_updated_at': None,
         'created_at': mock.ANY,
     }
     assert json.loads(core_campaign['status_mapper']) == request_payload['statusMapper']
@@ -125,6 +128,9 @@ def test_update_campaign(client, authorization, campaign_fa, ad_cabinet, executo
         'currency': request_payload['currency'],
         'status_mapper': mock.ANY,
         'expenses_distribution_parameter': mock.ANY,
+        'dimension_parameters': mock.ANY,
+        'materialized_dimension_parameters': mock.ANY,
+        'dimension_parameters_updated_at': None,
         'created_at': mock.ANY,
     }
     assert json.loads(core_campaign['status_mapper']) == request_payload['statusMapper']
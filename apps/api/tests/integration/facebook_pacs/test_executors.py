@@ -8,7 +8,7 @@ def test_get_executors(client, authorization, executor, read_from_db):
     assert response.json == {
         'content': [{'id': executor['id'], 'name': executor['name'], 'isBanned': executor['is_banned']}],
         'filters': {'partialName': None},
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1},
+        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 1, 'nextCursor': None},
     }
 
 
@@ -32,7 +32,7 @@ def test_get_executors__filters_by_partial_name(client, authorization, write_to_
             {'id': alphanumeric['id'], 'name': alphanumeric['name'], 'isBanned': alphanumeric['is_banned']},
         ],
         'filters': {'partialName': 'Alp'},
-        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 2},
+        'pagination': {'page': 1, 'pageSize': 20, 'sortBy': 'id', 'sortOrder': 'asc', 'total': 2, 'nextCursor': None},
     }
 
 
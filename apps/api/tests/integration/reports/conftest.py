@@ -46,7 +46,19 @@ def postback_parameters():
 
 
 @pytest.fixture
-def statistics_clicks(write_to_db, campaign, click_parameters, postback_parameters, timestamp):
+def refresh_report_leads(read_from_db):
+    # brings report_lead up to date with the written postbacks, as the report leads worker does
+    def _refresh_report_leads():
+        from src.reports.workers import _upsert_report_leads_for_postbacks
+
+        postbacks = read_from_db('track_postback', ['click_id'], fetchall=True)
+        _upsert_report_leads_for_postbacks({postback['click_id'] for postback in postbacks})
+
+    return _refresh_report_leads
+
+
+@pytest.fixture
+def statistics_clicks(write_to_db, campaign, click_parameters, postback_parameters, timestamp, refresh_report_leads):
     clicks = []
 
     # ad_1 10 clicks, no leads 2 days ago
@@ -297,6 +309,7 @@ def statistics_clicks(write_to_db, campaign, click_parameters, postback_paramete
         },
     )
 
+    refresh_report_leads()
     return clicks
 
 
@@ -0,0 +1,151 @@
+import json
+from datetime import timedelta
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+
+@pytest.fixture
+def dimension_parameters():
+    return ['ad_name', 'utm_source']
+
+
+@pytest.fixture
+def backfill_click_dimensions(campaign):
+    def _backfill_click_dimensions():
+        from src.api import app
+
+        result = app.test_cli_runner().invoke(args=['backfill-click-dimensions', str(campaign['id'])])
+        assert result.exit_code == 0, result.output
+        return result
+
+    return _backfill_click_dimensions
+
+
+@pytest.fixture
+def clicks_without_parameters(write_to_db, campaign, timestamp):
+    return [
+        write_to_db(
+            'track_click',
+            {'click_id': uuid4(), 'campaign_id': campaign['id'], 'parameters': {}, 'created_at': timestamp - 60},
+        )
+        for _ in range(3)
+    ]
+
+
+def test_backfill_click_dimensions(campaign, statistics_clicks, read_from_db, backfill_click_dimensions):
+    result = backfill_click_dimensions()
+
+    assert f'Backfilled {len(statistics_clicks)} clicks' in result.output
+
+    for click in read_from_db('track_click', fetchall=True):
+        parameters = json.loads(click['parameters'])
+        assert click['has_parameters'] == 1
+        assert click['dimension_1'] == parameters['ad_name']
+        assert click['dimension_2'] == parameters['utm_source']
+        assert click['dimension_3'] is None
+
+    campaign = read_from_db('campaign')
+    assert json.loads(campaign['materialized_dimension_parameters']) == ['ad_name', 'utm_source']
+
+
+def test_backfill_click_dimensions__spans_campaign_clicks_only(campaign, write_to_db, read_from_db):
+    from src.api import app
+
+    def write_click(campaign_id):
+        return write_to_db(
+            'track_click', {'click_id': uuid4(), 'campaign_id': campaign_id, 'parameters': {'ad_name': 'a1'}}
+        )
+
+    write_click(campaign['id'] + 1)
+    first_click = write_click(campaign['id'])
+    write_click(campaign['id'] + 1)
+    last_click = write_click(campaign['id'])
+    write_click(campaign['id'] + 1)
+
+    with mock.patch('src.tracker.dimensions.logger') as logger:
+        result = app.test_cli_runner().invoke(
+            args=['backfill-click-dimensions', str(campaign['id']), '--batch-size', '1']
+        )
+
+    assert result.exit_code == 0, result.output
+    assert 'Backfilled 2 clicks' in result.output
+    last_ids = [call.kwargs['extra']['last_id'] for call in logger.info.call_args_list]
+    assert last_ids == list(range(first_click['id'], last_click['id'] + 1))
+    dimensions = {click['id']: click['dimension_1'] for click in read_from_db('track_click', fetchall=True)}
+    assert [dimensions.pop(first_click['id']), dimensions.pop(last_click['id'])] == ['a1', 'a1']
+    assert set(dimensions.values()) == {None}
+
+
+@pytest.mark.parametrize('dimension_parameters', [None])
+def test_backfill_click_dimensions__without_dimension_parameters(campaign):
+    from src.api import app
+
+    result = app.test_cli_runner().invoke(args=['backfill-click-dimensions', str(campaign['id'])])
+
+    assert result.exit_code != 0
+    assert f'Campaign {campaign["id"]} has no dimension parameters' in result.output
+
+
+def test_leads_statistics_query__groups_by_dimension_columns(campaign, today):
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    parameters = {
+        'campaign_id': campaign['id'],
+        'period_start': today,
+        'period_end': today,
+        'group_parameters': ['ad_name', 'adset_name'],
+        'skip_clicks_without_parameters': True,
+        'dimension_parameters': ['ad_name', 'utm_source'],
+    }
+    sql, params = container.get(StatisticsReportRepository)._leads_statistics_query(parameters).sql()
+
+    assert '`dimension_1` AS `ad_name`' in sql
+    assert sql.count('json_value') == 1
+    assert '$.adset_name' in params
+    assert '`has_parameters`' in sql
+    assert 'json_length' not in sql
+
+
+@pytest.mark.parametrize('skip_clicks_without_parameters', [False, True])
+@pytest.mark.parametrize('group_parameters', ['ad_name', 'utm_source,ad_name', 'ad_name,adset_name'])
+def test_get_report__dimension_columns_match_parameters(
+    client,
+    authorization,
+    campaign,
+    today,
+    statistics_expenses,
+    clicks_without_parameters,
+    backfill_click_dimensions,
+    group_parameters,
+    skip_clicks_without_parameters,
+):
+    from src.container import container
+    from src.reports.cache import StatisticsReportCache
+    from src.reports.repositories import StatisticsReportRepository
+
+    def get_report():
+        container.get(StatisticsReportCache).invalidate()
+        # closed days are read from the rollup otherwise
+        with mock.patch.object(container.get(StatisticsReportRepository), '_daily_stats_until', return_value=None):
+            response = client.get(
+                '/api/v2/reports/statistics',
+                headers={'Authorization': authorization},
+                query_string={
+                    'campaignId': campaign['id'],
+                    'periodStart': (today - timedelta(days=5)).isoformat(),
+                    'periodEnd': today.isoformat(),
+                    'groupParameters': group_parameters,
+                    'skipClicksWithoutParameters': skip_clicks_without_parameters,
+                },
+            )
+
+        assert response.status_code == 200, response.text
+        return response.json
+
+    parsed_parameters = get_report()
+    backfill_click_dimensions()
+
+    assert get_report() == parsed_parameters
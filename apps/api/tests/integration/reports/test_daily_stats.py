@@ -0,0 +1,147 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from time import sleep
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+
+@pytest.fixture
+def refresh_report_daily_stats(monkeypatch):
+    monkeypatch.setattr('src.reports.workers.DAILY_STATS_PERIOD_SECONDS', 0.1)
+
+    def _refresh_report_daily_stats():
+        sleep(0.3)
+
+    return _refresh_report_daily_stats
+
+
+def _get_report(client, authorization, campaign, today, group_parameters=None):
+    query_string = {
+        'campaignId': campaign['id'],
+        'periodStart': (today - timedelta(days=4)).isoformat(),
+        'periodEnd': today.isoformat(),
+    }
+    if group_parameters:
+        query_string['groupParameters'] = group_parameters
+
+    response = client.get(
+        '/api/v2/reports/statistics', headers={'Authorization': authorization}, query_string=query_string
+    )
+    assert response.status_code == 200, response.text
+    return response.json
+
+
+def test_refresh_report_daily_stats_worker__rolls_up_clicks_and_leads(
+    client, campaign, statistics_clicks, refresh_report_daily_stats, read_from_db
+):
+    refresh_report_daily_stats()
+
+    rows = read_from_db('report_daily_stats', filters={'campaign_id': campaign['id']}, fetchall=True)
+    clicks_by_date = Counter()
+    for row in rows:
+        clicks_by_date[row['date'].isoformat()] += row['clicks']
+
+    expected_clicks_by_date = Counter(
+        datetime.fromtimestamp(click['created_at']).date().isoformat() for click in statistics_clicks
+    )
+    assert clicks_by_date == expected_clicks_by_date
+    assert sum(row['leads_accept'] for row in rows) == 3
+    assert sum(row['leads_expect'] for row in rows) == 1
+    assert sum(row['leads_reject'] for row in rows) == 1
+    assert sum(row['leads_trash'] for row in rows) == 1
+
+    watermarks = read_from_db('report_watermark', fetchall=True)
+    assert {
+        watermark['name']: watermark['value']
+        for watermark in watermarks
+        if watermark['name'].startswith('report_daily_stats.')
+    } == {
+        'report_daily_stats.track_click': max(click['id'] for click in statistics_clicks),
+        'report_daily_stats.track_postback': 6,
+    }
+
+
+@pytest.mark.parametrize('group_parameters', [None, 'ad_name', 'utm_source,ad_name'])
+def test_get_report__daily_stats_match_raw_statistics(
+    client, authorization, campaign, statistics_expenses, today, refresh_report_daily_stats, group_parameters
+):
+    from src.container import container
+    from src.reports.cache import StatisticsReportCache
+    from src.reports.repositories import StatisticsReportRepository
+
+    with mock.patch.object(container.get(StatisticsReportRepository), '_daily_stats_until', return_value=None):
+        raw_report = _get_report(client, authorization, campaign, today, group_parameters)
+
+    refresh_report_daily_stats()
+    container.get(StatisticsReportCache).invalidate()
+
+    assert _get_report(client, authorization, campaign, today, group_parameters) == raw_report
+
+
+def test_get_report__scans_raw_tables_only_for_days_after_daily_stats(
+    client, authorization, campaign, statistics_expenses, today, refresh_report_daily_stats
+):
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    repository = container.get(StatisticsReportRepository)
+    refresh_report_daily_stats()
+
+    with mock.patch.object(repository, '_leads_statistics', wraps=repository._leads_statistics) as leads_statistics:
+        _get_report(client, authorization, campaign, today, 'ad_name')
+
+    leads_statistics.assert_called_once()
+    assert leads_statistics.call_args.args[0]['period_start'] == today
+
+
+def test_get_report__pending_clicks_are_read_from_raw_tables(
+    client,
+    authorization,
+    campaign,
+    statistics_expenses,
+    today,
+    timestamp,
+    click_parameters,
+    refresh_report_daily_stats,
+    write_to_db,
+    monkeypatch,
+):
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    refresh_report_daily_stats()
+    monkeypatch.setattr('src.reports.workers.DAILY_STATS_PERIOD_SECONDS', 60 * 60)
+
+    # a click the rollup worker has not seen yet makes its day and the following ones fall back to raw tables
+    write_to_db(
+        'track_click',
+        {
+            'click_id': uuid4(),
+            'campaign_id': campaign['id'],
+            'parameters': click_parameters,
+            'created_at': timestamp - timedelta(days=2).total_seconds(),
+        },
+    )
+
+    repository = container.get(StatisticsReportRepository)
+    with mock.patch.object(repository, '_leads_statistics', wraps=repository._leads_statistics) as leads_statistics:
+        _get_report(client, authorization, campaign, today, 'ad_name')
+
+    assert leads_statistics.call_args_list[0].args[0]['period_start'] == today - timedelta(days=2)
+
+
+def test_get_report__group_parameter_outside_of_daily_stats_is_read_from_raw_tables(
+    client, authorization, campaign, statistics_expenses, today, refresh_report_daily_stats
+):
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    repository = container.get(StatisticsReportRepository)
+    refresh_report_daily_stats()
+
+    with mock.patch.object(repository, '_daily_stats', wraps=repository._daily_stats) as daily_stats:
+        _get_report(client, authorization, campaign, today, 'fbclid')
+
+    daily_stats.assert_not_called()
@@ -122,7 +122,14 @@ class TestExpensesReport:
                     'distribution': json.loads(date_end_expenses['distribution']),
                 },
             ],
-            'pagination': {'page': 1, 'pageSize': 10, 'sortBy': 'date', 'sortOrder': 'asc', 'total': 2},
+            'pagination': {
+                'page': 1,
+                'pageSize': 10,
+                'sortBy': 'date',
+                'sortOrder': 'asc',
+                'total': 2,
+                'nextCursor': None,
+            },
             'filters': {
                 'campaignId': campaign['id'],
                 'periodStart': date_start.isoformat(),
@@ -184,7 +191,14 @@ class TestExpensesReport:
                 {'date': yesterday.isoformat(), 'distribution': {}},
                 {'date': today.isoformat(), 'distribution': {}},
             ],
-            'pagination': {'page': 1, 'pageSize': 10, 'sortBy': 'date', 'sortOrder': 'asc', 'total': 0},
+            'pagination': {
+                'page': 1,
+                'pageSize': 10,
+                'sortBy': 'date',
+                'sortOrder': 'asc',
+                'total': 0,
+                'nextCursor': None,
+            },
             'filters': {
                 'campaignId': campaign['id'],
                 'periodStart': yesterday.isoformat(),
@@ -215,7 +229,14 @@ class TestExpensesReport:
             'content': [  # default template is returned, no default distribution
                 {'date': today.isoformat(), 'distribution': {}}
             ],
-            'pagination': {'page': 1, 'pageSize': 10, 'sortBy': 'date', 'sortOrder': 'asc', 'total': 0},
+            'pagination': {
+                'page': 1,
+                'pageSize': 10,
+                'sortBy': 'date',
+                'sortOrder': 'asc',
+                'total': 0,
+                'nextCursor': None,
+            },
             'filters': {
                 'campaignId': campaign['id'],
                 'periodStart': today.isoformat(),
@@ -1,3 +1,5 @@
+from time import sleep
+
 from fixtures.utils import click_uuid
 
 
@@ -47,3 +49,108 @@ def test_get_expenses_distribution_parameter_values(client, authorization, campa
 
     assert response.status_code == 200, response.text
     assert response.json == [{'value': 'fb'}, {'value': 'ig'}]
+
+
+def test_get_expenses_distribution_parameter_values__prefix_and_limit(client, authorization, campaign, write_to_db):
+    for index, ad_name in enumerate(['ad_3', 'Ad_1', 'ad_1', 'ad_2', 'banner']):
+        write_to_db(
+            'track_click',
+            {'click_id': click_uuid(index), 'campaign_id': campaign['id'], 'parameters': {'ad_name': ad_name}},
+        )
+
+    response = client.get(
+        '/api/v2/reports/helpers/expenses-distribution-parameter-values',
+        query_string={'campaignId': campaign['id'], 'parameter': 'ad_name', 'prefix': 'ad_', 'limit': 2},
+        headers={'Authorization': authorization},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json == [{'value': 'ad_1'}, {'value': 'ad_2'}]
+
+
+def test_get_expenses_distribution_parameter_values__values_the_catalog_can_not_hold(
+    client, authorization, campaign, write_to_db
+):
+    long_value = 'a' * 256
+    for index, ad_name in enumerate(['a1', long_value, None, {'id': 1}]):
+        write_to_db(
+            'track_click',
+            {'click_id': click_uuid(index), 'campaign_id': campaign['id'], 'parameters': {'ad_name': ad_name}},
+        )
+
+    response = client.get(
+        '/api/v2/reports/helpers/expenses-distribution-parameter-values',
+        query_string={'campaignId': campaign['id'], 'parameter': 'ad_name'},
+        headers={'Authorization': authorization},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json == [{'value': None}, {'value': 'a1'}, {'value': long_value}, {'value': '{"id": 1}'}]
+
+
+def test_get_expenses_distribution_parameters__names_the_catalog_can_not_hold(
+    client, authorization, campaign, write_to_db
+):
+    long_name = 'p' * 256
+    write_to_db(
+        'track_click',
+        {'click_id': click_uuid(1), 'campaign_id': campaign['id'], 'parameters': {'utm_source': None}},
+    )
+    write_to_db(
+        'track_click',
+        {'click_id': click_uuid(2), 'campaign_id': campaign['id'], 'parameters': {long_name: 'value'}},
+    )
+
+    response = client.get(
+        '/api/v2/reports/helpers/expenses-distribution-parameters',
+        query_string={'campaignId': campaign['id']},
+        headers={'Authorization': authorization},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json == [{'parameter': long_name}, {'parameter': 'utm_source'}]
+
+
+def test_refresh_parameter_catalog_worker__folds_clicks(
+    client, authorization, campaign, write_to_db, read_from_db, timestamp, monkeypatch
+):
+    monkeypatch.setattr('src.reports.workers.PARAMETER_CATALOG_PERIOD_SECONDS', 0.1)
+
+    for index, (utm_source, created_at) in enumerate(
+        [('fb', timestamp - 20), ('fb', timestamp - 10), ('ig', timestamp)]
+    ):
+        write_to_db(
+            'track_click',
+            {
+                'click_id': click_uuid(index),
+                'campaign_id': campaign['id'],
+                'parameters': {'utm_source': utm_source, 'ad_name': 'a' * 256},
+                'created_at': created_at,
+            },
+        )
+
+    sleep(0.3)
+
+    catalog = read_from_db('track_parameter_catalog', fetchall=True)
+    assert sorted((row['parameter'], row['value'], row['is_raw'], row['count']) for row in catalog) == [
+        ('ad_name', '', 1, 3),
+        ('utm_source', 'fb', 0, 2),
+        ('utm_source', 'ig', 0, 1),
+    ]
+    fb = next(row for row in catalog if row['value'] == 'fb')
+    assert (fb['first_seen_at'], fb['last_seen_at']) == (timestamp - 20, timestamp - 10)
+
+    # clicks after the catalog watermark are merged into the lookups until the worker folds them
+    write_to_db(
+        'track_click',
+        {'click_id': click_uuid(3), 'campaign_id': campaign['id'], 'parameters': {'utm_source': 'tt'}},
+    )
+
+    response = client.get(
+        '/api/v2/reports/helpers/expenses-distribution-parameter-values',
+        query_string={'campaignId': campaign['id'], 'parameter': 'utm_source'},
+        headers={'Authorization': authorization},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json == [{'value': 'fb'}, {'value': 'ig'}, {'value': 'tt'}]
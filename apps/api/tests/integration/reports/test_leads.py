@@ -93,10 +93,85 @@ class TestGetLeads:
                     'createdAt': mock.ANY,
                 },
             ],
-            'pagination': {'page': 1, 'pageSize': 10, 'sortBy': 'createdAt', 'sortOrder': 'desc', 'total': 3},
+            'pagination': {
+                'page': 1,
+                'pageSize': 10,
+                'sortBy': 'createdAt',
+                'sortOrder': 'desc',
+                'total': 3,
+                'nextCursor': None,
+            },
             'filters': {'campaignId': 1},
         }
 
+    @pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+    def test_get_leads__cursor(self, client, authorization, campaign, timestamp, write_to_db, sort_order):
+        # leads of the same click time are ordered by id, so pages neither repeat nor skip them
+        report_leads = [
+            write_to_db(
+                'report_lead',
+                {
+                    'click_id': click_uuid(index),
+                    'campaign_id': campaign['id'],
+                    'click_created_at': timestamp - index // 3,
+                    'status': 'accept',
+                    'cost_value': 10,
+                    'currency': 'usd',
+                },
+            )
+            for index in range(7)
+        ]
+        expected = sorted(report_leads, key=lambda lead: (lead['click_created_at'], lead['id']))
+        if sort_order == 'desc':
+            expected.reverse()
+
+        pages = []
+        query_string = {'campaignId': campaign['id'], 'pageSize': 3, 'sortBy': 'createdAt', 'sortOrder': sort_order}
+        while True:
+            response = client.get(
+                '/api/v2/reports/leads', headers={'Authorization': authorization}, query_string=query_string
+            )
+            assert response.status_code == 200, response.text
+            pages.append(response.json)
+
+            next_cursor = response.json['pagination']['nextCursor']
+            if next_cursor is None:
+                break
+            query_string = query_string | {'cursor': next_cursor}
+
+        assert [len(page['content']) for page in pages] == [3, 3, 1]
+        assert [page['pagination']['total'] for page in pages] == [7, None, None]
+        assert [lead['clickId'] for page in pages for lead in page['content']] == [
+            str(lead['click_id']) for lead in expected
+        ]
+
+    @pytest.mark.parametrize(
+        'cursor',
+        [
+            'not-a-cursor',
+            ['click_created_at', 'desc', 1],
+            ['click_created_at', 'desc', {'value': 1}, 1],
+            ['click_created_at', 'desc', [1], 1],
+            ['click_created_at', 'desc', 1, '1'],
+            ['click_created_at', 'desc', 1, None],
+            ['click_created_at', 'desc', 1, True],
+        ],
+    )
+    def test_get_leads__invalid_cursor(self, client, authorization, campaign, cursor):
+        from src.core.pagination import encode_cursor
+
+        response = client.get(
+            '/api/v2/reports/leads',
+            headers={'Authorization': authorization},
+            query_string={
+                'campaignId': campaign['id'],
+                'cursor': cursor if isinstance(cursor, str) else encode_cursor(cursor),
+            },
+        )
+
+        assert response.status_code == 400, response.text
+        assert response.json == {'message': 'Invalid pagination cursor'}
+
 
 class TestGetLead:
     def test_get_lead(self, client, authorization, campaign, timestamp, write_to_db):
@@ -196,7 +271,6 @@ class TestReportLeadWorker:
     @pytest.fixture(autouse=True)
     def mock_report_lead_worker_settings(self, monkeypatch):
         monkeypatch.setattr('src.reports.workers.AGGREGATION_PERIOD_SECONDS', 0.1)
-        monkeypatch.setattr('src.reports.workers.MIN_QUEUE_SIZE', 1)
 
     def test_track_click__does_not_create_report_lead(self, client, campaign, read_from_db):
         click_id = uuid4()
@@ -410,3 +484,61 @@ class TestReportLeadWorker:
             'cost_value': campaign['cost_value'],  # cost value is updated
             'currency': campaign['currency'],  # currency is updated
         }
+
+    def test_track_postback__keeps_report_lead_outbox_until_refreshed(
+        self, client, authorization, campaign, timestamp, write_to_db, read_from_db
+    ):
+        click_id = uuid4()
+        write_to_db(
+            'track_click',
+            {'click_id': click_id, 'campaign_id': campaign['id'], 'parameters': {}, 'created_at': timestamp - 20},
+        )
+
+        # the worker is held back, as if the process was restarted before it picked the postback up
+        with mock.patch('src.reports.workers._refresh_report_leads_chunk', return_value=0):
+            client.post('/api/v2/track/postback', json={'clickId': str(click_id), 'state': 'executed'})
+            sleep(0.3)
+
+            assert read_from_db('report_lead') is None
+            assert read_from_db('report_lead_outbox') == {
+                'id': mock.ANY,
+                'created_at': mock.ANY,
+                'click_id': click_id,
+                'source': 'postback',
+            }
+
+            response = client.get('/api/v2/reports/leads/outbox', headers={'Authorization': authorization})
+            assert response.status_code == 200, response.text
+            assert response.json == {'content': {'backlog': 1, 'lagSeconds': mock.ANY}}
+
+        sleep(0.3)
+
+        assert read_from_db('report_lead_outbox') is None
+        assert read_from_db('report_lead')['status'] == 'accept'
+
+        response = client.get('/api/v2/reports/leads/outbox', headers={'Authorization': authorization})
+        assert response.json == {'content': {'backlog': 0, 'lagSeconds': 0}}
+
+    def test_report_lead_outbox__is_claimed_in_chunks(
+        self, client, campaign, timestamp, write_to_db, read_from_db, monkeypatch
+    ):
+        monkeypatch.setattr('src.reports.workers.REPORT_LEAD_OUTBOX_CHUNK_SIZE', 2)
+
+        click_ids = [uuid4() for _ in range(3)]
+        for click_id in click_ids:
+            write_to_db(
+                'track_click',
+                {'click_id': click_id, 'campaign_id': campaign['id'], 'parameters': {}, 'created_at': timestamp - 20},
+            )
+            write_to_db('track_postback', {'click_id': click_id, 'status': 'accept', 'parameters': {}})
+            # the same click refreshed twice ends up in a single report_lead row
+            for _ in range(2):
+                write_to_db('report_lead_outbox', {'click_id': click_id, 'source': 'postback'})
+
+        monkeypatch.setattr('src.reports.workers.AGGREGATION_PERIOD_SECONDS', 0.1)
+        sleep(0.5)
+
+        assert read_from_db('report_lead_outbox') is None
+        report_leads = read_from_db('report_lead', fetchall=True)
+        assert sorted(report_lead['click_id'] for report_lead in report_leads) == sorted(click_ids)
+        assert {report_lead['status'] for report_lead in report_leads} == {'accept'}
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+
+@pytest.fixture
+def read_replica():
+    from peewee import MySQLDatabase
+
+    from src.container import container
+    from src.core.db import ReadReplica, ReconnectMySQLDatabase
+
+    # any second connection stands in for a replica, it is not replicating so it never lags
+    replica = ReconnectMySQLDatabase(
+        container.config.get('MARIADB_DATABASE'),
+        user=container.config.get('MARIADB_USER'),
+        password=container.config.get('MARIADB_PASSWORD'),
+        host=container.config.get('MARIADB_HOST'),
+        port=container.config.get('MARIADB_PORT'),
+    )
+    yield ReadReplica(container.get(MySQLDatabase), replica, max_lag_seconds=30, lag_check_seconds=0)
+    replica.close()
+
+
+def test_read_replica__reads_from_replica(read_replica):
+    assert read_replica.database() is read_replica.replica
+    assert read_replica.is_usable
+
+
+@pytest.mark.parametrize('lag_seconds', [60, None])
+def test_read_replica__falls_back_to_primary_past_max_lag(read_replica, lag_seconds):
+    with mock.patch.object(read_replica, '_replica_lag_seconds', return_value=lag_seconds):
+        assert read_replica.database() is read_replica.primary
+
+    assert read_replica.database() is read_replica.replica
+
+
+def test_get_report__reads_from_replica(
+    client, authorization, campaign, today, statistics_clicks, read_replica, monkeypatch
+):
+    from src.container import container
+    from src.reports.cache import StatisticsReportCache
+    from src.reports.repositories import StatisticsReportRepository
+
+    def get_report():
+        container.get(StatisticsReportCache).invalidate()
+        response = client.get(
+            '/api/v2/reports/statistics',
+            headers={'Authorization': authorization},
+            query_string={
+                'campaignId': campaign['id'],
+                'periodStart': (today - timedelta(days=5)).isoformat(),
+                'periodEnd': today.isoformat(),
+                'groupParameters': 'ad_name',
+            },
+        )
+        assert response.status_code == 200, response.text
+        return response.json
+
+    from_primary = get_report()
+    monkeypatch.setattr(container.get(StatisticsReportRepository), 'read_replica', read_replica)
+    with mock.patch.object(read_replica.replica, 'execute_sql', wraps=read_replica.replica.execute_sql) as execute_sql:
+        assert get_report() == from_primary
+
+    assert execute_sql.call_count > 1
+
+
+def test_get_lead__reads_from_primary(client, authorization, statistics_clicks, read_replica, monkeypatch):
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    monkeypatch.setattr(container.get(StatisticsReportRepository), 'read_replica', read_replica)
+    with mock.patch.object(read_replica.replica, 'execute_sql') as execute_sql:
+        response = client.get(
+            f'/api/v2/reports/leads/{statistics_clicks[-1]["click_id"]}', headers={'Authorization': authorization}
+        )
+
+    assert response.status_code == 200, response.text
+    execute_sql.assert_not_called()
+
+
+def test_get_report__is_not_cached_from_replica_after_invalidation(
+    client, authorization, campaign, today, statistics_clicks, write_to_db, read_replica, monkeypatch
+):
+    from src.container import container
+    from src.reports.cache import StatisticsReportCache
+    from src.reports.repositories import StatisticsReportRepository
+
+    def get_report():
+        response = client.get(
+            '/api/v2/reports/statistics',
+            headers={'Authorization': authorization},
+            query_string={
+                'campaignId': campaign['id'],
+                'periodStart': (today - timedelta(days=5)).isoformat(),
+                'periodEnd': today.isoformat(),
+            },
+        )
+        assert response.status_code == 200, response.text
+        return response.json['content']['total']['clicks']
+
+    clicks_count = get_report()
+    write_to_db(
+        'track_click',
+        {
+            'click_id': uuid4(),
+            'campaign_id': campaign['id'],
+            'parameters': {},
+            'created_at': statistics_clicks[0]['created_at'],
+        },
+    )
+    container.get(StatisticsReportCache).invalidate(campaign['id'])
+
+    # the replica does not have the invalidating write yet
+    lagging_replica = mock.Mock()
+    lagging_replica.execute.return_value = mock.Mock(
+        description=[], **{'fetchall.return_value': [], 'fetchone.return_value': None}
+    )
+    monkeypatch.setattr(container.get(StatisticsReportRepository), 'read_replica', read_replica)
+    with mock.patch.object(read_replica, 'database', return_value=lagging_replica):
+        assert get_report() == clicks_count + 1
+        # the refilled fragments come from the primary
+        assert get_report() == clicks_count + 1
+        lagging_replica.execute.assert_not_called()
+
+        monkeypatch.setattr(read_replica, 'max_lag_seconds', 0)
+        get_report()
+        lagging_replica.execute.assert_called()
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from fixtures.utils import click_uuid
+
+
+@pytest.fixture
+def report_repository():
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    return container.get(StatisticsReportRepository)
+
+
+@pytest.fixture
+def postbacks_history(
+    write_to_db, campaign, click_parameters, postback_parameters, timestamp, statistics_clicks, refresh_report_leads
+):
+    from src.reports.workers import _upsert_report_leads_for_leads
+
+    clicks = {}
+    for index, ad_name in ((201, 'ad_history'), (202, 'ad_history'), (203, 'ad_lead_only')):
+        clicks[index] = write_to_db(
+            'track_click',
+            {
+                'click_id': click_uuid(index),
+                'campaign_id': campaign['id'],
+                'parameters': click_parameters | {'ad_name': ad_name},
+                'created_at': timestamp - 60,
+            },
+        )
+
+    # the latest postback wins, whatever its status
+    for click_index, status, created_at in (
+        (201, 'expect', timestamp - 50),
+        (201, 'accept', timestamp - 40),
+        (202, 'accept', timestamp - 50),
+        (202, 'trash', timestamp - 40),
+    ):
+        write_to_db(
+            'track_postback',
+            {
+                'click_id': clicks[click_index]['click_id'],
+                'status': status,
+                'parameters': postback_parameters,
+                'cost_value': campaign['cost_value'],
+                'created_at': created_at,
+            },
+        )
+
+    # a lead without postbacks has a report_lead row without a status
+    write_to_db('track_lead', {'click_id': clicks[203]['click_id'], 'parameters': {}, 'created_at': timestamp - 50})
+    _upsert_report_leads_for_leads({clicks[203]['click_id']})
+    refresh_report_leads()
+
+    return statistics_clicks + list(clicks.values())
+
+
+def _leads_statistics(repository, leads_source, parameters):
+    with mock.patch.object(repository, 'leads_source', leads_source):
+        # rows are ordered by date only
+        return sorted(repository._leads_statistics(parameters), key=repr)
+
+
+@pytest.mark.parametrize(
+    'group_parameters',
+    [[], ['ad_name'], ['utm_source', 'ad_name'], ['adset_name', 'utm_source', 'ad_name']],
+)
+@pytest.mark.parametrize('skip_clicks_without_parameters', [False, True])
+@pytest.mark.parametrize('period_days, is_open_ended', [(0, False), (5, False), (5, True)])
+def test_leads_statistics__report_lead_matches_latest_postbacks(
+    report_repository,
+    campaign,
+    today,
+    postbacks_history,
+    group_parameters,
+    skip_clicks_without_parameters,
+    period_days,
+    is_open_ended,
+):
+    from src.reports.enums import ReportLeadsSource
+
+    parameters = {
+        'campaign_id': campaign['id'],
+        'period_start': today - timedelta(days=period_days),
+        'period_end': None if is_open_ended else today,
+        'group_parameters': group_parameters,
+        'skip_clicks_without_parameters': skip_clicks_without_parameters,
+    }
+
+    latest_postbacks = _leads_statistics(report_repository, ReportLeadsSource.track_postback, parameters)
+
+    assert latest_postbacks
+    assert _leads_statistics(report_repository, ReportLeadsSource.report_lead, parameters) == latest_postbacks
+
+
+def test_leads_statistics__report_lead_counts_latest_status(report_repository, campaign, today, postbacks_history):
+    from src.reports.enums import ReportLeadsSource
+
+    parameters = {
+        'campaign_id': campaign['id'],
+        'period_start': today,
+        'period_end': today,
+        'group_parameters': ['ad_name'],
+    }
+
+    rows = _leads_statistics(report_repository, ReportLeadsSource.report_lead, parameters)
+
+    statuses = {(row[5], row[3]): (row[0], row[1], row[2]) for row in rows if row[5] in {'ad_history', 'ad_lead_only'}}
+    assert statuses == {
+        ('ad_history', 'accept'): (1, 1, campaign['cost_value']),
+        ('ad_history', 'trash'): (1, 1, 0),
+        ('ad_lead_only', None): (1, 0, None),
+    }
+
+
+def test_get_report__report_lead_matches_latest_postbacks(
+    client, authorization, campaign, today, statistics_expenses, postbacks_history, report_repository
+):
+    from src.container import container
+    from src.reports.cache import StatisticsReportCache
+    from src.reports.enums import ReportLeadsSource
+
+    def get_report(leads_source):
+        container.get(StatisticsReportCache).invalidate()
+        with (
+            mock.patch.object(report_repository, 'leads_source', leads_source),
+            # closed days are read from the rollup otherwise
+            mock.patch.object(report_repository, '_daily_stats_until', return_value=None),
+        ):
+            response = client.get(
+                '/api/v2/reports/statistics',
+                headers={'Authorization': authorization},
+                query_string={
+                    'campaignId': campaign['id'],
+                    'periodStart': (today - timedelta(days=5)).isoformat(),
+                    'periodEnd': today.isoformat(),
+                    'groupParameters': 'ad_name,utm_source',
+                },
+            )
+
+        assert response.status_code == 200, response.text
+        return response.json
+
+    assert get_report(ReportLeadsSource.report_lead) == get_report(ReportLeadsSource.track_postback)
@@ -880,7 +880,15 @@ def test_get_report__skip_clicks_without_parameters_filter(
 
 
 def test_get_report__zero_expenses_does_not_cause_division_by_zero(
-    client, authorization, campaign, write_to_db, timestamp, today, click_parameters, postback_parameters
+    client,
+    authorization,
+    campaign,
+    write_to_db,
+    timestamp,
+    today,
+    click_parameters,
+    postback_parameters,
+    refresh_report_leads,
 ):
     click_id = click_uuid(103)
     write_to_db(
@@ -911,6 +919,7 @@ def test_get_report__zero_expenses_does_not_cause_division_by_zero(
             'created_at': timestamp,
         },
     )
+    refresh_report_leads()
 
     response = client.get(
         '/api/v2/reports/statistics',
@@ -952,7 +961,7 @@ def test_get_report__zero_expenses_does_not_cause_division_by_zero(
 
 
 def test_get_report__does_not_count_statistics_outside_filter_boundaries(
-    client, authorization, campaign, write_to_db, today, click_parameters, postback_parameters
+    client, authorization, campaign, write_to_db, today, click_parameters, postback_parameters, refresh_report_leads
 ):
     period_start_timestamp = int(datetime.combine(today, datetime.min.time()).timestamp())
     period_end_timestamp = int(datetime.combine(today, datetime.max.time()).timestamp())
@@ -1020,6 +1029,7 @@ def test_get_report__does_not_count_statistics_outside_filter_boundaries(
             'created_at': period_end_timestamp + 1,
         },
     )
+    refresh_report_leads()
 
     response = client.get(
         '/api/v2/reports/statistics',
@@ -1080,3 +1090,122 @@ def test_get_report__does_not_count_statistics_outside_filter_boundaries(
             },
         }
     }
+
+
+def test_get_report__sparse_skips_empty_nodes(client, authorization, campaign, statistics_expenses, today):
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    query_string = {
+        'campaignId': campaign['id'],
+        'periodStart': (today - timedelta(days=4)).isoformat(),
+        'periodEnd': today.isoformat(),
+        'groupParameters': 'ad_name,utm_source',
+    }
+    dense_response = client.get(
+        '/api/v2/reports/statistics', headers={'Authorization': authorization}, query_string=query_string
+    )
+    assert dense_response.status_code == 200, dense_response.text
+
+    repository = container.get(StatisticsReportRepository)
+    with mock.patch.object(repository, 'get_distribution_values') as get_distribution_values:
+        sparse_response = client.get(
+            '/api/v2/reports/statistics',
+            headers={'Authorization': authorization},
+            query_string=query_string | {'sparse': True},
+        )
+    assert sparse_response.status_code == 200, sparse_response.text
+    get_distribution_values.assert_not_called()
+
+    def _without_empty_nodes(node):
+        if 'clicks' in node:
+            has_leads = any(stats['leads'] for stats in node['statuses'].values())
+            return node if node['clicks'] or has_leads else None
+
+        pruned = {}
+        for key, value in node.items():
+            if isinstance(value, dict):
+                value = _without_empty_nodes(value)
+                if value is None or not any(isinstance(child, dict) for child in value.values()):
+                    continue
+            pruned[key] = value
+        return pruned
+
+    dense_report = dense_response.json['content']['report']
+    sparse_report = sparse_response.json['content']['report']
+    assert sparse_report == {day: _without_empty_nodes(day_report) for day, day_report in dense_report.items()}
+    assert sparse_response.json['content']['total'] == dense_response.json['content']['total']
+    assert sparse_report[(today - timedelta(days=4)).isoformat()] == {}
+
+
+def _scanned_partitions(mysql, query):
+    sql, params = query.sql()
+    with mysql.cursor() as cur:
+        cur.execute(f'EXPLAIN PARTITIONS {sql}', params)
+        columns = [column[0] for column in cur.description]
+        return {
+            row[columns.index('table')]: set(row[columns.index('partitions')].split(','))
+            for row in cur.fetchall()
+            if row[columns.index('table')] in ('track_click', 'track_postback')
+        }
+
+
+def _partitions_in_range(mysql, table_name, start, end):
+    with mysql.cursor() as cur:
+        cur.execute(
+            """
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY PARTITION_ORDINAL_POSITION
+            """,
+            (table_name,),
+        )
+        partitions = cur.fetchall()
+
+    in_range, lower_bound = set(), None
+    for name, description in partitions:
+        upper_bound = None if description == 'MAXVALUE' else int(description)
+        if (lower_bound is None or lower_bound < end) and (upper_bound is None or upper_bound > start):
+            in_range.add(name)
+        lower_bound = upper_bound
+
+    return in_range
+
+
+@pytest.mark.parametrize(
+    'leads_source, table_names',
+    [('report_lead', ['track_click']), ('track_postback', ['track_click', 'track_postback'])],
+)
+def test_leads_statistics__prunes_partitions_outside_of_period(
+    client, campaign, today, mysql, leads_source, table_names
+):
+    from src.container import container
+    from src.reports.enums import ReportLeadsSource
+    from src.reports.repositories import StatisticsReportRepository
+
+    repository = container.get(StatisticsReportRepository)
+    parameters = {'campaign_id': campaign['id'], 'period_start': today - timedelta(days=5), 'period_end': today}
+    period_start, period_end = repository._period_timestamps(parameters)
+    start, end = period_start - repository.gap_seconds, period_end + repository.gap_seconds
+
+    with mock.patch.object(repository, 'leads_source', ReportLeadsSource(leads_source)):
+        scanned = _scanned_partitions(mysql, repository._leads_statistics_query(parameters))
+
+    # report_lead is not partitioned, lead statuses are looked up by click_id there
+    assert scanned == {table_name: _partitions_in_range(mysql, table_name, start, end) for table_name in table_names}
+    assert all('pmax' not in partitions for partitions in scanned.values())
+
+
+def test_available_parameters__prunes_partitions_outside_of_period(client, campaign, today, mysql):
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    repository = container.get(StatisticsReportRepository)
+    parameters = {'campaign_id': campaign['id'], 'period_start': today, 'period_end': today}
+    period_start, period_end = repository._period_timestamps(parameters)
+
+    scanned = _scanned_partitions(mysql, repository._available_parameters_query(parameters))
+
+    assert scanned == {'track_click': _partitions_in_range(mysql, 'track_click', period_start, period_end)}
+    assert 'pmax' not in scanned['track_click']
@@ -0,0 +1,158 @@
+from datetime import timedelta
+from time import sleep
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def report_repository():
+    from src.container import container
+    from src.reports.repositories import StatisticsReportRepository
+
+    return container.get(StatisticsReportRepository)
+
+
+@pytest.fixture
+def closed_before(report_repository, utcnow, today):
+    return min(today + timedelta(days=1), (utcnow - timedelta(seconds=report_repository.gap_seconds)).date())
+
+
+def _get_report(client, authorization, campaign, today):
+    response = client.get(
+        '/api/v2/reports/statistics',
+        headers={'Authorization': authorization},
+        query_string={
+            'campaignId': campaign['id'],
+            'periodStart': (today - timedelta(days=4)).isoformat(),
+            'periodEnd': today.isoformat(),
+            'groupParameters': 'ad_name',
+        },
+    )
+    assert response.status_code == 200, response.text
+    return response.json['content']
+
+
+def test_get_report__closed_days_are_reused(
+    client, authorization, campaign, statistics_expenses, today, report_repository, closed_before
+):
+    report = _get_report(client, authorization, campaign, today)
+
+    with mock.patch.object(report_repository, 'get_statistics', wraps=report_repository.get_statistics) as statistics:
+        assert _get_report(client, authorization, campaign, today) == report
+
+    # only the days which can still get clicks or postbacks in the gap are recomputed
+    statistics.assert_called_once()
+    assert statistics.call_args.args[0]['period_start'] == closed_before
+    assert statistics.call_args.args[0]['period_end'] == today
+
+
+def test_get_report__overlapping_period_reuses_closed_days(
+    client, authorization, campaign, statistics_expenses, today, report_repository, closed_before
+):
+    _get_report(client, authorization, campaign, today)
+
+    with mock.patch.object(report_repository, 'get_statistics', wraps=report_repository.get_statistics) as statistics:
+        response = client.get(
+            '/api/v2/reports/statistics',
+            headers={'Authorization': authorization},
+            query_string={
+                'campaignId': campaign['id'],
+                'periodStart': (today - timedelta(days=6)).isoformat(),
+                'periodEnd': today.isoformat(),
+                'groupParameters': 'ad_name',
+            },
+        )
+        assert response.status_code == 200, response.text
+
+    periods = [(call.args[0]['period_start'], call.args[0]['period_end']) for call in statistics.call_args_list]
+    assert periods == [(today - timedelta(days=6), today - timedelta(days=5)), (closed_before, today)]
+
+
+def test_get_report__postback_invalidates_closed_days(
+    client, authorization, campaign, statistics_clicks, today, monkeypatch
+):
+    monkeypatch.setattr('src.reports.workers.AGGREGATION_PERIOD_SECONDS', 0.1)
+
+    report = _get_report(client, authorization, campaign, today)
+    two_days_ago = (today - timedelta(days=2)).isoformat()
+    assert report['report'][two_days_ago]['ad_1']['statuses']['accept']['leads'] == 0
+
+    response = client.post(
+        '/api/v2/track/postback', json={'clickId': str(statistics_clicks[0]['click_id']), 'state': 'executed'}
+    )
+    assert response.status_code == 201, response.text
+    # the report leads worker refreshes report_lead and drops the cached days once more
+    sleep(0.3)
+
+    report = _get_report(client, authorization, campaign, today)
+    assert report['report'][two_days_ago]['ad_1']['statuses']['accept']['leads'] == 1
+
+
+def test_get_report__report_lead_refresh_invalidates_closed_days(
+    client, authorization, campaign, statistics_clicks, today, timestamp, write_to_db, monkeypatch
+):
+    monkeypatch.setattr('src.reports.workers.AGGREGATION_PERIOD_SECONDS', 0.1)
+
+    two_days_ago = (today - timedelta(days=2)).isoformat()
+    click_id = statistics_clicks[0]['click_id']
+    write_to_db(
+        'track_postback',
+        {
+            'click_id': click_id,
+            'status': 'accept',
+            'parameters': {},
+            'cost_value': campaign['cost_value'],
+            'created_at': timestamp,
+        },
+    )
+
+    # the postback is written, but report_lead is not refreshed yet
+    report = _get_report(client, authorization, campaign, today)
+    assert report['report'][two_days_ago]['ad_1']['statuses']['accept']['leads'] == 0
+
+    write_to_db('report_lead_outbox', {'click_id': click_id, 'source': 'postback'})
+    sleep(0.3)
+
+    report = _get_report(client, authorization, campaign, today)
+    assert report['report'][two_days_ago]['ad_1']['statuses']['accept']['leads'] == 1
+
+
+def test_get_report__submit_expenses_invalidates_closed_days(client, authorization, campaign, statistics_clicks, today):
+    two_days_ago = today - timedelta(days=2)
+    report = _get_report(client, authorization, campaign, today)
+    assert report['report'][two_days_ago.isoformat()]['ad_1']['expenses'] == 0
+
+    response = client.post(
+        '/api/v2/reports/expenses',
+        headers={'Authorization': authorization},
+        json={
+            'campaignId': campaign['id'],
+            'distributionParameter': 'ad_name',
+            'dates': [{'date': two_days_ago.isoformat(), 'distribution': {'ad_1': 10}}],
+        },
+    )
+    assert response.status_code == 200, response.text
+
+    report = _get_report(client, authorization, campaign, today)
+    assert report['report'][two_days_ago.isoformat()]['ad_1']['expenses'] == 10
+
+
+def test_get_statistics_cache(client, authorization, campaign, statistics_clicks, today, closed_before):
+    _get_report(client, authorization, campaign, today)
+    _get_report(client, authorization, campaign, today)
+
+    response = client.get('/api/v2/reports/statistics/cache', headers={'Authorization': authorization})
+
+    assert response.status_code == 200, response.text
+    closed_days = (closed_before - (today - timedelta(days=4))).days
+    assert response.json['content'] == {
+        'size': closed_days,
+        'maxsize': mock.ANY,
+        'hits': closed_days,
+        'misses': closed_days,
+        'evictions': 0,
+        'hitRate': 0.5,
+        'sizeBytes': mock.ANY,
+    }
+    assert response.json['content']['sizeBytes'] > 0
@@ -0,0 +1,123 @@
+from time import sleep
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def alert_service():
+    from src.alerts.services import AlertService
+    from src.container import container
+
+    return container.get(AlertService)
+
+
+@pytest.fixture
+def alert_callbacks(alert_service):
+    from src.alerts import Alert, AlertCode
+
+    codes = [AlertCode.UNKNOWN]
+
+    def collect_alerts(container):
+        return [Alert(code=code, message=f'{code} alert') for code in codes]
+
+    def collect_failing_alerts(container):
+        raise RuntimeError('callback is broken')
+
+    with mock.patch.object(alert_service, '_callbacks', [collect_alerts, collect_failing_alerts]):
+        yield codes
+
+
+def _get_alerts(client, authorization, **query_string):
+    response = client.get('/api/v2/alerts', headers={'Authorization': authorization}, query_string=query_string)
+    assert response.status_code == 200, response.text
+    return response.json
+
+
+def test_get_alerts__serves_snapshot(client, authorization, alert_callbacks):
+    from src.alerts import AlertCode
+
+    alerts = _get_alerts(client, authorization)
+    assert [alert['code'] for alert in alerts['content']] == ['unknown']
+    assert alerts['computedAt'] is not None
+
+    alert_callbacks.append(AlertCode.CORE_CAMPAIGN_DISCARD)
+
+    assert _get_alerts(client, authorization) == alerts
+
+    refreshed_alerts = _get_alerts(client, authorization, refresh='true')
+    assert [alert['code'] for alert in refreshed_alerts['content']] == ['unknown', 'core_campaign_discard']
+
+
+def test_get_alerts__are_evaluated_in_background(client, authorization, alert_service, alert_callbacks):
+    from src.alerts import AlertCode
+
+    with mock.patch.object(alert_service, 'refresh_seconds', 0.1):
+        _get_alerts(client, authorization)
+        alert_callbacks.append(AlertCode.CORE_CAMPAIGN_DISCARD)
+        sleep(0.3)
+
+        alerts = _get_alerts(client, authorization)
+
+    assert [alert['code'] for alert in alerts['content']] == ['unknown', 'core_campaign_discard']
+
+
+def test_evaluate_alerts_worker__evaluates_before_any_request(alert_service, alert_callbacks):
+    from src.alerts.workers import evaluate_alerts_worker
+    from src.container import container
+    from src.core.supervisor import WorkerContext
+
+    evaluate_alerts_worker(container.get(WorkerContext))
+    sleep(0.3)
+
+    states = alert_service.stats()
+    assert [state.failures_count for state in states] == [0, 1]
+    assert [[alert.code for alert in state.alerts] for state in states] == [['unknown'], []]
+
+
+def test_get_alert_evaluations__records_durations_and_failures(client, authorization, alert_callbacks):
+    _get_alerts(client, authorization)
+
+    response = client.get('/api/v2/alerts/evaluations', headers={'Authorization': authorization})
+
+    assert response.status_code == 200, response.text
+    assert response.json == {
+        'content': [
+            {
+                'name': mock.ANY,
+                'computedAt': mock.ANY,
+                'durationMs': mock.ANY,
+                'error': None,
+                'failuresCount': 0,
+                'timeoutsCount': 0,
+            },
+            {
+                'name': mock.ANY,
+                'computedAt': None,
+                'durationMs': mock.ANY,
+                'error': "RuntimeError('callback is broken')",
+                'failuresCount': 1,
+                'timeoutsCount': 0,
+            },
+        ]
+    }
+    assert response.json['content'][0]['name'].endswith('.collect_alerts')
+    assert response.json['content'][1]['name'].endswith('.collect_failing_alerts')
+
+
+def test_get_alerts__does_not_wait_for_hanging_callback(client, authorization, alert_service):
+    def collect_hanging_alerts(container):
+        sleep(1)
+
+    with (
+        mock.patch.object(alert_service, '_callbacks', [collect_hanging_alerts]),
+        mock.patch.object(alert_service, 'callback_timeout_seconds', 0.1),
+    ):
+        assert _get_alerts(client, authorization) == {'content': [], 'computedAt': None}
+        sleep(0.3)
+
+        response = client.get('/api/v2/alerts/evaluations', headers={'Authorization': authorization})
+
+    assert response.status_code == 200, response.text
+    assert response.json['content'][0]['error'] == 'timeout'
+    assert response.json['content'][0]['timeoutsCount'] == 1
@@ -1,4 +1,100 @@
+from time import sleep
+from unittest import mock
+
+
 def test_health(client):
     response = client.get('/api/v2/health')
     assert response.status_code == 200, response.text
     assert response.json == {'healthy': True}
+
+
+def test_get_worker_stats(client, authorization, monkeypatch):
+    monkeypatch.setattr('src.reports.workers.AGGREGATION_PERIOD_SECONDS', 0.1)
+    sleep(0.3)
+
+    response = client.get('/api/v2/health/workers', headers={'Authorization': authorization})
+
+    assert response.status_code == 200, response.text
+    stats = {worker['name']: worker for worker in response.json['content']}
+    assert stats['src.reports.workers.refresh_report_leads_worker'] == {
+        'name': 'src.reports.workers.refresh_report_leads_worker',
+        'lastRunAt': mock.ANY,
+        'durationMs': mock.ANY,
+        'lagMs': mock.ANY,
+        'error': None,
+        'runsCount': mock.ANY,
+        'errorsCount': 0,
+        'timeoutsCount': 0,
+        'runningCount': mock.ANY,
+    }
+    assert stats['src.reports.workers.refresh_report_leads_worker']['runsCount'] > 0
+
+
+def test_get_database_pool_stats__without_pool(client, authorization):
+    response = client.get('/api/v2/health/database', headers={'Authorization': authorization})
+
+    assert response.status_code == 200, response.text
+    assert response.json == {'content': None}
+
+
+def test_get_database_pool_stats(client, authorization, pooled_database):
+    assert client.get('/api/v2/health').status_code == 200
+
+    response = client.get('/api/v2/health/database', headers={'Authorization': authorization})
+
+    assert response.status_code == 200, response.text
+    assert response.json['content'] == {
+        'maxConnections': 10,
+        'inUseCount': mock.ANY,
+        'idleCount': mock.ANY,
+        'checkoutsCount': mock.ANY,
+        'waitsCount': 0,
+        'timeoutsCount': 0,
+        'waitMsTotal': mock.ANY,
+        'waitMsMax': mock.ANY,
+    }
+    assert response.json['content']['checkoutsCount'] > 0
+
+
+def test_get_cache_stats(client, authorization, campaign):
+    from src.container import container
+    from src.core.services import ClientService, FlowService
+
+    client_service = container.get(ClientService)
+    flow_service = container.get(FlowService)
+    for _ in range(3):
+        client_service.user_agent_info('Mozilla/5.0 (X11; Linux x86_64)')
+        flow_service._get_routing_table(campaign['id'])
+
+    response = client.get('/api/v2/health/caches', headers={'Authorization': authorization})
+
+    assert response.status_code == 200, response.text
+    assert response.json['content'] == [
+        {
+            'name': 'user_agents',
+            'size': 1,
+            'maxsize': mock.ANY,
+            'hits': 2,
+            'misses': 1,
+            'evictions': 0,
+            'hitRate': 0.6667,
+        },
+        {
+            'name': 'routing_tables',
+            'size': 1,
+            'maxsize': None,
+            'hits': 2,
+            'misses': 1,
+            'evictions': 0,
+            'hitRate': 0.6667,
+        },
+        {
+            'name': 'unmatched_clients',
+            'size': 0,
+            'maxsize': mock.ANY,
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'hitRate': 0.0,
+        },
+    ]
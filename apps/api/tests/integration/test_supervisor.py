@@ -0,0 +1,161 @@
+from threading import Event
+from time import monotonic, sleep
+from unittest import mock
+
+import pytest
+from fixtures.utils import click_uuid
+
+
+def _leader_lease(name):
+    from src.container import container
+    from src.core.db import ReconnectMySQLDatabase
+    from src.core.supervisor import WorkerLeaderLease
+
+    database = ReconnectMySQLDatabase(
+        container.config.get('MARIADB_DATABASE'),
+        user=container.config.get('MARIADB_USER'),
+        password=container.config.get('MARIADB_PASSWORD'),
+        host=container.config.get('MARIADB_HOST'),
+        port=container.config.get('MARIADB_PORT'),
+    )
+    return database, WorkerLeaderLease(database, name, heartbeat_seconds=0)
+
+
+def _worker_supervisor(monkeypatch, workers, mode='all', pool_size=0, queued=()):
+    from src.core.enums import WorkerMode
+    from src.core.supervisor import WorkerSupervisor
+
+    # the supervisor thread sleeps on a real event, and only ever sees the workers of the test
+    monkeypatch.setattr('src.core.supervisor._REGISTERED_WORKERS', workers)
+    context = mock.Mock(**{'take_wakeups.return_value': {}, 'is_stopping': False})
+    context.wakeup = Event()
+    context.has_queue.side_effect = lambda worker_name: worker_name in queued
+    return WorkerSupervisor(context, mock.Mock(), poll_seconds=60, mode=WorkerMode(mode), pool_size=pool_size)
+
+
+def test_worker_leader_lease__fails_over():
+    first_database, first = _leader_lease('test.worker_leader')
+    second_database, second = _leader_lease('test.worker_leader')
+    try:
+        assert first.refresh() is True
+        assert second.refresh() is False
+        assert first.refresh() is True
+
+        # the lock of a dead leader is freed with its connection
+        first_database.close()
+        assert second.refresh() is True
+        assert first.refresh() is False
+
+        second.release()
+        assert first.refresh() is True
+    finally:
+        first.release()
+        first_database.close()
+        second_database.close()
+
+
+def test_leader_worker__runs_in_the_leader_process_only(client, campaign, write_to_db, read_from_db, monkeypatch):
+    from src.container import container
+    from src.core.supervisor import WorkerContext
+
+    monkeypatch.setattr('src.reports.workers.PARAMETER_CATALOG_PERIOD_SECONDS', 0.1)
+
+    leader_lease = container.get(WorkerContext).leader_lease
+    with mock.patch.object(leader_lease, 'refresh', return_value=False):
+        write_to_db(
+            'track_click',
+            {'click_id': click_uuid(1), 'campaign_id': campaign['id'], 'parameters': {'utm_source': 'fb'}},
+        )
+        sleep(0.3)
+
+        assert read_from_db('track_parameter_catalog') is None
+
+    sleep(0.3)
+
+    catalog = read_from_db('track_parameter_catalog')
+    assert (catalog['parameter'], catalog['value'], catalog['count']) == ('utm_source', 'fb', 1)
+
+
+@pytest.mark.parametrize(
+    'mode, executed_workers', [('all', ['local', 'shared']), ('local', ['local']), ('shared', ['shared'])]
+)
+def test_worker_supervisor__runs_workers_of_its_mode(mode, executed_workers, monkeypatch):
+    executed = []
+    monkeypatch.setattr('src.core.supervisor._PROCESS_LOCAL_WORKERS', {'local'})
+
+    workers = {name: [lambda _, name=name: executed.append(name)] for name in ('local', 'shared')}
+    supervisor = _worker_supervisor(monkeypatch, workers, mode)
+    try:
+        supervisor._run_workers()
+    finally:
+        supervisor.stop()
+
+    assert executed == executed_workers
+
+
+def test_worker_supervisor__slow_worker_does_not_stall_the_others(monkeypatch):
+    from src.core.models import WorkerSchedule
+
+    monkeypatch.setattr('src.core.supervisor._WORKER_SCHEDULES', {'slow': WorkerSchedule(timeout_seconds=0.1)})
+    release = Event()
+    executed = []
+
+    workers = {'slow': [lambda _: release.wait(5)], 'fast': [lambda _: executed.append('fast')]}
+    supervisor = _worker_supervisor(monkeypatch, workers, pool_size=2)
+    try:
+        supervisor._run_workers()
+        sleep(0.2)
+        supervisor._run_workers()
+
+        stats = {stats.name: stats for stats in supervisor.stats()}
+        assert executed == ['fast']
+        assert (stats['fast'].runs_count, stats['fast'].running_count) == (1, 0)
+        assert (stats['slow'].runs_count, stats['slow'].running_count, stats['slow'].timeouts_count) == (0, 1, 1)
+    finally:
+        release.set()
+        supervisor.stop()
+
+
+def test_worker_supervisor__runs_woken_worker_ahead_of_its_period(monkeypatch):
+    from src.core.models import WorkerSchedule
+
+    monkeypatch.setattr('src.core.supervisor._WORKER_SCHEDULES', {'queued': WorkerSchedule(period_seconds=60)})
+    executed = []
+
+    supervisor = _worker_supervisor(monkeypatch, {'queued': [lambda _: executed.append('queued')]})
+    try:
+        assert supervisor._run_workers() == 60
+        assert supervisor._run_workers() == pytest.approx(60, abs=1)
+
+        supervisor.context.take_wakeups.return_value = {'queued': monotonic()}
+        supervisor._run_workers()
+    finally:
+        supervisor.stop()
+
+    assert executed == ['queued', 'queued']
+
+
+@pytest.mark.parametrize(
+    'stop_timeout_seconds, executed_steps',
+    [
+        (5, ['run', 'done', 'drain', 'done']),
+        # the in-flight pass is left running once the wait times out, the buffers are drained anyway
+        (0.1, ['run', 'drain', 'done', 'done']),
+    ],
+)
+def test_worker_supervisor__drains_queued_worker_on_stop(stop_timeout_seconds, executed_steps, monkeypatch):
+    monkeypatch.setattr('src.core.supervisor.SUPERVISOR_STOP_TIMEOUT_SECONDS', stop_timeout_seconds)
+    executed = []
+
+    def flush(context):
+        executed.append('drain' if context.is_stopping else 'run')
+        if not context.is_stopping:
+            sleep(0.3)
+        executed.append('done')
+
+    supervisor = _worker_supervisor(monkeypatch, {'flush': [flush]}, pool_size=1, queued={'flush'})
+    supervisor._run_workers()
+    supervisor.stop()
+    sleep(0.3)
+
+    assert executed == executed_steps
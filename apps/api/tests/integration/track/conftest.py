@@ -14,3 +14,8 @@ def click(campaign, timestamp, write_to_db):
             'created_at': timestamp,
         },
     )
+
+
+@pytest.fixture
+def fast_track_events_flush(monkeypatch):
+    monkeypatch.setattr('src.tracker.workers.WRITE_BEHIND_FLUSH_PERIOD_SECONDS', 0.1)
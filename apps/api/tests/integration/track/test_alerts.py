@@ -1,68 +1,35 @@
-from fixtures.utils import click_uuid
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def write_counters(campaign, write_to_db):
+    def _write_counters(created_at, clicks, discards):
+        bucket_start = created_at // 60 * 60
+        for event_type, count in (('click', clicks), ('discard', discards)):
+            write_to_db(
+                'track_counter',
+                {'campaign_id': campaign['id'], 'event_type': event_type, 'bucket_start': bucket_start, 'count': count},
+                returning=False,
+            )
+
+    return _write_counters
 
 
 def test_get_alerts__suppresses_discard_alert_when_1h_total_is_too_low(
-    client, authorization, campaign, write_to_db, timestamp
+    client, authorization, campaign, write_counters, timestamp
 ):
-    for index in range(19):
-        click = write_to_db(
-            'track_click',
-            {
-                'click_id': click_uuid(index + 1),
-                'campaign_id': campaign['id'],
-                'parameters': {},
-                'created_at': timestamp - 60,
-            },
-        )
-        write_to_db(
-            'track_discard',
-            {
-                'click_id': click['click_id'],
-                'campaign_id': campaign['id'],
-                'country': 'MD',
-                'browser_family': 'Mobile Safari',
-                'os_family': 'iOS',
-                'device_family': 'iPhone',
-                'is_mobile': True,
-                'is_bot': False,
-                'created_at': timestamp - 60,
-            },
-            returning=False,
-        )
+    write_counters(timestamp - 60, clicks=19, discards=19)
 
     response = client.get('/api/v2/alerts', headers={'Authorization': authorization})
 
     assert response.status_code == 200, response.text
-    assert response.json == {'content': []}
+    assert response.json == {'content': [], 'computedAt': mock.ANY}
 
 
-def test_get_alerts__returns_info_discard_alert(client, authorization, campaign, write_to_db, timestamp):
-    for index in range(100):
-        click = write_to_db(
-            'track_click',
-            {
-                'click_id': click_uuid(index + 1),
-                'campaign_id': campaign['id'],
-                'parameters': {},
-                'created_at': timestamp - 60,
-            },
-        )
-        if index == 0:
-            write_to_db(
-                'track_discard',
-                {
-                    'click_id': click['click_id'],
-                    'campaign_id': campaign['id'],
-                    'country': 'MD',
-                    'browser_family': 'Mobile Safari',
-                    'os_family': 'iOS',
-                    'device_family': 'iPhone',
-                    'is_mobile': True,
-                    'is_bot': False,
-                    'created_at': timestamp - 60,
-                },
-                returning=False,
-            )
+def test_get_alerts__returns_info_discard_alert(client, authorization, campaign, write_counters, timestamp):
+    write_counters(timestamp - 60, clicks=100, discards=1)
 
     response = client.get('/api/v2/alerts', headers={'Authorization': authorization})
 
@@ -88,94 +55,18 @@ def test_get_alerts__returns_info_discard_alert(client, authorization, campaign,
                     },
                 },
             }
-        ]
+        ],
+        'computedAt': mock.ANY,
     }
 
 
-def test_get_alerts__returns_warning_discard_alert(client, authorization, campaign, write_to_db, timestamp):
+def test_get_alerts__returns_warning_discard_alert(client, authorization, campaign, write_counters, timestamp):
     # Inside all windows: contributes to 5m, 1h, and 1d.
-    for index in range(25):
-        click = write_to_db(
-            'track_click',
-            {
-                'click_id': click_uuid(index + 1),
-                'campaign_id': campaign['id'],
-                'parameters': {},
-                'created_at': timestamp - 120,
-            },
-        )
-        if index == 0:
-            write_to_db(
-                'track_discard',
-                {
-                    'click_id': click['click_id'],
-                    'campaign_id': campaign['id'],
-                    'country': 'MD',
-                    'browser_family': 'Mobile Safari',
-                    'os_family': 'iOS',
-                    'device_family': 'iPhone',
-                    'is_mobile': True,
-                    'is_bot': False,
-                    'created_at': timestamp - 120,
-                },
-                returning=False,
-            )
-
+    write_counters(timestamp - 120, clicks=25, discards=1)
     # Older than 5m but inside 1h and 1d: contributes only to 1h and 1d.
-    for index in range(20):
-        click = write_to_db(
-            'track_click',
-            {
-                'click_id': click_uuid(index + 101),
-                'campaign_id': campaign['id'],
-                'parameters': {},
-                'created_at': timestamp - 1200,
-            },
-        )
-        if index < 2:
-            write_to_db(
-                'track_discard',
-                {
-                    'click_id': click['click_id'],
-                    'campaign_id': campaign['id'],
-                    'country': 'MD',
-                    'browser_family': 'Mobile Safari',
-                    'os_family': 'iOS',
-                    'device_family': 'iPhone',
-                    'is_mobile': True,
-                    'is_bot': False,
-                    'created_at': timestamp - 1200,
-                },
-                returning=False,
-            )
-
+    write_counters(timestamp - 1200, clicks=20, discards=2)
     # Older than 1h but inside 1d: contributes only to 1d.
-    for index in range(10):
-        click = write_to_db(
-            'track_click',
-            {
-                'click_id': click_uuid(index + 201),
-                'campaign_id': campaign['id'],
-                'parameters': {},
-                'created_at': timestamp - 7200,
-            },
-        )
-        if index < 9:
-            write_to_db(
-                'track_discard',
-                {
-                    'click_id': click['click_id'],
-                    'campaign_id': campaign['id'],
-                    'country': 'MD',
-                    'browser_family': 'Mobile Safari',
-                    'os_family': 'iOS',
-                    'device_family': 'iPhone',
-                    'is_mobile': True,
-                    'is_bot': False,
-                    'created_at': timestamp - 7200,
-                },
-                returning=False,
-            )
+    write_counters(timestamp - 7200, clicks=10, discards=9)
 
     response = client.get('/api/v2/alerts', headers={'Authorization': authorization})
 
@@ -201,37 +92,13 @@ def test_get_alerts__returns_warning_discard_alert(client, authorization, campai
                     },
                 },
             }
-        ]
+        ],
+        'computedAt': mock.ANY,
     }
 
 
-def test_get_alerts__returns_error_discard_alert(client, authorization, campaign, write_to_db, timestamp):
-    for index in range(25):
-        click = write_to_db(
-            'track_click',
-            {
-                'click_id': click_uuid(index + 1),
-                'campaign_id': campaign['id'],
-                'parameters': {},
-                'created_at': timestamp - 60,
-            },
-        )
-        if index < 5:
-            write_to_db(
-                'track_discard',
-                {
-                    'click_id': click['click_id'],
-                    'campaign_id': campaign['id'],
-                    'country': 'MD',
-                    'browser_family': 'Mobile Safari',
-                    'os_family': 'iOS',
-                    'device_family': 'iPhone',
-                    'is_mobile': True,
-                    'is_bot': False,
-                    'created_at': timestamp - 60,
-                },
-                returning=False,
-            )
+def test_get_alerts__returns_error_discard_alert(client, authorization, campaign, write_counters, timestamp):
+    write_counters(timestamp - 60, clicks=25, discards=5)
 
     response = client.get('/api/v2/alerts', headers={'Authorization': authorization})
 
@@ -0,0 +1,170 @@
+import json
+from time import sleep
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+
+class TestTrackBatch:
+    @pytest.fixture(autouse=True)
+    def mock_report_lead_worker_settings(self, monkeypatch):
+        monkeypatch.setattr('src.reports.workers.AGGREGATION_PERIOD_SECONDS', 0.1)
+
+    def test_track_batch__ndjson(self, client, campaign, read_from_db):
+        click_id = uuid4()
+        events = [
+            {'type': 'click', 'clickId': str(click_id), 'campaignId': campaign['id'], 'ad_name': 'ad_1'},
+            {'type': 'lead', 'clickId': str(click_id), 'tid': '123'},
+            {'type': 'postback', 'clickId': str(click_id), 'state': 'executed'},
+        ]
+
+        response = client.post(
+            '/api/v2/track/batch',
+            data='\n'.join(json.dumps(e) for e in events),
+            content_type='application/x-ndjson',
+        )
+        assert response.status_code == 200, response.text
+        assert response.json == {
+            'content': [
+                {'line': 1, 'type': 'click', 'status': 'accepted'},
+                {'line': 2, 'type': 'lead', 'status': 'accepted'},
+                {'line': 3, 'type': 'postback', 'status': 'accepted'},
+            ],
+            'accepted': 3,
+            'rejected': 0,
+            'failed': 0,
+        }
+
+        click = read_from_db('track_click')
+        assert click == {
+            'id': mock.ANY,
+            'campaign_id': campaign['id'],
+            'click_id': click_id,
+            'parameters': mock.ANY,
+            'has_parameters': True,
+            'dimension_1': None,
+            'dimension_2': None,
+            'dimension_3': None,
+            'created_at': mock.ANY,
+        }
+        assert json.loads(click['parameters']) == {'ad_name': 'ad_1'}
+
+        lead = read_from_db('track_lead')
+        assert lead['click_id'] == click_id
+        assert json.loads(lead['parameters']) == {'tid': '123'}
+
+        postback = read_from_db('track_postback')
+        assert postback == {
+            'id': mock.ANY,
+            'click_id': click_id,
+            'parameters': mock.ANY,
+            'status': 'accept',
+            'cost_value': 10,
+            'currency': 'usd',
+            'created_at': mock.ANY,
+        }
+
+        sleep(0.3)
+
+        report_lead = read_from_db('report_lead', filters={'click_id': click_id})
+        assert report_lead['status'] == 'accept'
+
+    def test_track_batch__json_array(self, client, campaign, read_from_db):
+        click_ids = [uuid4() for _ in range(3)]
+
+        response = client.post(
+            '/api/v2/track/batch',
+            json=[{'type': 'click', 'clickId': str(c), 'campaignId': campaign['id']} for c in click_ids],
+        )
+        assert response.status_code == 200, response.text
+        assert response.json['accepted'] == 3
+
+        clicks = read_from_db('track_click', fetchall=True)
+        assert sorted(c['click_id'] for c in clicks) == sorted(click_ids)
+
+    def test_track_batch__rejects_invalid_lines(self, client, campaign, read_from_db):
+        click_id = uuid4()
+        lines = [
+            json.dumps({'type': 'click', 'clickId': str(click_id), 'campaignId': campaign['id']}),
+            '{not a json',
+            json.dumps({'type': 'impression', 'clickId': str(uuid4())}),
+            json.dumps({'type': 'click', 'clickId': str(uuid4())}),
+        ]
+
+        response = client.post('/api/v2/track/batch', data='\n'.join(lines), content_type='application/x-ndjson')
+        assert response.status_code == 200, response.text
+        assert response.json == {
+            'content': [
+                {'line': 1, 'type': 'click', 'status': 'accepted'},
+                {'line': 2, 'type': None, 'status': 'rejected', 'errors': {'_schema': ['Invalid JSON.']}},
+                {
+                    'line': 3,
+                    'type': 'impression',
+                    'status': 'rejected',
+                    'errors': {'type': ['Must be one of: click, lead, postback.']},
+                },
+                {
+                    'line': 4,
+                    'type': 'click',
+                    'status': 'rejected',
+                    'errors': {'campaignId': ['Missing data for required field.']},
+                },
+            ],
+            'accepted': 1,
+            'rejected': 3,
+            'failed': 0,
+        }
+
+        clicks = read_from_db('track_click', fetchall=True)
+        assert [c['click_id'] for c in clicks] == [click_id]
+
+    def test_track_batch__reports_lines_failed_to_write(self, client, campaign, read_from_db):
+        from src.tracker import workers
+
+        click_ids = [uuid4(), uuid4()]
+        events = [{'type': 'click', 'clickId': str(click_id), 'campaignId': campaign['id']} for click_id in click_ids]
+        write_track_events = workers.write_track_events
+
+        def write_without_broken_click(entity, rows, source=None):
+            if any(str(row['click_id']) == str(click_ids[1]) for row in rows):
+                raise RuntimeError('row is broken')
+            write_track_events(entity, rows, source)
+
+        with (
+            mock.patch('src.tracker.services.write_track_events', write_without_broken_click),
+            mock.patch('src.tracker.workers.write_track_events', write_without_broken_click),
+        ):
+            response = client.post('/api/v2/track/batch', json=events)
+
+        assert response.status_code == 200, response.text
+        assert response.json == {
+            'content': [
+                {'line': 1, 'type': 'click', 'status': 'accepted'},
+                {'line': 2, 'type': 'click', 'status': 'failed'},
+            ],
+            'accepted': 1,
+            'rejected': 0,
+            'failed': 1,
+        }
+        clicks = read_from_db('track_click', fetchall=True)
+        assert [c['click_id'] for c in clicks] == click_ids[:1]
+
+        # the batch is sent again as a whole, its written clicks are not written twice
+        response = client.post('/api/v2/track/batch', json=events)
+
+        assert response.status_code == 200, response.text
+        assert response.json['accepted'] == 2
+        clicks = read_from_db('track_click', fetchall=True)
+        assert sorted(c['click_id'] for c in clicks) == sorted(click_ids)
+
+    def test_track_batch__too_large(self, client, campaign, monkeypatch, read_from_db):
+        monkeypatch.setattr('src.tracker.routes.TRACK_BATCH_MAX_EVENTS', 1)
+
+        response = client.post(
+            '/api/v2/track/batch',
+            json=[{'type': 'click', 'clickId': str(uuid4()), 'campaignId': campaign['id']} for _ in range(2)],
+        )
+        assert response.status_code == 413, response.text
+
+        assert read_from_db('track_click') is None
@@ -2,6 +2,8 @@ import json
 from unittest import mock
 from uuid import uuid4
 
+import pytest
+
 
 def test_track_click(client, campaign, read_from_db):
     click_id = uuid4()
@@ -23,6 +25,10 @@ def test_track_click(client, campaign, read_from_db):
         'campaign_id': campaign['id'],
         'click_id': click_id,
         'parameters': mock.ANY,
+        'has_parameters': True,
+        'dimension_1': None,
+        'dimension_2': None,
+        'dimension_3': None,
         'created_at': mock.ANY,
     }
 
@@ -32,3 +38,24 @@ def test_track_click(client, campaign, read_from_db):
         'ad_name': request_payload['ad_name'],
         'pixel': request_payload['pixel'],
     }
+
+
+@pytest.mark.parametrize('dimension_parameters', [['ad_name', 'pixel', 'utm_source']])
+def test_track_click__dimension_parameters(client, campaign, read_from_db):
+    click_id = uuid4()
+    request_payload = {
+        'clickId': str(click_id),
+        'campaignId': campaign['id'],
+        'ad_name': 'ad_1',
+        'pixel': 'p' * 256,
+    }
+
+    response = client.post('/api/v2/track/click', json=request_payload)
+    assert response.status_code == 201, response.text
+
+    # values longer than the dimension columns and missing parameters are kept only in parameters
+    click = read_from_db('track_click')
+    assert click['has_parameters'] == 1
+    assert click['dimension_1'] == 'ad_1'
+    assert click['dimension_2'] is None
+    assert click['dimension_3'] is None
@@ -0,0 +1,133 @@
+from time import sleep
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+WINDOWS = {'5m': 5 * 60, '1h': 60 * 60, '1d': 24 * 60 * 60}
+
+
+@pytest.fixture
+def track_counters():
+    from src.container import container
+    from src.tracker.counters import TrackCounters
+
+    return container.get(TrackCounters)
+
+
+def test_track_click__increments_counters(client, campaign, timestamp, track_counters):
+    from src.tracker.enums import TrackEventType
+
+    for _ in range(3):
+        response = client.post('/api/v2/track/click', json={'clickId': str(uuid4()), 'campaignId': campaign['id']})
+        assert response.status_code == 201, response.text
+
+    totals = track_counters.window_totals(TrackEventType.click, WINDOWS, timestamp)
+
+    assert totals == {campaign['id']: {'5m': 3, '1h': 3, '1d': 3}}
+
+
+def test_persist_track_counters_worker__persists_buckets(
+    client, campaign, timestamp, track_counters, read_from_db, monkeypatch
+):
+    from src.tracker.counters import bucket_start
+    from src.tracker.enums import TrackEventType
+
+    monkeypatch.setattr('src.tracker.workers.TRACK_COUNTERS_PERSIST_PERIOD_SECONDS', 0.1)
+
+    for _ in range(2):
+        response = client.post('/api/v2/track/click', json={'clickId': str(uuid4()), 'campaignId': campaign['id']})
+        assert response.status_code == 201, response.text
+
+    sleep(0.3)
+
+    counters = read_from_db('track_counter', fetchall=True)
+    assert [(row['campaign_id'], row['event_type'], row['count']) for row in counters] == [
+        (campaign['id'], TrackEventType.click.value, 2)
+    ]
+    assert counters[0]['bucket_start'] in {bucket_start(timestamp), bucket_start(timestamp + 60)}
+
+
+def test_track_counters__are_rebuilt_from_persisted_buckets(campaign, timestamp, track_counters, write_to_db):
+    from src.tracker.enums import TrackEventType
+
+    for created_at, count in ((timestamp - 60, 2), (timestamp - 2 * 60 * 60, 3), (timestamp - 2 * 24 * 60 * 60, 5)):
+        write_to_db(
+            'track_counter',
+            {
+                'campaign_id': campaign['id'],
+                'event_type': TrackEventType.discard.value,
+                'bucket_start': created_at // 60 * 60,
+                'count': count,
+            },
+            returning=False,
+        )
+
+    totals = track_counters.window_totals(TrackEventType.discard, WINDOWS, timestamp)
+
+    assert totals == {campaign['id']: {'5m': 2, '1h': 2, '1d': 5}}
+
+
+def test_rolling_counter__reuses_slots_of_expired_buckets(timestamp):
+    from src.tracker.counters import RollingCounter, bucket_start
+
+    counter = RollingCounter(5)
+    current_bucket = bucket_start(timestamp)
+    counter.add(current_bucket - 5 * 60, 10)
+    counter.add(current_bucket, 1)
+    # a bucket older than the one kept in its slot is already outside of the window
+    counter.add(current_bucket - 5 * 60, 10)
+
+    assert counter.totals(timestamp, {'5m': 5 * 60}) == {'5m': 1}
+
+
+def test_track_counters__of_processes_agree(campaign, timestamp, monkeypatch):
+    from collections import Counter
+
+    from src.tracker.counters import TrackCounters, bucket_start
+    from src.tracker.enums import TrackEventType
+
+    monkeypatch.setattr('src.tracker.counters.TRACK_COUNTERS_RELOAD_SECONDS', 0)
+    bucket = bucket_start(timestamp)
+    first, second = TrackCounters(), TrackCounters()
+
+    first.increment(campaign['id'], TrackEventType.discard, bucket, 2)
+    second.increment(campaign['id'], TrackEventType.discard, bucket, 3)
+    first.persist(Counter({(campaign['id'], TrackEventType.discard.value, bucket): 2}))
+    second.persist(Counter({(campaign['id'], TrackEventType.discard.value, bucket): 3}))
+    # an increment this process has not persisted yet is merged with the reloaded buckets
+    second.increment(campaign['id'], TrackEventType.discard, bucket, 1)
+
+    assert first.window_totals(TrackEventType.discard, WINDOWS, timestamp) == {
+        campaign['id']: {'5m': 5, '1h': 5, '1d': 5}
+    }
+    assert second.window_totals(TrackEventType.discard, WINDOWS, timestamp) == {
+        campaign['id']: {'5m': 6, '1h': 6, '1d': 6}
+    }
+
+
+def test_track_counters__are_incremented_in_memory_only(campaign, timestamp, track_counters, monkeypatch):
+    from src.tracker.counters import bucket_start
+    from src.tracker.enums import TrackEventType
+
+    monkeypatch.setattr('src.tracker.counters.TRACK_COUNTERS_RELOAD_SECONDS', 0)
+    bucket = bucket_start(timestamp)
+    track_counters.increment(campaign['id'], TrackEventType.click, bucket, 2)
+
+    with mock.patch('src.tracker.counters.TrackCounter.select', side_effect=RuntimeError('database is down')):
+        track_counters.increment(campaign['id'], TrackEventType.click, bucket)
+        with pytest.raises(RuntimeError):
+            track_counters.window_totals(TrackEventType.click, WINDOWS, timestamp)
+
+    # a failed reload keeps the counters it was about to replace
+    assert track_counters._counters[(campaign['id'], TrackEventType.click)].totals(timestamp, WINDOWS)['5m'] == 3
+
+
+def test_track_click__is_tracked_when_counters_fail(client, campaign, track_counters, read_from_db):
+    click_id = uuid4()
+
+    with mock.patch.object(track_counters, 'increment', side_effect=RuntimeError('counters are broken')):
+        response = client.post('/api/v2/track/click', json={'clickId': str(click_id), 'campaignId': campaign['id']})
+
+    assert response.status_code == 201, response.text
+    assert read_from_db('track_click')['click_id'] == click_id
@@ -1,50 +1,54 @@
+from datetime import datetime, timedelta, timezone
 from time import sleep
 
 import pytest
 from fixtures.utils import click_uuid
 
 
+def _discard(campaign, click_id, created_at):
+    return {
+        'click_id': click_id,
+        'campaign_id': campaign['id'],
+        'country': 'MD',
+        'browser_family': 'Mobile Safari',
+        'os_family': 'iOS',
+        'device_family': 'iPhone',
+        'is_mobile': True,
+        'is_bot': False,
+        'created_at': created_at,
+    }
+
+
 class TestCleanupDiscardWorker:
     @pytest.fixture(autouse=True)
-    def mock_cleanup_discard_worker_settings(self, monkeypatch):
-        monkeypatch.setattr('src.tracker.workers.DISCARD_RETENTION_SECONDS', 300)
+    def mock_cleanup_discard_worker_settings(self, client, monkeypatch):
+        from src.container import container
+        from src.core.supervisor import WorkerContext
+
+        monkeypatch.setattr(container.get(WorkerContext), 'track_discard_retention_seconds', 24 * 60 * 60)
         monkeypatch.setattr('src.tracker.workers.DISCARD_CLEANUP_PERIOD_SECONDS', 0.1)
 
-    def test_cleanup_discard_worker__deletes_expired_discards(
-        self, client, campaign, write_to_db, read_from_db, monkeypatch
+    def test_cleanup_discard_worker__drops_expired_partitions(
+        self, client, campaign, write_to_db, read_from_db, timestamp, read_partitions
     ):
-        monkeypatch.setattr('src.tracker.workers.time.time', lambda: 2000)
-
-        write_to_db(
-            'track_discard',
-            {
-                'click_id': click_uuid(1),
-                'campaign_id': campaign['id'],
-                'country': 'MD',
-                'browser_family': 'Mobile Safari',
-                'os_family': 'iOS',
-                'device_family': 'iPhone',
-                'is_mobile': True,
-                'is_bot': False,
-                'created_at': 1000,
-            },
-        )
-        fresh_discard = write_to_db(
-            'track_discard',
-            {
-                'click_id': click_uuid(2),
-                'campaign_id': campaign['id'],
-                'country': 'UA',
-                'browser_family': 'Chrome',
-                'os_family': 'Android',
-                'device_family': 'Pixel 8',
-                'is_mobile': True,
-                'is_bot': False,
-                'created_at': 1900,
-            },
-        )
+        two_days_ago = datetime.fromtimestamp(timestamp, tz=timezone.utc).date() - timedelta(days=2)
+
+        write_to_db('track_discard', _discard(campaign, click_uuid(1), timestamp - 2 * 24 * 60 * 60))
+        fresh_discard = write_to_db('track_discard', _discard(campaign, click_uuid(2), timestamp - 60))
 
         sleep(0.3)
 
         discards = read_from_db('track_discard', fetchall=True)
         assert discards == [fresh_discard]
+        assert f'p{two_days_ago:%Y%m%d}' not in read_partitions('track_discard')
+
+    def test_cleanup_discard_worker__creates_future_partitions(self, client, timestamp, read_partitions):
+        from src.tracker.workers import DISCARD_PARTITIONS_AHEAD_DAYS
+
+        sleep(0.3)
+
+        today = datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+        partitions = read_partitions('track_discard')
+        for days in range(DISCARD_PARTITIONS_AHEAD_DAYS + 1):
+            assert f'p{today + timedelta(days=days):%Y%m%d}' in partitions
+        assert partitions[-1] == 'pmax'
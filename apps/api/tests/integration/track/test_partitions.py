@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+from time import sleep
+
+import pytest
+from fixtures.utils import click_uuid
+
+
+@pytest.fixture(autouse=True)
+def mock_track_partitions_worker_settings(monkeypatch):
+    monkeypatch.setattr('src.tracker.workers.TRACK_PARTITIONS_PERIOD_SECONDS', 0.1)
+    monkeypatch.setattr('src.tracker.workers.TRACK_PARTITIONS_AHEAD_MONTHS', 4)
+
+
+@pytest.mark.parametrize('table_name', ['track_click', 'track_lead', 'track_postback'])
+def test_maintain_track_partitions_worker__creates_future_partitions(client, timestamp, read_partitions, table_name):
+    sleep(0.3)
+
+    month = datetime.fromtimestamp(timestamp, tz=timezone.utc).date().replace(day=1)
+    partitions = read_partitions(table_name)
+    for _ in range(4 + 1):
+        assert f'p{month:%Y%m}' in partitions
+        month = (month + timedelta(days=32)).replace(day=1)
+    assert partitions[-1] == 'pmax'
+
+
+def test_track_click__rows_are_stored_into_monthly_partitions(client, campaign, write_to_db, timestamp, mysql):
+    write_to_db(
+        'track_click',
+        {'click_id': click_uuid(1), 'campaign_id': campaign['id'], 'parameters': '{}', 'created_at': timestamp},
+    )
+
+    with mysql.cursor() as cur:
+        cur.execute(
+            f'SELECT COUNT(*) FROM track_click PARTITION (p{datetime.fromtimestamp(timestamp, tz=timezone.utc):%Y%m})'
+        )
+        assert cur.fetchone()[0] == 1
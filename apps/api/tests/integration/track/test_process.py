@@ -1,4 +1,8 @@
+import gzip
+import io
 import json
+import zipfile
+from time import sleep
 from unittest import mock
 from uuid import UUID, uuid4
 
@@ -28,7 +32,7 @@ def ip2location_mock(environment):
 
 class TestTrackRedirect:
     def test_track_redirect__tracks_discard_when_no_flow_matches(
-        self, client, campaign, write_to_db, read_from_db, ip2location_mock
+        self, client, campaign, write_to_db, read_from_db, ip2location_mock, fast_track_events_flush
     ):
         click_id = uuid4()
         write_to_db(
@@ -60,9 +64,15 @@ class TestTrackRedirect:
             'click_id': click_id,
             'campaign_id': campaign['id'],
             'parameters': '{}',
+            'has_parameters': False,
+            'dimension_1': None,
+            'dimension_2': None,
+            'dimension_3': None,
             'created_at': mock.ANY,
         }
 
+        sleep(0.3)  # discards are written in batches by flush_track_events_worker
+
         discard = read_from_db('track_discard')
         assert discard == {
             'id': mock.ANY,
@@ -77,6 +87,51 @@ class TestTrackRedirect:
             'created_at': mock.ANY,
         }
 
+    def test_track_redirect__caches_unmatched_clients(
+        self, client, campaign, flow, read_from_db, ip2location_mock, fast_track_events_flush, caplog
+    ):
+        from src.container import container
+        from src.core.services import FlowService
+
+        ip2location_mock.get_country_short.return_value = 'US'
+
+        for _ in range(3):
+            response = client.get(
+                f'/process/{campaign["id"]}',
+                query_string={'clickId': str(uuid4())},
+                headers={'User-Agent': MOBILE_SAFARI_USER_AGENT},
+            )
+            assert response.status_code == 200, response.text
+            assert response.text == ''
+
+        assert container.get(FlowService).unmatched_clients.stats()['hits'] == 2
+        assert [r.message for r in caplog.records].count('Failed to process flows') == 1
+
+        sleep(0.3)
+
+        discards = read_from_db('track_discard', fetchall=True)
+        assert len(discards) == 3
+
+    def test_track_redirect__unmatched_clients_are_invalidated_on_flow_update(
+        self, client, authorization, campaign, flow, ip2location_mock
+    ):
+        ip2location_mock.get_country_short.return_value = 'US'
+
+        response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+        assert response.status_code == 200, response.text
+
+        response = client.patch(
+            f'/api/v2/core/campaigns/{campaign["id"]}/flows/{flow["id"]}',
+            headers={'Authorization': authorization},
+            data={'rule': 'country == "US"', 'actionType': 'redirect', 'redirectUrl': flow['redirect_url']},
+            content_type='multipart/form-data',
+        )
+        assert response.status_code == 200, response.text
+
+        response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+        assert response.status_code == 302, response.text
+        assert response.headers['Location'] == flow['redirect_url']
+
     def test_track_redirect(self, client, campaign, flow, read_from_db, ip2location_mock):
         click_id = uuid4()
         request_payload = {
@@ -104,6 +159,10 @@ class TestTrackRedirect:
             'click_id': click_id,
             'campaign_id': campaign['id'],
             'parameters': mock.ANY,
+            'has_parameters': True,
+            'dimension_1': None,
+            'dimension_2': None,
+            'dimension_3': None,
             'created_at': mock.ANY,
         }
 
@@ -119,6 +178,58 @@ class TestTrackRedirect:
             'tid': request_payload['tid'],
         }
 
+    def test_track_redirect__routing_table_is_invalidated_on_flow_update(
+        self, client, authorization, campaign, flow, ip2location_mock
+    ):
+        response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+        assert response.status_code == 302, response.text
+        assert response.headers['Location'] == flow['redirect_url']
+
+        response = client.patch(
+            f'/api/v2/core/campaigns/{campaign["id"]}/flows/{flow["id"]}',
+            headers={'Authorization': authorization},
+            data={'rule': flow['rule'], 'actionType': 'redirect', 'redirectUrl': 'https://example.org/updated'},
+            content_type='multipart/form-data',
+        )
+        assert response.status_code == 200, response.text
+
+        response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+        assert response.status_code == 302, response.text
+        assert response.headers['Location'] == 'https://example.org/updated'
+
+    def test_track_redirect__caches_parsed_user_agent(self, client, campaign, flow, ip2location_mock):
+        from src.container import container
+        from src.core.services import ClientService
+
+        user_agent_cache = container.get(ClientService).user_agent_cache
+
+        for _ in range(3):
+            response = client.get(
+                f'/process/{campaign["id"]}',
+                query_string={'clickId': str(uuid4())},
+                headers={'User-Agent': MOBILE_SAFARI_USER_AGENT},
+            )
+            assert response.status_code == 302, response.text
+
+        assert user_agent_cache.stats() == {'size': 1, 'maxsize': mock.ANY, 'hits': 2, 'misses': 1, 'evictions': 0}
+
+    def test_track_redirect__evicts_least_recently_used_user_agent(self, client, campaign, flow, ip2location_mock):
+        from src.container import container
+        from src.core.services import ClientService
+
+        user_agent_cache = container.get(ClientService).user_agent_cache
+
+        with mock.patch.object(user_agent_cache, 'maxsize', 1):
+            for user_agent in (MOBILE_SAFARI_USER_AGENT, 'curl/8.4.0', MOBILE_SAFARI_USER_AGENT):
+                response = client.get(
+                    f'/process/{campaign["id"]}',
+                    query_string={'clickId': str(uuid4())},
+                    headers={'User-Agent': user_agent},
+                )
+                assert response.status_code == 302, response.text
+
+        assert user_agent_cache.stats() == {'size': 1, 'maxsize': mock.ANY, 'hits': 0, 'misses': 3, 'evictions': 2}
+
     def test_track_redirect__matches_flow_without_rule(self, client, campaign, write_to_db, ip2location_mock):
         write_to_db(
             'flow',
@@ -280,6 +391,10 @@ class TestTrackRedirect:
             'click_id': mock.ANY,
             'campaign_id': campaign['id'],
             'parameters': '{}',
+            'has_parameters': False,
+            'dimension_1': None,
+            'dimension_2': None,
+            'dimension_3': None,
             'created_at': mock.ANY,
         }
         assert isinstance(click['click_id'], UUID)
@@ -374,6 +489,10 @@ class TestTrackLanding:
             'click_id': click_id,
             'campaign_id': campaign['id'],
             'parameters': mock.ANY,
+            'has_parameters': True,
+            'dimension_1': None,
+            'dimension_2': None,
+            'dimension_3': None,
             'created_at': mock.ANY,
         }
 
@@ -388,3 +507,112 @@ class TestTrackLanding:
             'status': request_payload['status'],
             'tid': request_payload['tid'],
         }
+
+    def test_track_landing__serves_cached_landing_page(
+        self, client, campaign, flow, ip2location_mock, landing_render_mock, landing_page_content
+    ):
+        for _ in range(3):
+            response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+            assert response.status_code == 200, response.text
+            assert response.text == landing_page_content
+
+        assert landing_render_mock.call_count == 1
+
+    def test_track_landing__serves_stale_landing_page_while_revalidating(
+        self, client, campaign, flow, ip2location_mock, landing_render_mock, landing_page_content
+    ):
+        from src.container import container
+        from src.core.services import FlowService
+
+        with mock.patch.object(container.get(FlowService), 'landing_render_cache_ttl_seconds', 0):
+            response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+            assert response.text == landing_page_content
+
+            landing_render_mock.mock(httpx.Response(status_code=200, text='<html>Updated landing page</html>'))
+
+            response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+            assert response.text == landing_page_content
+
+            sleep(0.3)  # wait for the background refresh
+
+            response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+            assert response.text == '<html>Updated landing page</html>'
+
+    def test_track_landing__serves_cached_landing_page_when_renderer_fails(
+        self, client, campaign, flow, ip2location_mock, landing_render_mock, landing_page_content
+    ):
+        from src.container import container
+        from src.core.services import FlowService
+
+        flow_service = container.get(FlowService)
+        with (
+            mock.patch.object(flow_service, 'landing_render_cache_ttl_seconds', 0),
+            mock.patch.object(flow_service, 'landing_render_stale_seconds', 0),
+        ):
+            response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+            assert response.text == landing_page_content
+
+            landing_render_mock.mock(side_effect=httpx.ConnectError('Connection refused'))
+
+            response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+            assert response.status_code == 200, response.text
+            assert response.text == landing_page_content
+
+        assert landing_render_mock.call_count == 2
+
+    def test_track_landing__landing_archive_update_invalidates_cache(
+        self, client, authorization, campaign, flow, ip2location_mock, landing_render_mock
+    ):
+        response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+        assert response.status_code == 200, response.text
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('index.php', '<html><?php echo "Updated landing page"; ?></html>')
+        archive.seek(0)
+
+        response = client.patch(
+            f'/api/v2/core/campaigns/{campaign["id"]}/flows/{flow["id"]}',
+            headers={'Authorization': authorization},
+            data={'rule': flow['rule'], 'actionType': 'render', 'landingArchive': (archive, 'landing.zip')},
+            content_type='multipart/form-data',
+        )
+        assert response.status_code == 200, response.text
+
+        response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+        assert response.status_code == 200, response.text
+
+        assert landing_render_mock.call_count == 2
+
+    def test_track_landing__serves_static_landing_snapshot(
+        self, client, authorization, campaign, flow, ip2location_mock
+    ):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('index.html', '<html>Static landing page</html>')
+            zip_file.writestr('css/style.css', 'body {}')
+        archive.seek(0)
+
+        response = client.patch(
+            f'/api/v2/core/campaigns/{campaign["id"]}/flows/{flow["id"]}',
+            headers={'Authorization': authorization},
+            data={'rule': flow['rule'], 'actionType': 'render', 'landingArchive': (archive, 'landing.zip')},
+            content_type='multipart/form-data',
+        )
+        assert response.status_code == 200, response.text
+
+        # the renderer is not mocked, so any call to it would fail the test
+        response = client.get(f'/process/{campaign["id"]}', query_string={'clickId': str(uuid4())})
+        assert response.status_code == 200, response.text
+        assert response.headers['Content-Type'] == 'text/html; charset=utf-8'
+        assert 'Content-Encoding' not in response.headers
+        assert response.text == '<html>Static landing page</html>'
+
+        response = client.get(
+            f'/process/{campaign["id"]}',
+            query_string={'clickId': str(uuid4())},
+            headers={'Accept-Encoding': 'gzip, deflate'},
+        )
+        assert response.status_code == 200, response.text
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == b'<html>Static landing page</html>'
@@ -0,0 +1,138 @@
+import json
+from queue import Full
+from time import sleep
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+
+class TestWriteBehind:
+    @pytest.fixture(autouse=True)
+    def track_service(self, client, monkeypatch):
+        from src.container import container
+        from src.tracker.services import TrackService
+
+        monkeypatch.setattr('src.tracker.workers.WRITE_BEHIND_FLUSH_PERIOD_SECONDS', 0.1)
+        monkeypatch.setattr('src.reports.workers.AGGREGATION_PERIOD_SECONDS', 0.1)
+
+        track_service = container.get(TrackService)
+        with mock.patch.object(track_service, 'write_behind_enabled', True):
+            yield track_service
+
+    def test_track_click__is_flushed_in_background(self, client, campaign, read_from_db):
+        click_id = uuid4()
+
+        response = client.post(
+            '/api/v2/track/click', json={'clickId': str(click_id), 'campaignId': campaign['id'], 'ad_name': 'ad_1'}
+        )
+        assert response.status_code == 201, response.text
+
+        sleep(0.3)
+
+        click = read_from_db('track_click')
+        assert click == {
+            'id': mock.ANY,
+            'campaign_id': campaign['id'],
+            'click_id': click_id,
+            'parameters': mock.ANY,
+            'has_parameters': True,
+            'dimension_1': None,
+            'dimension_2': None,
+            'dimension_3': None,
+            'created_at': mock.ANY,
+        }
+        assert json.loads(click['parameters']) == {'ad_name': 'ad_1'}
+
+    def test_track_events__are_flushed_in_batches(self, client, campaign, read_from_db):
+        click_ids = [uuid4() for _ in range(5)]
+        for click_id in click_ids:
+            client.post('/api/v2/track/click', json={'clickId': str(click_id), 'campaignId': campaign['id']})
+            client.post('/api/v2/track/lead', json={'clickId': str(click_id)})
+
+        sleep(0.3)
+
+        clicks = read_from_db('track_click', fetchall=True)
+        assert sorted(c['click_id'] for c in clicks) == sorted(click_ids)
+
+        leads = read_from_db('track_lead', fetchall=True)
+        assert sorted(lead['click_id'] for lead in leads) == sorted(click_ids)
+
+    def test_track_lead__refreshes_report_lead_after_flush(self, client, campaign, read_from_db):
+        click_id = uuid4()
+        client.post('/api/v2/track/click', json={'clickId': str(click_id), 'campaignId': campaign['id']})
+        client.post('/api/v2/track/lead', json={'clickId': str(click_id)})
+
+        sleep(0.5)
+
+        report_lead = read_from_db('report_lead', filters={'click_id': click_id})
+        assert report_lead == {
+            'id': mock.ANY,
+            'click_id': click_id,
+            'campaign_id': campaign['id'],
+            'click_created_at': mock.ANY,
+            'status': None,
+            'cost_value': None,
+            'currency': None,
+            'created_at': mock.ANY,
+        }
+
+    def test_track_postback__invalidates_report_cache_after_flush(self, client, campaign, write_to_db):
+        from src.container import container
+        from src.reports.cache import StatisticsReportCache
+        from src.tracker import workers
+
+        click_id = uuid4()
+        write_to_db('track_click', {'click_id': click_id, 'campaign_id': campaign['id'], 'parameters': {}})
+        statistics_report_cache = container.get(StatisticsReportCache)
+
+        with (
+            mock.patch.object(
+                workers, '_invalidate_postback_campaigns', wraps=workers._invalidate_postback_campaigns
+            ) as invalidate_postback_campaigns,
+            mock.patch.object(
+                statistics_report_cache, 'invalidate', wraps=statistics_report_cache.invalidate
+            ) as invalidate,
+        ):
+            response = client.post('/api/v2/track/postback', json={'clickId': str(click_id), 'state': 'executed'})
+            assert response.status_code == 201, response.text
+
+            sleep(0.3)
+
+        rows = invalidate_postback_campaigns.call_args.args[1]
+        assert [str(row['click_id']) for row in rows] == [str(click_id)]
+        assert mock.call(campaign['id']) in invalidate.call_args_list
+
+    def test_track_click__is_written_directly_when_buffer_is_full(self, client, campaign, read_from_db, track_service):
+        click_id = uuid4()
+
+        with mock.patch.object(track_service.worker_supervisor, 'enqueue', side_effect=Full):
+            response = client.post('/api/v2/track/click', json={'clickId': str(click_id), 'campaignId': campaign['id']})
+        assert response.status_code == 201, response.text
+
+        click = read_from_db('track_click')
+        assert click['click_id'] == click_id
+
+    def test_track_events__are_retried_and_written_one_by_one(self, client, campaign, read_from_db):
+        from src.container import container
+        from src.core.supervisor import WorkerContext
+        from src.tracker.workers import LAST_FLUSH_STATE_KEY, flush_track_events_worker, write_track_events
+
+        click_id, broken_click_id = uuid4(), uuid4()
+
+        def write_track_events_failing(entity, rows, source=None):
+            if any(row['click_id'] == broken_click_id for row in rows):
+                raise ValueError('broken row')
+            write_track_events(entity, rows, source)
+
+        with mock.patch('src.tracker.workers.write_track_events', side_effect=write_track_events_failing):
+            for clicked_id in (click_id, broken_click_id):
+                client.post('/api/v2/track/click', json={'clickId': str(clicked_id), 'campaignId': campaign['id']})
+
+            sleep(0.6)
+
+        clicks = read_from_db('track_click', fetchall=True)
+        assert [click['click_id'] for click in clicks] == [click_id]
+
+        state = container.get(WorkerContext).get_state(flush_track_events_worker)
+        assert state[LAST_FLUSH_STATE_KEY]['dropped_counts'] == {'click': 1}